@@ -1,3 +1,14 @@
+import time
+
+import numpy as np
+
+from instr import sessionpool
+from instr.batching import Batch, max_command_length
+from instr.binaryblock import block_header
+from instr.growablearray import GrowableArray
+from instr.instrumentation import timed_write, timed_query, timed_query_block, timed_query_raw
+from instr.runningstats import RunningStats
+
 
 class Agilent34410A:
     """
@@ -11,6 +22,10 @@ class Agilent34410A:
         self._name = idn.split(',')[1].strip()
         self._inst = inst
 
+        self._data_format = 'ASCII'
+        # s per reading, 1 PLC at 50 Hz after *RST
+        self._reading_time = 0.02
+
     def __str__(self):
         return f'{self._name}'
 
@@ -18,12 +33,22 @@ class Agilent34410A:
         return f'{self.__class__}(idn={self._idn})'
 
     def send(self, command):
-        print(f'{self._name}', self._inst.write(command))
+        return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        answer = self._inst.query(question)
-        print(f'{self._name} {answer}')
-        return answer
+        return timed_query(self._name, self._inst, question)
+
+    def query_raw(self, question):
+        return timed_query_raw(self._name, self._inst, question)
+
+    def query_block(self, question, blocks=1):
+        return timed_query_block(self._name, self._inst, question, blocks)
+
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
+
+    def close(self):
+        sessionpool.close(self._inst)
 
     def ping(self):
         print(self.query('*IDN?'))
@@ -53,6 +78,128 @@ class Agilent34410A:
     def remove_marker(self, marker):
         return self.send(f'SET MARKER{marker} OFF')
 
+    def reset(self):
+        self._data_format = 'ASCII'
+        self._reading_time = 0.02
+        return self.send('*RST')
+
+    def configure(self, function='VOLTage:DC', range='AUTO'):
+        """
+        VOLTage:DC | VOLTage:AC | CURRent:DC | CURRent:AC | RESistance | FRESistance | FREQuency | ...
+        """
+        return self.send(f'CONFigure:{function} {range}')
+
+    def set_aperture(self, seconds, function='VOLTage:DC'):
+        """
+        Integration time, 100 us .. 1 s, sets the reading rate.
+        """
+        self._reading_time = float(seconds)
+        return self.send(f'SENSe:{function}:APERture {seconds}')
+
+    def set_nplc(self, nplc, function='VOLTage:DC'):
+        self._reading_time = float(nplc) / 50
+        return self.send(f'SENSe:{function}:NPLC {nplc}')
+
+    def set_trigger_source(self, source='IMMediate'):
+        """
+        IMMediate | BUS | EXTernal
+        """
+        return self.send(f'TRIGger:SOURce {source}')
+
+    def set_trigger_count(self, count):
+        return self.send(f'TRIGger:COUNt {count}')
+
+    def set_sample_count(self, count):
+        """
+        Readings per trigger, up to 50000 in reading memory.
+        """
+        return self.send(f'SAMPle:COUNt {count}')
+
+    def set_data_format(self, fmt='ASCii'):
+        """
+        ASCii - comma separated values, REAL,64 - binary block
+        """
+        self._data_format = 'REAL' if fmt.upper().startswith('REAL') else 'ASCII'
+        return self.send(f'FORMat:DATA {fmt}')
+
+    def configure_stream(self, sample_count, trigger_count=1, aperture=None, function='VOLTage:DC',
+                         source='IMMediate', fmt='REAL,64'):
+        with self.batch():
+            self.configure(function)
+            if aperture is not None:
+                self.set_aperture(aperture, function)
+            self.set_trigger_source(source)
+            self.set_trigger_count(trigger_count)
+            self.set_sample_count(sample_count)
+            self.set_data_format(fmt)
+
+    def initiate(self):
+        return self.send('INITiate')
+
+    def abort(self):
+        return self.send('ABORt')
+
+    def points_available(self):
+        return int(self.query('DATA:POINts?'))
+
+    def read_remove(self, max_count=None):
+        """
+        Take up to max_count readings out of the reading memory (all of them if not given)
+        while the measurement goes on.
+        :return: numpy array, empty if no new readings
+        """
+        answer = self.query_block('R?' if max_count is None else f'R? {max_count}')
+        payload, length = block_header(answer)
+        data = answer[payload:payload + length]
+        if self._data_format == 'REAL':
+            return np.frombuffer(data, dtype='>f8')
+        if not length:
+            return np.empty(0, dtype=np.float64)
+        return np.array(data.split(b','), dtype=np.float64)
+
+    def stream(self, count, max_chunk=10000, poll=0.05, stop_event=None, callback=None, timeout=None):
+        """
+        Start a measurement set up with configure_stream() and drain the reading memory as it fills.
+
+        :param count: readings to collect, trigger count * sample count
+        :param max_chunk: readings per R? query
+        :param poll: wait before asking again when no new readings are there, s
+        :param stop_event: threading.Event to abort the measurement early
+        :param callback: called with (new readings, RunningStats) for every chunk
+        :param timeout: s, by default twice the integration time of count readings (autozero doubles it)
+            plus 5 s; give it explicitly for BUS or EXTernal triggers
+        :return: (readings numpy array, RunningStats)
+        :raises TimeoutError: the readings didn't come in time, the measurement is aborted
+        """
+        if timeout is None:
+            timeout = 2 * count * self._reading_time + 5.0
+        readings = GrowableArray(np.float64, capacity=count)
+        stats = RunningStats()
+        self.initiate()
+        deadline = time.perf_counter() + timeout
+        while len(readings) < count:
+            if stop_event is not None and stop_event.is_set():
+                self.abort()
+                break
+            if time.perf_counter() > deadline:
+                self.abort()
+                raise TimeoutError(f'{self._name}: {len(readings)} of {count} readings in {timeout:g} s')
+            chunk = self.read_remove(max_chunk)
+            if not len(chunk):
+                time.sleep(poll)
+                continue
+            readings.extend(chunk)
+            stats.update(chunk)
+            if callback is not None:
+                callback(chunk, stats)
+        return readings.view, stats
+
+    def read(self) -> float:
+        """
+        Single reading of the configured function.
+        """
+        return float(self.query('READ?'))
+
     def set_system_local(self):
         # pass
         self.send(f'system:local')
@@ -1,12 +1,72 @@
-class Agilent34410AMock:
+import re
+import time
 
-    def __init__(self):
-        pass
+import numpy as np
 
-    def write(self, command):
-        return 'success'
+from instr.binaryblock import make_block
+from instr.mocktransport import MockTransport
 
-    def query(self, question):
-        answer = '-5'
-        return answer
 
+class Agilent34410AMock(MockTransport):
+    """
+    After INITiate readings appear in the reading memory at 1 / aperture per second,
+    R? and DATA:REMove? take them out.
+    """
+    _aperture = re.compile(r':?SENS\w*:[\w:]*:APER\w*\s+(\S+)', re.IGNORECASE)
+    _count = re.compile(r':?(TRIG\w*|SAMP\w*):COUN\w*\s+(\d+)', re.IGNORECASE)
+    _format = re.compile(r':?FORM\w*(:DATA)?\s+(\w+)', re.IGNORECASE)
+    _remove = re.compile(r':?(R|DATA:REM\w*)\?\s*(\d*)', re.IGNORECASE)
+
+    def __init__(self, **timing):
+        super().__init__(**timing)
+        self._rate = 1000.0
+        self._counts = {'TRIG': 1, 'SAMP': 1}
+        self._real = False
+        self._started = None
+        self._taken = 0
+
+    def _available(self):
+        if self._started is None:
+            return 0
+        total = self._counts['TRIG'] * self._counts['SAMP']
+        made = min(total, int((time.perf_counter() - self._started) * self._rate))
+        return made - self._taken
+
+    def _block(self, count):
+        readings = 1.0 + np.random.normal(0, 1e-4, count)
+        if self._real:
+            return make_block(readings, '>f8', terminator=b'')
+        text = ','.join(f'{reading:+.8E}' for reading in readings).encode()
+        return b'#' + str(len(str(len(text)))).encode() + str(len(text)).encode() + text
+
+    def handle(self, command):
+        match = self._aperture.match(command)
+        if match:
+            self._rate = 1 / float(match.group(1))
+            return None
+        match = self._count.match(command)
+        if match:
+            self._counts[match.group(1).upper()[:4]] = int(match.group(2))
+            return None
+        match = self._format.match(command)
+        if match:
+            self._real = match.group(2).upper().startswith('REAL')
+            return None
+        if command.upper().lstrip(':') in ('INIT', 'INITIATE'):
+            self._started = time.perf_counter()
+            self._taken = 0
+            return None
+        if command.upper().lstrip(':') in ('ABOR', 'ABORT'):
+            self._started = None
+            return None
+        if command.upper().lstrip(':') in ('DATA:POIN?', 'DATA:POINTS?'):
+            return f'{self._available()}'
+        match = self._remove.match(command)
+        if match:
+            available = self._available()
+            count = min(int(match.group(2)), available) if match.group(2) else available
+            self._taken += count
+            return self._block(count)
+        if '?' in command:
+            return '-5'
+        return None
@@ -1,8 +1,18 @@
+import numpy as np
+
+from instr import sessionpool
+from instr.batching import Batch, join_commands, max_command_length
+from instr.instrumentation import timed_write, timed_query
+
+
 class AgilentE3644A:
     """
     Agilent E3644A
     Single channel power source.
     """
+    # active_channel setter selects the output on the instrument, AsyncInstrument orders it with the commands
+    io_properties = ('active_channel',)
+
     def __init__(self, address: str, idn: str, inst):
         self._address = address
         self._idn = idn
@@ -18,17 +28,21 @@ class AgilentE3644A:
         return f'{self.__class__}(idn={self._idn})'
 
     def send(self, command):
-        print(f'{self._name}: {command}', self._inst.write(command))
+        return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        answer = self._inst.query(question)
-        print(f'{self._name}: {question} {answer}')
-        return answer
+        return timed_query(self._name, self._inst, question)
+
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
+
+    def close(self):
+        sessionpool.close(self._inst)
 
     def reset(self):
-        print(f'{self._name} reset')
-        print(self.send('*RST'))
+        ret = self.send('*RST')
         self.active_channel = 1
+        return ret
 
     def ping(self):
         print(self.query('*IDN?'))
@@ -64,6 +78,73 @@ class AgilentE3644A:
         return self.query(f'MEAS:CURR?')
         # MEAS:CURR CH1
 
+    # Commands of several outputs in one message: parts are (chan, command) pairs,
+    # INST:SEL is inserted only where the output changes, chan None for common commands like *TRG
+    def _channel_message(self, parts):
+        commands, selected = list(), self._active_channel
+        for chan, command in parts:
+            if chan is not None and chan != selected:
+                if chan not in [1, 2]:
+                    raise ValueError('Wrong channel index.')
+                commands.append(f'INSTrument:SELect OUTPut{chan}')
+                selected = chan
+            commands.append(command)
+        return join_commands(commands), selected
+
+    def send_channels(self, parts):
+        message, selected = self._channel_message(parts)
+        answer = self.send(message)
+        self._active_channel = selected
+        return answer
+
+    def query_channels(self, parts):
+        message, selected = self._channel_message(parts)
+        answer = self.query(message)
+        self._active_channel = selected
+        return answer
+
+    def apply(self, chan, voltage, current):
+        """
+        Set voltage and current of the output at once, V and A
+        """
+        return self.send_channels([(chan, f'APPLy {voltage},{current}')])
+
+    def set_trigger_source(self, chan, source='BUS'):
+        """
+        BUS - *TRG steps the output, IMMediate - INITiate does
+        """
+        return self.send_channels([(chan, f'TRIGger:SOURce {source}')])
+
+    def set_triggered_levels(self, chan, voltage, current):
+        """
+        Levels the output goes to on the next trigger, V and A
+        """
+        return self.send_channels([(chan, f'VOLTage:TRIGgered {voltage}'), (chan, f'CURRent:TRIGgered {current}')])
+
+    def initiate(self, chan):
+        return self.send_channels([(chan, 'INITiate')])
+
+    def trigger(self):
+        return self.send('*TRG')
+
+    @staticmethod
+    def measure_parts(chans):
+        return [(chan, question) for chan in chans for question in ('MEASure:VOLTage?', 'MEASure:CURRent?')]
+
+    @staticmethod
+    def parse_measure(answer, chans):
+        """
+        :return: numpy array (len(chans), 2) of measured voltage, V and current, A
+        """
+        return np.array(f'{answer}'.split(';'), dtype=float).reshape(len(chans), 2)
+
+    def measure(self, chans=(1,)):
+        """
+        Voltage and current of the outputs in one round trip.
+        :return: numpy array (len(chans), 2) of measured voltage, V and current, A
+        """
+        return self.parse_measure(self.query_channels(self.measure_parts(chans)), chans)
+
     # set parameters and trigger output
     # VOLT:TRIG 3.0
     # CURR:TRIG 1.0
@@ -106,7 +187,7 @@ class AgilentE3644A:
             raise ValueError('Wrong channel index.')
 
         if chan != self._active_channel:
-            print(f'{self._name} select chan {chan}', self.send(f'INST:SEL OUTP{chan}'))
+            self.send(f'INST:SEL OUTP{chan}')
             self._active_channel = chan
 
     @property
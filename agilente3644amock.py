@@ -1,12 +1,65 @@
-class AgilentE3644AMock:
+import re
 
-    def __init__(self):
-        pass
+from instr.mocktransport import MockTransport
 
-    def write(self, command):
-        return 'success'
 
-    def query(self, question):
-        answer = '42'
-        return answer
+class AgilentE3644AMock(MockTransport):
+    """
+    Two outputs loaded with load_resistance, Ohm, current limited by the CURRent setting.
+    """
+    _number = r'\s+([-+.\dEe]+)'
+    _select = re.compile(r'INST\w*:(N?SEL\w*)\s+(?:OUTP\w*)?(\d)', re.IGNORECASE)
+    _apply = re.compile(r'APPL\w*' + _number + r'\s*,\s*([-+.\dEe]+)', re.IGNORECASE)
+    _voltage = re.compile(r'VOLT\w*(:TRIG\w*)?' + _number + '$', re.IGNORECASE)
+    _current = re.compile(r'CURR\w*(:TRIG\w*)?' + _number + '$', re.IGNORECASE)
 
+    def __init__(self, load_resistance=100.0, **timing):
+        super().__init__(**timing)
+        self.load_resistance = load_resistance
+        self._selected = 1
+        self._levels = {1: [0.0, 1.0], 2: [0.0, 1.0]}
+        self._triggered = {1: None, 2: None}
+        self._armed = set()
+
+    def _measure(self, chan):
+        voltage, current = self._levels[chan]
+        return min(voltage / self.load_resistance, current)
+
+    def handle(self, command):
+        command = command.lstrip(':')
+        header = command.upper()
+        match = self._select.match(command)
+        if match:
+            self._selected = int(match.group(2))
+            return None
+        match = self._apply.match(command)
+        if match:
+            self._levels[self._selected] = [float(match.group(1)), float(match.group(2))]
+            return None
+        match = self._voltage.match(command) or self._current.match(command)
+        if match:
+            index = 0 if header.startswith('VOLT') else 1
+            if match.group(1):
+                levels = self._triggered[self._selected] or list(self._levels[self._selected])
+                levels[index] = float(match.group(2))
+                self._triggered[self._selected] = levels
+            else:
+                self._levels[self._selected][index] = float(match.group(2))
+            return None
+        if header.startswith('INIT'):
+            self._armed.add(self._selected)
+            return None
+        if header == '*TRG':
+            for chan in self._armed:
+                if self._triggered[chan] is not None:
+                    self._levels[chan] = self._triggered[chan]
+                    self._triggered[chan] = None
+            self._armed.clear()
+            return None
+        if header.startswith('MEAS') and 'VOLT' in header:
+            return f'{self._levels[self._selected][0]:.6g}'
+        if header.startswith('MEAS') and 'CURR' in header:
+            return f'{self._measure(self._selected):.6g}'
+        if '?' in command:
+            return '42'
+        return None
@@ -1,7 +1,23 @@
+import re
+import threading
+import time
 from collections import defaultdict
 
+import numpy as np
 import visa
 
+from instr import discovery, sessionpool
+from instr.batching import Batch, join_commands, max_command_length
+from instr.binaryblock import block_dtype, parse_block, parse_blocks
+from instr.growablearray import GrowableArray
+from instr.instrumentation import (invalidating_on_error, timed_write, timed_query, timed_query_block,
+                                   timed_query_raw)
+from instr.shadowcache import ShadowCache
+from instr.touchstone import write_touchstone
+
+# empty unit is Hz, as the instrument takes a bare number
+freq_units = {'': 1.0, 'HZ': 1.0, 'KHZ': 1e3, 'MHZ': 1e6, 'GHZ': 1e9}
+
 
 class Window:
     WIN_ON = 'ON'
@@ -30,15 +46,22 @@ class Measurement:
     S21 = 'S21'
     S22 = 'S22'
 
-    def __init__(self, chan, name, param):
+    __slots__ = ('_chan', '_name', '_param', '_selected', '_xs', '_ys', '_sweeps')
+
+    def __init__(self, chan, name, param, dtype=np.float64, x_dtype=np.float64):
+        """
+        Sweep history is kept in contiguous typed arrays, pass dtype=np.float32 to halve the memory,
+        or a complex dtype for SDATA.
+        """
         self._chan = chan
         self._name = name
         self._param = param
 
         self._selected = False
 
-        self._xs = list()
-        self._ys = list()
+        self._xs = GrowableArray(x_dtype)
+        self._ys = GrowableArray(dtype)
+        self._sweeps = GrowableArray(np.int64, capacity=16)
 
     def __str__(self):
         return f'<{self.__class__.__name__}>(chan={self.chan}, name={self.name}, param={self.param})'
@@ -63,6 +86,53 @@ class Measurement:
     def create(self):
         return f'CALC{self.chan}:PAR:DEF:EXT "{self.name}",{self.param}'
 
+    def append(self, xs, ys):
+        """
+        Add a sweep to the history.
+        """
+        if len(xs) != len(ys):
+            raise ValueError(f'Got {len(xs)} stimulus points for {len(ys)} data points')
+        self._sweeps.append(len(self._xs))
+        self._xs.extend(xs)
+        self._ys.extend(ys)
+
+    def clear(self):
+        self._xs.clear()
+        self._ys.clear()
+        self._sweeps.clear()
+
+    def sweep(self, index):
+        """
+        :return: (xs, ys) views of one sweep of the history
+        """
+        starts = self._sweeps.view
+        index = range(len(starts))[index]
+        start = starts[index]
+        end = starts[index + 1] if index + 1 < len(starts) else len(self._xs)
+        return self._xs.view[start:end], self._ys.view[start:end]
+
+    @property
+    def sweeps(self):
+        return len(self._sweeps)
+
+    @property
+    def xs(self):
+        """
+        Stimulus values of all sweeps, a view, not a copy.
+        """
+        return self._xs.view
+
+    @property
+    def ys(self):
+        """
+        Data values of all sweeps, a view, not a copy.
+        """
+        return self._ys.view
+
+    @property
+    def nbytes(self):
+        return self._xs.nbytes + self._ys.nbytes + self._sweeps.nbytes
+
 
 class CalbrationSet:
     CAL_SET_ON = 1
@@ -93,6 +163,8 @@ class CalbrationSet:
 class AgilentE8362B:
 
     model = 'E8362B'
+    # properties that talk to the instrument, AsyncInstrument reads them on its worker thread
+    io_properties = ('operation_complete',)
 
     def __init__(self, addr: str, idn: str, inst):
         self._idn = idn
@@ -104,6 +176,13 @@ class AgilentE8362B:
         self._measurements = defaultdict(list)
         self._windows = list()
         self._calibrations = defaultdict(list)
+        self._shadow = ShadowCache()
+        # per channel stimulus axis and the settings it is derived from
+        self._freq_axes = dict()
+        self._sweep_setup = defaultdict(dict)
+
+        self._data_format = 'ASCII'
+        self._byte_order = 'NORMal'
 
     def __str__(self):
         return f'{self._name}'
@@ -111,19 +190,33 @@ class AgilentE8362B:
     def __repr__(self):
         return f'{self.__class__}(idn={self._idn})'
 
+    def _invalidating_on_error(self):
+        return invalidating_on_error(self._shadow.invalidate, self.invalidate_freq_axis)
+
     def send(self, command):
-        ret = self._inst.write(command)
-        print(f'{self._name} send {command}:', ret)
-        return ret
+        # reset, preset and state recall (reset(), calib_import_device_state()) drop the stimulus axes as well
+        if self._shadow.observe(command):
+            self.invalidate_freq_axis()
+        with self._invalidating_on_error():
+            return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        print(f'{self._name} ask {question}')
-        answer = self._inst.query(question)
-        print(f'>>> {answer}')
-        return answer
+        with self._invalidating_on_error():
+            return timed_query(self._name, self._inst, question)
+
+    def query_raw(self, question):
+        with self._invalidating_on_error():
+            return timed_query_raw(self._name, self._inst, question)
+
+    def query_block(self, question, blocks=1):
+        with self._invalidating_on_error():
+            return timed_query_block(self._name, self._inst, question, blocks)
+
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
 
     def close(self):
-        self._inst.close()
+        sessionpool.close(self._inst)
 
     def ping(self):
         return self._inst.query('*IDN?')
@@ -135,8 +228,23 @@ class AgilentE8362B:
         return self.send(f'*WAI')
 
     def format(self, format='ASCII'):
+        """
+        ASCii,0 - comma separated values, default
+        REAL,32 - IEEE 32-bit binary block
+        REAL,64 - IEEE 64-bit binary block
+        """
+        block_dtype(format, self._byte_order)
+        self._data_format = format
         return self.send(f'FORMat {format}')
 
+    def format_border(self, order='SWAPped'):
+        """
+        NORMal - big endian byte order, default
+        SWAPped - little endian byte order, use with PCs
+        """
+        self._byte_order = order
+        return self.send(f'FORMat:BORDer {order}')
+
     def calib_import_device_state(self, name=''):
         return self.send(f'MMEMory:LOAD:CSARchive "{name}"')
 
@@ -157,7 +265,7 @@ class AgilentE8362B:
         :param source:
         :return:
         """
-        return self.send(f'TRIGger:SEQuence:SOURce {source}')
+        return self._shadow.send(self.send, f'TRIGger:SEQuence:SOURce {source}')
 
     def trigger_point_mode(self, chan=1, mode='OFF'):
         """
@@ -167,28 +275,106 @@ class AgilentE8362B:
         :param mode:
         :return:
         """
-        return self.send(f'SENSe{chan}:SWEep:TRIGger:POINt {mode}')
+        return self._shadow.send(self.send, f'SENSe{chan}:SWEep:TRIGger:POINt {mode}')
 
     def trigger_initiate(self, chan=1):
         return self.send(f'INITiate{chan}:IMMediate')
 
+    def trigger_initiate_wait(self, chan=1):
+        """
+        Start a sweep and wait for it to finish in one round trip, VISA timeout must cover the sweep.
+        """
+        return self.query(f'INITiate{chan}:IMMediate;*OPC?')
+
     def trigger_scope(self, scope='CURRENT'):
         return self.send(f'TRIGger:SEQuence:SCOPe {scope}')
 
     def source_power(self, chan=1, port=1, value=0):
-        return self.send(f'SOURce{chan}:POWer{port} {value}dbm')
+        return self._shadow.send(self.send, f'SOURce{chan}:POWer{port} {value}dbm')
 
     def sense_fom_sweep_type(self, chan=1, range=1, type='linear'):
-        return self.send(f'SENSe{chan}:FOM:RANGe{range}:SWEep:TYPE {type}')
+        return self._shadow.send(self.send, f'SENSe{chan}:FOM:RANGe{range}:SWEep:TYPE {type}')
+
+    def sense_sweep_points_get(self, chan=1):
+        points = int(self.query(f'SENSe{chan}:SWEep:POINts?'))
+        self._set_sweep_setup(chan, 'points', points)
+        return points
 
     def sense_sweep_points(self, chan=1, points=51):
-        return self.send(f'SENSe{chan}:SWEep:POINts {points}')
+        self._set_sweep_setup(chan, 'points', int(points))
+        return self._shadow.send(self.send, f'SENSe{chan}:SWEep:POINts {points}')
+
+    def sense_sweep_type(self, chan=1, type='LINear'):
+        """
+        LINear | LOGarithmic | POWer | CW | SEGMent | PHASe
+        """
+        self._set_sweep_setup(chan, 'type', type.upper())
+        return self._shadow.send(self.send, f'SENSe{chan}:SWEep:TYPE {type}')
 
     def sense_freq_start(self, chan=1, value=1, unit='MHz'):
-        return self.send(f'SENSe{chan}:FREQuency:STARt {value}{unit}')
+        self._set_sweep_freq(chan, 'start', value, unit)
+        return self._shadow.send(self.send, f'SENSe{chan}:FREQuency:STARt {value}{unit}')
 
     def sense_freq_stop(self, chan=1, value=1, unit='GHz'):
-        return self.send(f'SENSe{chan}:FREQuency:STOP {value}{unit}')
+        self._set_sweep_freq(chan, 'stop', value, unit)
+        return self._shadow.send(self.send, f'SENSe{chan}:FREQuency:STOP {value}{unit}')
+
+    def _set_sweep_freq(self, chan, key, value, unit):
+        try:
+            self._set_sweep_setup(chan, key, float(value) * freq_units[unit.strip().upper()])
+        except (KeyError, ValueError):
+            # MIN, MAX or a unit the instrument parses itself, ask for the value when the axis is needed
+            self._freq_axes.pop(chan, None)
+            self._sweep_setup[chan].pop(key, None)
+
+    def _set_sweep_setup(self, chan, key, value):
+        setup = self._sweep_setup[chan]
+        if setup.get(key) != value:
+            self._freq_axes.pop(chan, None)
+        setup[key] = value
+
+    def invalidate_freq_axis(self, chan=None):
+        """
+        Forget the cached stimulus axis and sweep settings, of all channels if chan is not given.
+        """
+        if chan is None:
+            self._freq_axes.clear()
+            self._sweep_setup.clear()
+        else:
+            self._freq_axes.pop(chan, None)
+            self._sweep_setup.pop(chan, None)
+
+    def sense_freq_axis(self, chan=1):
+        """
+        Stimulus axis of the channel, cached until the sweep settings change.
+        Linear sweeps are rebuilt on the host from start, stop and points, unknown settings are read
+        in one short query. Other sweep types transfer the axis with SENSe:X? once.
+        :return: numpy array of frequencies, Hz
+        """
+        axis = self._freq_axes.get(chan)
+        if axis is not None:
+            return axis
+
+        setup = self._sweep_setup[chan]
+        missing = [key for key in ('start', 'stop', 'points', 'type') if key not in setup]
+        if missing:
+            questions = {
+                'start': f'SENSe{chan}:FREQuency:STARt?',
+                'stop': f'SENSe{chan}:FREQuency:STOP?',
+                'points': f'SENSe{chan}:SWEep:POINts?',
+                'type': f'SENSe{chan}:SWEep:TYPE?',
+            }
+            answers = f'{self.query(join_commands([questions[key] for key in missing]))}'.split(';')
+            for key, answer in zip(missing, answers):
+                answer = answer.strip().strip('"')
+                setup[key] = answer.upper() if key == 'type' else int(float(answer)) if key == 'points' else float(answer)
+
+        if setup['type'].startswith('LIN') and setup['points'] > 0:
+            axis = np.linspace(setup['start'], setup['stop'], setup['points'])
+        else:
+            axis = self._query_values(f'SENSe{chan}:X?')
+        self._freq_axes[chan] = axis
+        return axis
 
     def calc_create_measurement(self, chan=1, meas_name='', meas_type='S21'):
         if not meas_name:
@@ -211,6 +397,154 @@ class AgilentE8362B:
         """
         return self.query(f'CALCulate{chan}:DATA? FDATA')
 
+    def calc_formatted_data_array(self, chan=1):
+        """
+        Same as calc_formatted_data, but decoded into a NumPy array.
+        Uses binary block transfer if REAL,32 or REAL,64 format is set.
+        :return: numpy.ndarray
+        """
+        return self._query_values(f'CALCulate{chan}:DATA? FDATA')
+
+    def _query_values(self, question):
+        dtype = block_dtype(self._data_format, self._byte_order)
+        if dtype is None:
+            return np.array(self.query(question).split(','), dtype=float)
+        values, _ = parse_block(self.query_block(question), dtype)
+        return values
+
+    def _query_values_list(self, questions):
+        message = join_commands(questions)
+        dtype = block_dtype(self._data_format, self._byte_order)
+        if dtype is None:
+            return [np.array(answer.split(','), dtype=float) for answer in f'{self.query(message)}'.split(';')]
+        return parse_blocks(self.query_block(message, sum('?' in question for question in questions)), dtype)
+
+    def calc_all_data(self, chan=None):
+        """
+        Formatted data of all measurements registered with ref_create_meas in one transfer:
+        parameter selects and data queries go out as one program message, the stimulus axis is cached.
+        :param chan: channel number, all channels with measurements if not given
+        :return: {'freq': stimulus axis, measurement name: formatted data}, numpy arrays
+        """
+        chans = [chan] if chan is not None else sorted(self._measurements)
+        result = dict()
+        for ch in chans:
+            axis = self.sense_freq_axis(ch)
+            if 'freq' not in result:
+                result['freq'] = axis
+            elif not np.array_equal(result['freq'], axis):
+                raise ValueError('Channels have different stimulus axes, fetch them one channel at a time')
+
+        questions = list()
+        names = list()
+        for ch in chans:
+            for meas in self._measurements[ch]:
+                questions.append(f"CALCulate{ch}:PARameter:SELect '{meas.name}'")
+                questions.append(f'CALCulate{ch}:DATA? FDATA')
+                names.append(meas.name)
+        if questions:
+            result.update(zip(names, self._query_values_list(questions)))
+        return result
+
+    def calc_record_data(self, chan=None):
+        """
+        Fetch formatted data of all measurements with calc_all_data() and add it to their sweep history.
+        """
+        data = self.calc_all_data(chan)
+        chans = [chan] if chan is not None else sorted(self._measurements)
+        for ch in chans:
+            for meas in self._measurements[ch]:
+                meas.append(data['freq'], data[meas.name])
+        return data
+
+    def calc_sparams(self, chan=1):
+        """
+        Corrected complex data (SDATA) of the S-parameter measurements registered on the channel,
+        fetched in one transfer, as a network matrix.
+        Every S-parameter of the port count must be measured, e.g. S11, S21, S12 and S22 for 2 ports.
+        :return: (stimulus axis, complex array (points, ports, ports))
+        """
+        params = dict()
+        for meas in self._measurements[chan]:
+            match = re.fullmatch(r'S(\d)_?(\d)', meas.param)
+            if match:
+                params[int(match.group(1)) - 1, int(match.group(2)) - 1] = meas.name
+        if not params:
+            raise ValueError(f'No S-parameter measurements on channel {chan}')
+        nports = max(max(ports) for ports in params) + 1
+        missing = [f'S{i + 1}{j + 1}' for i in range(nports) for j in range(nports) if (i, j) not in params]
+        if missing:
+            raise ValueError(f'Channel {chan} misses measurements for {", ".join(missing)}')
+
+        freqs = self.sense_freq_axis(chan)
+        questions = list()
+        for name in params.values():
+            questions.append(f"CALCulate{chan}:PARameter:SELect '{name}'")
+            questions.append(f'CALCulate{chan}:DATA? SDATA')
+        traces = self._query_values_list(questions)
+
+        sparams = np.empty((len(freqs), nports, nports), dtype=complex)
+        for (i, j), values in zip(params, traces):
+            sparams[:, i, j] = values[0::2] + 1j * values[1::2]
+        return freqs, sparams
+
+    def save_touchstone(self, path, chan=1, fmt='DB'):
+        """
+        Store the channel network data as Touchstone file on the host, see calc_sparams().
+        """
+        freqs, sparams = self.calc_sparams(chan)
+        write_touchstone(path, freqs, sparams, fmt=fmt, comments=[f'{self._idn.strip()}'])
+        return path
+
+    def stream_sweeps(self, buffer, chan=1, meas_name='', count=None, stop_event=None):
+        """
+        Repeated sweeps into a SweepRingBuffer until count frames are taken or stop_event is set.
+        Meant to run on its own thread, consumers read the buffer from others.
+        Buffer is closed when acquisition ends, with the exception if it failed.
+        :return: number of sweeps taken
+        """
+        taken = 0
+        try:
+            if meas_name:
+                self.calc_parameter_select(chan, meas_name)
+            while count is None or taken < count:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                self.trigger_initiate_wait(chan)
+                buffer.put(self.calc_formatted_data_array(chan), time.time())
+                taken += 1
+        except Exception as ex:
+            buffer.close(ex)
+            raise
+        finally:
+            buffer.close()
+        return taken
+
+    def iter_sweeps(self, buffer, chan=1, meas_name='', count=None):
+        """
+        Generator over timestamped frames of repeated sweeps, acquisition runs on a background thread.
+        Frames are overwritten oldest first if the consumer is slower than the sweeps,
+        see buffer.dropped. Closing the generator stops the acquisition.
+        An acquisition error is raised from the generator after the frames taken before it.
+        :return: generator of (sequence number, timestamp, frame)
+        """
+        stop_event = threading.Event()
+
+        def acquire():
+            try:
+                self.stream_sweeps(buffer, chan, meas_name, count, stop_event)
+            except Exception:
+                # kept by the buffer and raised to the consumer
+                pass
+
+        worker = threading.Thread(target=acquire, daemon=True)
+        worker.start()
+        try:
+            yield from buffer
+        finally:
+            stop_event.set()
+            worker.join()
+
     def ref_create_window(self, win: Window):
         self._windows.append(win)
         return self.send(win.create)
@@ -225,6 +559,9 @@ class AgilentE8362B:
 
     def ref_load_cal_set(self, calset: CalbrationSet):
         self._calibrations[calset.chan].append(calset)
+        # activating a cal set may change the stimulus settings
+        self._shadow.invalidate()
+        self.invalidate_freq_axis(calset.chan)
         return self.send(calset.activate)
 
     # TODO implement
@@ -351,6 +688,10 @@ class AgilentE8362B:
     # Query Syntax Not Applicable
     # Default Not Applicable
 
+    @property
+    def shadow(self):
+        return self._shadow
+
     @property
     def name(self):
         return self._name
@@ -367,28 +708,21 @@ class AgilentE8362B:
 
     @classmethod
     def from_address_string(cls, address: str):
-        rm = visa.ResourceManager()
         try:
-            inst = rm.open_resource(address)
-            idn = inst.query('*IDN?')
-            return cls(idn, inst=inst)
+            inst, idn = sessionpool.identify(address)
+            return cls(address, idn, inst)
         except visa.VisaIOError as ex:
+            sessionpool.release(address)
             raise RuntimeError(f'VISA error: {address}: {ex}')
 
     @classmethod
-    def try_find(cls):
-        rm = visa.ResourceManager()
-        for res in rm.list_resources():
-            print(f'trying {res}')
-            try:
-                inst = rm.open_resource(res)
-                idn = inst.query('*IDN?')
-                if cls.model in idn:
-                    return cls(idn=idn, inst=inst), res
-            except visa.VisaIOError as ex:
-                print(f'VISA error: {ex}')
-        else:
+    def try_find(cls, timeout=500):
+        found = discovery.find_model(cls.model, timeout=timeout)
+        if found is None:
             return None
+        res, idn = found
+        inst = sessionpool.open_resource(res)
+        return cls(res, idn, inst), res
 
     @property
     def addr(self):
@@ -1,4 +1,8 @@
-class AgilentE8362BMock:
+from instr.binaryblock import block_dtype, make_block
+from instr.mocktransport import MockTransport
+
+
+class AgilentE8362BMock(MockTransport):
     data = {
         'CH1_S21': [
             '20.883220672607422,21.327270507812500,21.759923934936523,22.179792404174805,22.609869003295898,22.988500595092773,23.401487350463867,23.791971206665039,24.147428512573242,24.488376617431641,24.826988220214844,25.127117156982422,25.433427810668945,25.703178405761719,25.965147018432617,26.201879501342773,26.427101135253906,26.646255493164063,26.825244903564453,26.997163772583008,27.138139724731445,27.309221267700195,27.429327011108398,27.538095474243164,27.648674011230469,27.747488021850586,27.830459594726562,27.920211791992187,27.967985153198242,28.034393310546875,28.100347518920898,28.147317886352539,28.196577072143555,28.248735427856445,28.286705017089844,28.314685821533203,28.342298507690430,28.381856918334961,28.403390884399414,28.438232421875000,28.464069366455078,28.504180908203125,28.506523132324219,28.524747848510742,28.546117782592773,28.549415588378906,28.552970886230469,28.573295593261719,28.602466583251953,28.592342376708984,28.610702514648438,28.635225296020508,28.623472213745117,28.617059707641602,28.630828857421875,28.624059677124023,28.634901046752930,28.636875152587891,28.641866683959961,28.635814666748047,28.635725021362305,28.627941131591797,28.649616241455078,28.634801864624023,28.631156921386719,28.629865646362305,28.643198013305664,28.629230499267578,28.618999481201172,28.622154235839844,28.623325347900391,28.636041641235352,28.613245010375977,28.618757247924805,28.629753112792969,28.607162475585938,28.610399246215820,28.622400283813477,28.610174179077148,28.611017227172852,28.624197006225586,28.605140686035156,28.620080947875977,28.619064331054687,28.600299835205078,28.614259719848633,28.606920242309570,28.605106353759766,28.600803375244141,28.596826553344727,28.592416763305664,28.581182479858398,28.590570449829102,28.581653594970703,28.590597152709961,28.566108703613281,28.576227188110352,28.580297470092773,28.583658218383789,28.571706771850586,28.578327178955078,28.564517974853516,28.552024841308594,28.554567337036133,28.553909301757813,28.545324325561523,28.550413131713867,28.557950973510742,28.565017700195313,28.568696975708008,28.554853439331055,28.562486648559570,28.553602218627930,28.551908493041992,28.555057525634766,28.551025390625000,28.554323196411133,28.545917510986328,28.540506362915039,28.545198440551758,28.520290374755859,28.509872436523438,28.489721298217773,28.476982116699219,28.439163208007813,28.396726608276367,28.365861892700195,28.321250915527344,28.273912429809570,28.215471267700195,28.157112121582031,28.072343826293945,27.984346389770508,27.892913818359375,27.784261703491211,27.659227371215820,27.514053344726563,27.374578475952148,27.214536666870117,27.052190780639648,26.873407363891602,26.682821273803711,26.455949783325195,26.274457931518555,26.028457641601563,25.795356750488281,25.557426452636719,25.296598434448242,25.035020828247070,24.744997024536133,24.456024169921875,24.170927047729492,23.868068695068359,23.587451934814453,23.281564712524414,22.967929840087891,22.671268463134766,22.353363037109375,22.043157577514648,21.744447708129883,21.415002822875977,21.088464736938477,20.781284332275391,20.463996887207031,20.166061401367188,19.818185806274414,19.510631561279297,19.237907409667969,18.901973724365234,18.598134994506836,18.274848937988281,17.997200012207031,17.674503326416016,17.381540298461914,17.067918777465820,16.766763687133789,16.460638046264648,16.183490753173828,15.891448974609375,15.593140602111816,15.305214881896973,15.041205406188965,14.764137268066406,14.476531028747559,14.168650627136230,13.900645256042480,13.634774208068848,13.354303359985352,13.063027381896973,12.803316116333008,12.557789802551270,12.309226036071777,12.011340141296387,11.762094497680664,11.498032569885254,11.238612174987793,10.986917495727539,10.726914405822754,10.503112792968750,10.239066123962402,10.013486862182617',
@@ -74,38 +78,59 @@ class AgilentE8362BMock:
         ]
     }
 
-    def __init__(self):
-        self._last_write = ''
+    freqs = '1100000000.0,1102000000.0,1104000000.0,1106000000.0,1108000000.0,1110000000.0,1112000000.0,1114000000.0,1116000000.0,1118000000.0,1120000000.0,1122000000.0,1124000000.0,1126000000.0,1128000000.0,1130000000.0,1132000000.0,1134000000.0,1136000000.0,1138000000.0,1140000000.0,1142000000.0,1144000000.0,1146000000.0,1148000000.0,1150000000.0,1152000000.0,1154000000.0,1156000000.0,1158000000.0,1160000000.0,1162000000.0,1164000000.0,1166000000.0,1168000000.0,1170000000.0,1172000000.0,1174000000.0,1176000000.0,1178000000.0,1180000000.0,1182000000.0,1184000000.0,1186000000.0,1188000000.0,1190000000.0,1192000000.0,1194000000.0,1196000000.0,1198000000.0,1200000000.0,1202000000.0,1204000000.0,1206000000.0,1208000000.0,1210000000.0,1212000000.0,1214000000.0,1216000000.0,1218000000.0,1220000000.0,1222000000.0,1224000000.0,1226000000.0,1228000000.0,1230000000.0,1232000000.0,1234000000.0,1236000000.0,1238000000.0,1240000000.0,1242000000.0,1244000000.0,1246000000.0,1248000000.0,1250000000.0,1252000000.0,1254000000.0,1256000000.0,1258000000.0,1260000000.0,1262000000.0,1264000000.0,1266000000.0,1268000000.0,1270000000.0,1272000000.0,1274000000.0,1276000000.0,1278000000.0,1280000000.0,1282000000.0,1284000000.0,1286000000.0,1288000000.0,1290000000.0,1292000000.0,1294000000.0,1296000000.0,1298000000.0,1300000000.0,1302000000.0,1304000000.0,1306000000.0,1308000000.0,1310000000.0,1312000000.0,1314000000.0,1316000000.0,1318000000.0,1320000000.0,1322000000.0,1324000000.0,1326000000.0,1328000000.0,1330000000.0,1332000000.0,1334000000.0,1336000000.0,1338000000.0,1340000000.0,1342000000.0,1344000000.0,1346000000.0,1348000000.0,1350000000.0,1352000000.0,1354000000.0,1356000000.0,1358000000.0,1360000000.0,1362000000.0,1364000000.0,1366000000.0,1368000000.0,1370000000.0,1372000000.0,1374000000.0,1376000000.0,1378000000.0,1380000000.0,1382000000.0,1384000000.0,1386000000.0,1388000000.0,1390000000.0,1392000000.0,1394000000.0,1396000000.0,1398000000.0,1400000000.0,1402000000.0,1404000000.0,1406000000.0,1408000000.0,1410000000.0,1412000000.0,1414000000.0,1416000000.0,1418000000.0,1420000000.0,1422000000.0,1424000000.0,1426000000.0,1428000000.0,1430000000.0,1432000000.0,1434000000.0,1436000000.0,1438000000.0,1440000000.0,1442000000.0,1444000000.0,1446000000.0,1448000000.0,1450000000.0,1452000000.0,1454000000.0,1456000000.0,1458000000.0,1460000000.0,1462000000.0,1464000000.0,1466000000.0,1468000000.0,1470000000.0,1472000000.0,1474000000.0,1476000000.0,1478000000.0,1480000000.0,1482000000.0,1484000000.0,1486000000.0,1488000000.0,1490000000.0,1492000000.0,1494000000.0,1496000000.0,1498000000.0,1500000000.0'
+
+    def __init__(self, **timing):
+        super().__init__(**timing)
         self._success = '#OK'
         self._par_sel = ''
         self._cycle = 0
+        self._format = 'ASCII'
+        self._border = 'NORMal'
 
-    def write(self, what: str):
-        self._last_write = what
-        if 'PAR:SEL' in what:
-            self._par_sel = what[what.index('"') + 1:what.index('"', 15)]
-
-    def read(self):
-        ans = 0
-        if self._last_write == 'SENS1:SWE:POINts?':
-            ans = 201
-        elif ':DATA? FDATA' in self._last_write:
+    def handle(self, what: str):
+        what = what.lstrip(':')
+        if what.startswith('FORMat:BORDer') or what.startswith('FORM:BORD'):
+            self._border = what.split()[1]
+        elif what.startswith('FORMat') or what.startswith('FORM'):
+            self._format = what.split()[1]
+        elif 'PAR:SEL' in what or 'PARameter:SELect' in what:
+            self._par_sel = what.split(maxsplit=1)[1].strip('\'"')
+        elif what.endswith('SWE:POINts?') or what.endswith('SWEep:POINts?'):
+            return 201
+        elif what.endswith('FREQuency:STARt?'):
+            return 1100000000.0
+        elif what.endswith('FREQuency:STOP?'):
+            return 1500000000.0
+        elif what.endswith('SWEep:TYPE?'):
+            return 'LIN'
+        elif ':DATA? FDATA' in what:
             try:
                 ans = self.data[self._par_sel][self._cycle]
             except IndexError:
                 ans = self.data[self._par_sel][-1]
             if self._par_sel == 'CH1_S22':
                 self._cycle += 1
-        elif self._last_write == '*OPC?':
-            ans = 1
-        elif self._last_write == 'SENS1:X?':
-            ans = '1100000000.0,1102000000.0,1104000000.0,1106000000.0,1108000000.0,1110000000.0,1112000000.0,1114000000.0,1116000000.0,1118000000.0,1120000000.0,1122000000.0,1124000000.0,1126000000.0,1128000000.0,1130000000.0,1132000000.0,1134000000.0,1136000000.0,1138000000.0,1140000000.0,1142000000.0,1144000000.0,1146000000.0,1148000000.0,1150000000.0,1152000000.0,1154000000.0,1156000000.0,1158000000.0,1160000000.0,1162000000.0,1164000000.0,1166000000.0,1168000000.0,1170000000.0,1172000000.0,1174000000.0,1176000000.0,1178000000.0,1180000000.0,1182000000.0,1184000000.0,1186000000.0,1188000000.0,1190000000.0,1192000000.0,1194000000.0,1196000000.0,1198000000.0,1200000000.0,1202000000.0,1204000000.0,1206000000.0,1208000000.0,1210000000.0,1212000000.0,1214000000.0,1216000000.0,1218000000.0,1220000000.0,1222000000.0,1224000000.0,1226000000.0,1228000000.0,1230000000.0,1232000000.0,1234000000.0,1236000000.0,1238000000.0,1240000000.0,1242000000.0,1244000000.0,1246000000.0,1248000000.0,1250000000.0,1252000000.0,1254000000.0,1256000000.0,1258000000.0,1260000000.0,1262000000.0,1264000000.0,1266000000.0,1268000000.0,1270000000.0,1272000000.0,1274000000.0,1276000000.0,1278000000.0,1280000000.0,1282000000.0,1284000000.0,1286000000.0,1288000000.0,1290000000.0,1292000000.0,1294000000.0,1296000000.0,1298000000.0,1300000000.0,1302000000.0,1304000000.0,1306000000.0,1308000000.0,1310000000.0,1312000000.0,1314000000.0,1316000000.0,1318000000.0,1320000000.0,1322000000.0,1324000000.0,1326000000.0,1328000000.0,1330000000.0,1332000000.0,1334000000.0,1336000000.0,1338000000.0,1340000000.0,1342000000.0,1344000000.0,1346000000.0,1348000000.0,1350000000.0,1352000000.0,1354000000.0,1356000000.0,1358000000.0,1360000000.0,1362000000.0,1364000000.0,1366000000.0,1368000000.0,1370000000.0,1372000000.0,1374000000.0,1376000000.0,1378000000.0,1380000000.0,1382000000.0,1384000000.0,1386000000.0,1388000000.0,1390000000.0,1392000000.0,1394000000.0,1396000000.0,1398000000.0,1400000000.0,1402000000.0,1404000000.0,1406000000.0,1408000000.0,1410000000.0,1412000000.0,1414000000.0,1416000000.0,1418000000.0,1420000000.0,1422000000.0,1424000000.0,1426000000.0,1428000000.0,1430000000.0,1432000000.0,1434000000.0,1436000000.0,1438000000.0,1440000000.0,1442000000.0,1444000000.0,1446000000.0,1448000000.0,1450000000.0,1452000000.0,1454000000.0,1456000000.0,1458000000.0,1460000000.0,1462000000.0,1464000000.0,1466000000.0,1468000000.0,1470000000.0,1472000000.0,1474000000.0,1476000000.0,1478000000.0,1480000000.0,1482000000.0,1484000000.0,1486000000.0,1488000000.0,1490000000.0,1492000000.0,1494000000.0,1496000000.0,1498000000.0,1500000000.0'
-        return ans
+            return self._values(ans)
+        elif ':DATA? SDATA' in what:
+            # formatted data is log magnitude, serve it back as real/imaginary pairs with zero phase
+            try:
+                ans = self.data[self._par_sel][self._cycle]
+            except IndexError:
+                ans = self.data[self._par_sel][-1]
+            mags = [10 ** (float(db) / 20) for db in ans.split(',')]
+            return self._values(','.join(f'{mag},0' for mag in mags))
+        elif what.endswith(':X?'):
+            return self._values(self.freqs)
+        elif '?' in what:
+            return 0
+        return None
 
-    def query(self, what: str):
-        self.write(what)
-        return self.read()
+    def _values(self, ans):
+        dtype = block_dtype(self._format, self._border)
+        if dtype is None:
+            return ans
+        return make_block(ans.split(','), dtype, terminator=b'')
 
     def close(self):
         print('pna mock close')
-
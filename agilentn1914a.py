@@ -1,6 +1,21 @@
-class AgilentN1914A:
+import time
+
+import numpy as np
+
+from instr import sessionpool
+from instr.batching import Batch, join_commands, max_command_length
+from instr.binaryblock import parse_blocks
+from instr.instrumentation import invalidating_on_error, timed_write, timed_query, timed_query_block, timed_query_raw
+from instr.shadowcache import ShadowCache
 
-    # TODO implement SCPI: set reference level
+# readings per second of E-series sensors at SENSe:MRATe settings
+MEASUREMENT_RATES = {'NORMAL': 20.0, 'DOUBLE': 40.0, 'FAST': 400.0}
+
+
+class AgilentN1914A:
+    """
+    N1914A / N1912A dual channel power meter, N1913A / N1911A have channel 1 only.
+    """
 
     def __init__(self, address: str, idn: str, inst):
         self._address = address
@@ -8,52 +23,164 @@ class AgilentN1914A:
         self._name = idn.split(',')[1].strip()
         self._inst = inst
 
+        self._shadow = ShadowCache()
+        self._data_format = 'ASCII'
+        self._rates = dict()
+
     def __str__(self):
         return f'{self._name}'
 
     def __repr__(self):
         return f'{self.__class__}(idn={self._idn})'
 
+    def _invalidating_on_error(self):
+        return invalidating_on_error(self._shadow.invalidate)
+
     def send(self, command):
-        print(f'{self._name}', self._inst.write(command))
+        self._shadow.observe(command)
+        with self._invalidating_on_error():
+            return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        answer = self._inst.query(question)
-        print(f'{self._name} {answer}')
-        return answer
+        with self._invalidating_on_error():
+            return timed_query(self._name, self._inst, question)
 
-    def ping(self):
-        print(self.query('*IDN?'))
-
-    def set_autocalibrate(self, state):
-        self.send(f':CAL:AUTO {state}')
-
-    def set_span(self, value, unit):
-        self.send(f':SENS:FREQ:SPAN {value}{unit}')
-
-    def set_marker_mode(self, marker: int, mode='POS'):
-        self.send(f':CALC:MARK{marker}:MODE {mode}')
+    def query_raw(self, question):
+        with self._invalidating_on_error():
+            return timed_query_raw(self._name, self._inst, question)
 
-    def set_pow_attenuation(self, value):
-        self.send(f':POW:ATT {value}')
+    def query_block(self, question, blocks=1):
+        with self._invalidating_on_error():
+            return timed_query_block(self._name, self._inst, question, blocks)
 
-    def set_measure_center_freq(self, value, unit):
-        self.send(f':SENSe:FREQuency:RF:CENTer {value}{unit}')
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
 
-    def set_marker1_x_center(self, value, unit):
-        self.send(f':CALCulate:MARKer1:X:CENTer {value}{unit}')
+    def close(self):
+        sessionpool.close(self._inst)
 
-    def read_pow(self, marker: int=1) -> float:
-        answer = self.query(f':CALCulate:MARKer{marker}:Y?')
-        return float(answer)
+    def ping(self):
+        print(self.query('*IDN?'))
 
-    def remove_marker(self, marker=1):
-        return self.send(f':CALC:MARK{marker}:MODE OFF')
+    def reset(self):
+        self._rates.clear()
+        self._data_format = 'ASCII'
+        return self.send('*RST')
+
+    def set_frequency(self, chan, value, unit):
+        """
+        Frequency of the sensor calibration factor.
+        """
+        return self._shadow.send(self.send, f'SENSe{chan}:FREQuency {value}{unit}')
+
+    def set_averaging(self, chan, count=None):
+        """
+        :param count: averaged readings, None turns averaging off
+        """
+        if count is None:
+            return self._shadow.send(self.send, f'SENSe{chan}:AVERage:STATe OFF')
+        else:
+            self._shadow.send(self.send, f'SENSe{chan}:AVERage:COUNt {count}')
+            return self._shadow.send(self.send, f'SENSe{chan}:AVERage:STATe ON')
+
+    def set_measurement_rate(self, chan, rate='FAST'):
+        """
+        NORMal (20 readings/s), DOUBle (40 readings/s), FAST (400 readings/s, E-series sensors only)
+        """
+        value = next((value for name, value in MEASUREMENT_RATES.items()
+                      if rate and name.startswith(rate.upper()[:4])), None)
+        if value is None:
+            raise ValueError(f'Unknown measurement rate: {rate}, use one of {", ".join(MEASUREMENT_RATES)}')
+        self._rates[chan] = value
+        return self._shadow.send(self.send, f'SENSe{chan}:MRATe {rate}')
+
+    def set_continuous(self, chan, state):
+        return self._shadow.send(self.send, f'INITiate{chan}:CONTinuous {state}')
+
+    def set_trigger_source(self, chan, source='IMMediate'):
+        """
+        IMMediate | BUS | EXTernal | HOLD | INTernal1 | INTernal2
+        """
+        return self._shadow.send(self.send, f'TRIGger{chan}:SOURce {source}')
+
+    def set_trigger_count(self, chan, count):
+        """
+        Readings taken per INITiate, FETCh? returns all of them as one list.
+        """
+        return self._shadow.send(self.send, f'TRIGger{chan}:COUNt {count}')
+
+    def set_unit(self, chan, unit='DBM'):
+        """
+        DBM | W
+        """
+        return self._shadow.send(self.send, f'UNIT{chan}:POWer {unit}')
+
+    def set_data_format(self, fmt='ASCii'):
+        """
+        ASCii - comma separated values, REAL - 64-bit binary block
+        """
+        self._data_format = 'REAL' if fmt.upper().startswith('REAL') else 'ASCII'
+        return self._shadow.send(self.send, f'FORMat:READings:DATA {fmt}')
+
+    def configure_buffered(self, count, chans=(1,), rate='FAST', source='IMMediate', fmt='REAL'):
+        """
+        Single shot buffered acquisition of count readings per channel, see acquire().
+        """
+        with self.batch():
+            for chan in chans:
+                self.set_continuous(chan, 'OFF')
+                self.set_averaging(chan, None)
+                self.set_measurement_rate(chan, rate)
+                self.set_trigger_source(chan, source)
+                self.set_trigger_count(chan, count)
+            self.set_data_format(fmt)
+
+    def acquire(self, chans=(1,)):
+        """
+        Start the acquisition on the channels, wait for it and fetch the readings, all in one round trip.
+        Timestamps are nominal: the host time of the start plus the reading period of the measurement rate,
+        so the channels must run at the same rate.
+        :return: (timestamps, s; readings array (channels, count)) numpy arrays
+        """
+        rates = {self._rates.get(chan, MEASUREMENT_RATES['NORMAL']) for chan in chans}
+        if len(rates) > 1:
+            raise ValueError(f'Channels {", ".join(map(str, chans))} have different measurement rates, '
+                             f'acquire them one at a time')
+        questions = [f'INITiate{chan}:IMMediate' for chan in chans] + ['*OPC?'] + [f'FETCh{chan}?' for chan in chans]
+        start = time.time()
+        readings = np.vstack(self._query_readings(questions))
+        period = 1 / rates.pop()
+        timestamps = start + period * np.arange(1, readings.shape[1] + 1)
+        return timestamps, readings
+
+    def _query_readings(self, questions):
+        """
+        Send the questions as one program message.
+        :return: list of reading arrays, one per FETCh? query
+        """
+        message = join_commands(questions)
+        if self._data_format == 'REAL':
+            blocks = sum(question.startswith('FETC') for question in questions)
+            return parse_blocks(self.query_block(message, blocks), '>f8')
+        answers = f'{self.query(message)}'.split(';')
+        queries = [question for question in questions if '?' in question]
+        return [np.array(answer.split(','), dtype=float)
+                for question, answer in zip(queries, answers) if question.startswith('FETC')]
+
+    def read_pow(self, chan: int=1) -> float:
+        """
+        First reading of the last acquisition.
+        """
+        return float(self._query_readings([f'FETCh{chan}?'])[0][0])
 
     def set_system_local(self):
         # pass
         self.send(f'system:local')
 
+    @property
+    def shadow(self):
+        return self._shadow
+
     @property
     def name(self):
         return self._name
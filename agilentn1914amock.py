@@ -1,12 +1,37 @@
-class AgilentN1914AMock:
+import random
+import re
 
-    def __init__(self):
-        pass
+from instr.binaryblock import make_block
+from instr.mocktransport import MockTransport
 
-    def write(self, command):
-        return 'success'
 
-    def query(self, question):
-        answer = '-2'
-        return answer
+class AgilentN1914AMock(MockTransport):
 
+    _count = re.compile(r':?TRIG\w*(\d?):COUN\w*\s+(\d+)', re.IGNORECASE)
+    _format = re.compile(r':?FORM\w*(:READ\w*)?:DATA\s+(\w+)', re.IGNORECASE)
+    _fetch = re.compile(r':?FETC\w*(\d?)\?', re.IGNORECASE)
+
+    def __init__(self, **timing):
+        super().__init__(**timing)
+        self._counts = dict()
+        self._real = False
+
+    def handle(self, command):
+        match = self._count.match(command)
+        if match:
+            self._counts[int(match.group(1) or 1)] = int(match.group(2))
+            return None
+        match = self._format.match(command)
+        if match:
+            self._real = match.group(2).upper().startswith('REAL')
+            return None
+        match = self._fetch.match(command)
+        if match:
+            count = self._counts.get(int(match.group(1) or 1), 1)
+            readings = [-2 + random.gauss(0, 0.01) for _ in range(count)]
+            if self._real:
+                return make_block(readings, '>f8', terminator=b'')
+            return ','.join(f'{reading:.4f}' for reading in readings)
+        if '?' in command:
+            return '-2'
+        return None
@@ -1,3 +1,12 @@
+import numpy as np
+
+from instr import sessionpool
+from instr.batching import Batch, max_command_length
+from instr.instrumentation import invalidating_on_error, timed_write, timed_query
+from instr.listsweep import scpi_list
+from instr.shadowcache import ShadowCache
+
+
 class AgilentN5183A:
 
     def __init__(self, address: str, idn: str, inst):
@@ -6,40 +15,94 @@ class AgilentN5183A:
         self._name = idn.split(',')[1].strip()
         self._inst = inst
 
+        self._shadow = ShadowCache()
+
     def __str__(self):
         return f'{self._name}'
 
     def __repr__(self):
         return f'{self.__class__}(idn={self._idn})'
 
+    def _invalidating_on_error(self):
+        return invalidating_on_error(self._shadow.invalidate)
+
     def send(self, command):
-        print(f'{self._name}', self._inst.write(command))
+        self._shadow.observe(command)
+        with self._invalidating_on_error():
+            return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        answer = self._inst.query(question)
-        print(f'{self._name} {answer}')
-        return answer
+        with self._invalidating_on_error():
+            return timed_query(self._name, self._inst, question)
+
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
+
+    def close(self):
+        sessionpool.close(self._inst)
 
     def ping(self):
         print(self.query('*IDN?'))
 
     def set_modulation(self, state):
-        self.send(f':OUTP:MOD:STAT {state}')
+        self._shadow.send(self.send, f':OUTP:MOD:STAT {state}')
 
     def set_freq(self, value, unit):
         # TODO: convert to Hz
-        self.send(f'SOUR:FREQ {str(value)}{unit}')
+        self._shadow.send(self.send, f'SOUR:FREQ {str(value)}{unit}')
 
     def set_pow(self, value, unit):
-        self.send(f'SOUR:POW {str(value)}{unit}')
+        self._shadow.send(self.send, f'SOUR:POW {str(value)}{unit}')
 
     def set_output(self, state):
-        self.send(f'OUTP:STAT {state}')
+        self._shadow.send(self.send, f'OUTP:STAT {state}')
+
+    def list_load(self, freqs, pows, dwell):
+        """
+        Load list sweep points, frequency in Hz, power in dBm, dwell in s.
+        Power and dwell may be scalars to use the same value for every point.
+        """
+        freqs = np.asarray(freqs, dtype=float)
+        pows = np.broadcast_to(np.asarray(pows, dtype=float), freqs.shape)
+        dwell = np.broadcast_to(np.asarray(dwell, dtype=float), freqs.shape)
+        self.send(':SOUR:LIST:TYPE LIST')
+        self.send(f':SOUR:LIST:FREQ {scpi_list(freqs)}')
+        self.send(f':SOUR:LIST:POW {scpi_list(pows)}')
+        self.send(f':SOUR:LIST:DWEL {scpi_list(dwell)}')
+
+    def list_mode(self, state):
+        """
+        ON - frequency and power follow the loaded list
+        OFF - back to CW frequency and fixed power
+        """
+        self.send(f':SOUR:FREQ:MODE {"LIST" if state == "ON" else "CW"}')
+        self.send(f':SOUR:POW:MODE {"LIST" if state == "ON" else "FIX"}')
+
+    def list_trigger_source(self, source='BUS'):
+        """
+        BUS - step to the next point on *TRG
+        IMMediate - step after the dwell time
+        EXTernal - step on rear panel trigger input
+        """
+        self._shadow.send(self.send, f':LIST:TRIG:SOUR {source}')
+
+    def set_trigger_output(self, connector=1, signal='SETTled'):
+        self._shadow.send(self.send, f':ROUT:TRIG{connector}:OUTP {signal}')
+
+    def list_initiate(self):
+        self.send(':INIT')
+
+    def trigger(self):
+        self.send('*TRG')
 
     def set_system_local(self):
         # pass
         self.send(f'system:local')
 
+    @property
+    def shadow(self):
+        return self._shadow
+
     @property
     def name(self):
         return self._name
@@ -1,12 +1,9 @@
-class AgilentN5183AMock:
+from instr.mocktransport import MockTransport
 
-    def __init__(self):
-        pass
 
-    def write(self, command):
-        return 'success'
-
-    def query(self, question):
-        answer = '42'
-        return answer
+class AgilentN5183AMock(MockTransport):
 
+    def handle(self, command):
+        if '?' in command:
+            return '42'
+        return None
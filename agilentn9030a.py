@@ -1,3 +1,13 @@
+import numpy as np
+
+from instr import sessionpool
+from instr.batching import Batch, max_command_length
+from instr.binaryblock import block_dtype, block_header
+from instr.instrumentation import invalidating_on_error, timed_write, timed_query, timed_query_block, timed_query_raw
+from instr.listsweep import scpi_list
+from instr.shadowcache import ShadowCache
+
+
 class AgilentN9030A:
 
     # TODO implement SCPI: set reference level
@@ -8,56 +18,145 @@ class AgilentN9030A:
         self._name = idn.split(',')[1].strip()
         self._inst = inst
 
+        self._shadow = ShadowCache(invalidating=('CONFigure',))
+        self._data_format = 'ASCii'
+        self._byte_order = 'NORMal'
+
     def __str__(self):
         return f'{self._name}'
 
     def __repr__(self):
         return f'{self.__class__}(idn={self._idn})'
 
+    def _invalidating_on_error(self):
+        return invalidating_on_error(self._shadow.invalidate)
+
     def send(self, command):
-        print(f'{self._name}', self._inst.write(command))
+        self._shadow.observe(command)
+        with self._invalidating_on_error():
+            return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        answer = self._inst.query(question)
-        print(f'{self._name} {answer}')
-        return answer
+        with self._invalidating_on_error():
+            return timed_query(self._name, self._inst, question)
+
+    def query_raw(self, question):
+        with self._invalidating_on_error():
+            return timed_query_raw(self._name, self._inst, question)
+
+    def query_block(self, question, blocks=1):
+        with self._invalidating_on_error():
+            return timed_query_block(self._name, self._inst, question, blocks)
+
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
+
+    def close(self):
+        sessionpool.close(self._inst)
 
     def ping(self):
         print(self.query('*IDN?'))
 
     def set_autocalibrate(self, state):
-        self.send(f':CAL:AUTO {state}')
+        return self._shadow.send(self.send, f':CAL:AUTO {state}')
 
     def set_span(self, value, unit):
-        self.send(f':SENS:FREQ:SPAN {value}{unit}')
+        return self._shadow.send(self.send, f':SENS:FREQ:SPAN {value}{unit}')
 
     def set_marker_mode(self, marker: int, mode='POS'):
-        self.send(f':CALC:MARK{marker}:MODE {mode}')
+        return self._shadow.send(self.send, f':CALC:MARK{marker}:MODE {mode}')
 
     def set_pow_attenuation(self, value):
-        self.send(f':POW:ATT {value}')
+        return self._shadow.send(self.send, f':POW:ATT {value}')
 
     def set_measure_center_freq(self, value, unit):
         # TODO hack for E4446A
         com = f':SENSe:FREQuency:RF:CENTer {value}{unit}'
         if self._name == 'E4446A':
             com = f':SENSe:FREQuency:CENTer {value}{unit}'
-        self.send(com)
+        return self._shadow.send(self.send, com)
 
     def set_marker1_x_center(self, value, unit):
-        self.send(f':CALCulate:MARKer1:X:CENTer {value}{unit}')
+        return self._shadow.send(self.send, f':CALCulate:MARKer1:X:CENTer {value}{unit}')
 
     def read_pow(self, marker: int=1) -> float:
         answer = self.query(f':CALCulate:MARKer{marker}:Y?')
         return float(answer)
 
     def remove_marker(self, marker=1):
-        return self.send(f':CALC:MARK{marker}:MODE OFF')
+        return self._shadow.send(self.send, f':CALC:MARK{marker}:MODE OFF')
+
+    def configure_list(self):
+        self.send(':CONF:LIST')
+
+    def list_load(self, freqs, rbw, sweep_time, detector='AVERage'):
+        """
+        Load list sweep points, frequency in Hz, RBW in Hz, sweep time in s.
+        RBW and sweep time may be scalars to use the same value for every point.
+        """
+        freqs = np.asarray(freqs, dtype=float)
+        rbw = np.broadcast_to(np.asarray(rbw, dtype=float), freqs.shape)
+        sweep_time = np.broadcast_to(np.asarray(sweep_time, dtype=float), freqs.shape)
+        self.send(f':LIST:FREQ {scpi_list(freqs)}')
+        self.send(f':LIST:BAND:RES {scpi_list(rbw)}')
+        self.send(f':LIST:SWE:TIME {scpi_list(sweep_time)}')
+        self.send(f':LIST:DET {",".join([detector] * len(freqs))}')
+
+    def list_trigger_source(self, source='EXTernal1'):
+        return self._shadow.send(self.send, f':LIST:TRIG:SOUR {source}')
+
+    def list_initiate(self):
+        self.send(':INIT:LIST')
+
+    def fetch_list(self):
+        """
+        Power of every list point, dBm.
+        Blocks until the list is done, VISA timeout must cover the whole list.
+        :return: numpy.ndarray
+        """
+        return np.array(self.query(':FETC:LIST?').split(','), dtype=float)
+
+    def trace_format(self, fmt='REAL,32', order='SWAPped'):
+        """
+        ASCii - comma separated values
+        REAL,32 / REAL,64 - IEEE binary block, order NORMal (big endian) or SWAPped (little endian)
+        """
+        block_dtype(fmt, order)
+        self._data_format = fmt
+        self._byte_order = order
+        with self.batch():
+            self._shadow.send(self.send, f':FORMat:TRACe:DATA {fmt}')
+            self._shadow.send(self.send, f':FORMat:BORDer {order}')
+
+    def fetch_trace(self, trace=1, initiate=True):
+        """
+        Trace and its frequency axis in one round trip: the sweep is started and waited for if initiate,
+        start and stop frequencies are asked for in the same message as TRACe:DATA?.
+        :return: (frequencies, Hz; levels, dBm) numpy arrays
+        """
+        questions = [':INITiate:IMMediate', '*WAI'] if initiate else list()
+        questions += [':SENSe:FREQuency:STARt?', ':SENSe:FREQuency:STOP?', f':TRACe:DATA? TRACE{trace}']
+        message = ';'.join(questions)
+
+        dtype = block_dtype(self._data_format, self._byte_order)
+        if dtype is None:
+            start, stop, data = f'{self.query(message)}'.split(';', 2)
+            levels = np.array(data.replace(';', ',').strip(', \n').split(','), dtype=float)
+        else:
+            answer = self.query_block(message)
+            payload, length = block_header(answer)
+            start, stop = answer[:payload].split(b';')[:2]
+            levels = np.frombuffer(answer, dtype=dtype, count=length // dtype.itemsize, offset=payload)
+        return np.linspace(float(start), float(stop), len(levels)), levels.astype(float)
 
     def set_system_local(self):
         # pass
         self.send(f'system:local')
 
+    @property
+    def shadow(self):
+        return self._shadow
+
     @property
     def name(self):
         return self._name
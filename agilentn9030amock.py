@@ -1,12 +1,87 @@
-class AgilentN9030AMock:
+import re
 
-    def __init__(self):
-        pass
+import numpy as np
 
-    def write(self, command):
-        return 'success'
+from instr.binaryblock import block_dtype, make_block
+from instr.mocktransport import MockTransport
 
-    def query(self, question):
-        answer = '-2'
-        return answer
+_units = {'HZ': 1.0, 'KHZ': 1e3, 'MHZ': 1e6, 'GHZ': 1e9}
 
+
+class AgilentN9030AMock(MockTransport):
+    """
+    Sweeps show a carrier with harmonics and a couple of spurs over the noise floor,
+    signals are (frequency, Hz; level, dBm) pairs.
+    """
+    _frequency = re.compile(r':?SENS\w*:FREQ\w*:(?:RF:)?(STAR\w*|STOP|CENT\w*|SPAN)\s+([-+.\dEe]+)\s*(\w*)',
+                            re.IGNORECASE)
+    _points = re.compile(r':?(?:SENS\w*:)?SWE\w*:POIN\w*\s+(\d+)', re.IGNORECASE)
+    _format = re.compile(r':?FORM\w*:TRAC\w*:DATA\s+(\S+)', re.IGNORECASE)
+    _border = re.compile(r':?FORM\w*:BORD\w*\s+(\w+)', re.IGNORECASE)
+
+    def __init__(self, signals=None, floor=-90.0, seed=None, **timing):
+        super().__init__(**timing)
+        self._list_points = 0
+        self.signals = signals or [(1e9, -10.0), (2e9, -42.0), (3e9, -55.0), (1.35e9, -68.0), (2.4e9, -72.0)]
+        self.floor = floor
+        self._random = np.random.default_rng(seed)
+        self._start, self._stop = 10e6, 3.6e9
+        self._points_count = 1001
+        self._data_format, self._byte_order = 'ASCii', 'NORMal'
+
+    def trace(self):
+        freqs = np.linspace(self._start, self._stop, self._points_count)
+        # gaussian RBW shape three bins wide
+        width = 3 * (self._stop - self._start) / max(self._points_count - 1, 1)
+        power = 10 ** ((self.floor + self._random.normal(0, 1.5, len(freqs))) / 10)
+        for freq, level in self.signals:
+            power += 10 ** (level / 10) * np.exp(-0.5 * ((freqs - freq) / (width / 2.355)) ** 2)
+        return 10 * np.log10(power)
+
+    def _trace_answer(self):
+        dtype = block_dtype(self._data_format, self._byte_order)
+        if dtype is None:
+            return ','.join(f'{level:.3f}' for level in self.trace())
+        return make_block(self.trace(), dtype, terminator=b'')
+
+    def handle(self, command):
+        match = self._frequency.match(command)
+        if match:
+            kind, value = match.group(1).upper()[:4], float(match.group(2)) * _units.get(match.group(3).upper(), 1.0)
+            center, span = (self._start + self._stop) / 2, self._stop - self._start
+            if kind == 'STAR':
+                self._start = value
+            elif kind == 'STOP':
+                self._stop = value
+            elif kind == 'CENT':
+                self._start, self._stop = value - span / 2, value + span / 2
+            else:
+                self._start, self._stop = center - value / 2, center + value / 2
+            return None
+        match = self._points.match(command)
+        if match:
+            self._points_count = int(match.group(1))
+            return None
+        match = self._format.match(command)
+        if match:
+            self._data_format = match.group(1)
+            return None
+        match = self._border.match(command)
+        if match:
+            self._byte_order = match.group(1)
+            return None
+
+        header = command.upper()
+        if command.startswith(':LIST:FREQ '):
+            self._list_points = command.count(',') + 1
+        elif command == ':FETC:LIST?':
+            return ','.join(['-2'] * self._list_points)
+        elif header.startswith(':SENSE:FREQUENCY:START?'):
+            return f'{self._start:.11E}'
+        elif header.startswith(':SENSE:FREQUENCY:STOP?'):
+            return f'{self._stop:.11E}'
+        elif header.startswith(':TRACE:DATA?'):
+            return self._trace_answer()
+        elif '?' in command:
+            return '-2'
+        return None
@@ -0,0 +1,109 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncInstrument:
+    """
+    Asyncio front end for any instrument driver (or mock driven driver).
+
+    Each instrument owns one worker thread, so commands to the same instrument keep their order,
+    while several instruments are configured and read at the same time from one event loop:
+
+        gen = AsyncInstrument(GeneratorFactory(addr).find())
+        sa = AsyncInstrument(AnalyzerFactory(addr).find())
+        await asyncio.gather(gen.set_freq(1, 'GHz'), sa.set_measure_center_freq(1, 'GHz'))
+        pow = await sa.read_pow(1)
+
+    Driver methods become coroutines, plain properties are returned as is.
+    Properties the driver lists in io_properties are awaited, property setters via set().
+    batch() is an async context manager, the batch is entered and flushed on the worker thread:
+
+        async with sa.batch():
+            await sa.set_span(10, 'MHz')
+            await sa.set_pow_attenuation(10)
+    """
+    def __init__(self, instrument):
+        self._instrument = instrument
+        self._io_properties = frozenset(getattr(instrument, 'io_properties', ()))
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'{instrument}')
+
+    def __str__(self):
+        return f'{self._instrument}'
+
+    def __repr__(self):
+        return f'{self.__class__}(instrument={self._instrument!r})'
+
+    def __getattr__(self, item):
+        if item in self._io_properties:
+            return self.get(item)
+
+        attr = getattr(self._instrument, item)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        return call
+
+    def __setattr__(self, key, value):
+        if not key.startswith('_'):
+            raise AttributeError(f'Set driver properties with: await {self.__class__.__name__}.set({key!r}, value)')
+        super().__setattr__(key, value)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.run_close()
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def send(self, command):
+        return await self.run(self._instrument.send, command)
+
+    async def query(self, question):
+        return await self.run(self._instrument.query, question)
+
+    async def get(self, prop: str):
+        return await self.run(getattr, self._instrument, prop)
+
+    async def set(self, prop: str, value):
+        return await self.run(setattr, self._instrument, prop, value)
+
+    def batch(self, *args, **kwargs):
+        return AsyncContext(self, self._instrument.batch(*args, **kwargs))
+
+    def close(self):
+        """
+        Wait for the queued calls, then close the driver and its session.
+        """
+        self._executor.shutdown(wait=True)
+        self._instrument.close()
+
+    async def run_close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.close)
+
+    @property
+    def instrument(self):
+        return self._instrument
+
+
+class AsyncContext:
+    """
+    Driver context manager (Batch) entered and exited on the instrument's worker thread.
+    """
+    def __init__(self, instrument: AsyncInstrument, context):
+        self._instrument = instrument
+        self._context = context
+
+    async def __aenter__(self):
+        entered = await self._instrument.run(self._context.__enter__)
+        return self._instrument if entered is self._instrument.instrument else entered
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return await self._instrument.run(self._context.__exit__, exc_type, exc_val, exc_tb)
@@ -0,0 +1,127 @@
+max_command_length = 1024
+
+
+def join_commands(commands):
+    """
+    Join SCPI commands into one program message.
+    Commands after the first are made absolute with a leading ':' so that the
+    header path of the previous command doesn't apply to them.
+    """
+    parts = list()
+    for command in commands:
+        if parts and not command.startswith((':', '*')):
+            command = ':' + command
+        parts.append(command)
+    return ';'.join(parts)
+
+
+class CoalescingSession:
+    """
+    Session wrapper queuing writes and sending them as one ';'-joined message.
+    Queue is flushed when the next command would exceed max_length, before any read or query,
+    and when the batch is closed.
+    :param join: makes the message of the queued commands
+    """
+    def __init__(self, inst, max_length=max_command_length, join=join_commands):
+        self._inst = inst
+        self._max_length = max_length
+        self._join = join
+        self._queue = list()
+        self._length = 0
+
+    def __getattr__(self, item):
+        self.flush()
+        return getattr(self._inst, item)
+
+    def write(self, command):
+        command = command.strip()
+        if self._queue and self._length + len(command) + 2 > self._max_length:
+            self.flush()
+        self._queue.append(command)
+        self._length += len(command) + 2
+
+    def flush(self):
+        if not self._queue:
+            return None
+        message = self._join(self._queue)
+        self._queue.clear()
+        self._length = 0
+        return self._inst.write(message)
+
+    def read(self):
+        self.flush()
+        return self._inst.read()
+
+    def read_raw(self, *args, **kwargs):
+        self.flush()
+        return self._inst.read_raw(*args, **kwargs)
+
+    def read_bytes(self, *args, **kwargs):
+        self.flush()
+        return self._inst.read_bytes(*args, **kwargs)
+
+    def query(self, question):
+        self.flush()
+        return self._inst.query(question)
+
+    def query_binary_values(self, question, **kwargs):
+        self.flush()
+        return self._inst.query_binary_values(question, **kwargs)
+
+    @property
+    def pending(self):
+        return list(self._queue)
+
+
+class Batch:
+    """
+    Context manager coalescing driver writes:
+
+        with src.batch():
+            src.set_voltage_limit(2, 5, 'V')
+            src.set_voltage(2, 3.3, 'V')
+            src.set_output(2, 'ON')
+
+    sends 'INST:SEL OUTP2;:VOLT:PROT 5V;:VOLT:PROT:STAT ON;:VOLT 3.3V;:OUTP ON' in one transfer.
+    Nested batches join the outer one, drivers without a session (driver level mocks) send as usual.
+    """
+    def __init__(self, instrument, max_length=max_command_length, join=join_commands):
+        self._instrument = instrument
+        self._max_length = max_length
+        self._join = join
+        self._inst = None
+        self._session = None
+
+    def __enter__(self):
+        inst = getattr(self._instrument, '_inst', None)
+        if inst is not None and not isinstance(inst, CoalescingSession):
+            self._inst = self._instrument._inst
+            self._session = CoalescingSession(self._inst, self._max_length, self._join)
+            self._instrument._inst = self._session
+        return self._instrument
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._session is None:
+            return
+        try:
+            self._flush()
+        finally:
+            self._instrument._inst = self._inst
+            self._session = None
+
+    def _flush(self):
+        try:
+            return self._session.flush()
+        except Exception:
+            # queued settings were recorded by the caches when queued, the instrument may not have them
+            shadow = getattr(self._instrument, '_shadow', None)
+            if shadow is not None:
+                shadow.invalidate()
+            invalidate_freq_axis = getattr(self._instrument, 'invalidate_freq_axis', None)
+            if invalidate_freq_axis is not None:
+                invalidate_freq_axis()
+            raise
+
+    def flush(self):
+        if self._session is not None:
+            return self._flush()
@@ -0,0 +1,282 @@
+"""
+Round trips, bytes, host side time and wall time of high level driver operations, run against the mocks
+with simulated transport latency.
+
+    python -m instr.benchmark --latency 0.001 --repeat 20 --json bench.json
+    python -m instr.benchmark --baseline bench.json
+
+With --baseline the run fails (exit code 1) when an operation needs more messages or round trips than the
+baseline, or its transferred bytes grow by more than --tolerance. Host side time is only gated with
+--host-time, and then differences under --host-floor are ignored as scheduling noise.
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+import numpy as np
+
+from instr.agilente3644a import AgilentE3644A
+from instr.agilente3644amock import AgilentE3644AMock
+from instr.agilente8362b import AgilentE8362B, CalbrationSet, Measurement, Window
+from instr.agilente8362bmock import AgilentE8362BMock
+from instr.agilentn9030a import AgilentN9030A
+from instr.agilentn9030amock import AgilentN9030AMock
+from instr.ivsweep import IVSweep
+from instr.obzor304 import Obzor304
+from instr.mocktransport import FixedLatency, SweepTime
+from instr.obzor304mock import Obzor304Session
+
+
+class CountingSession:
+    """
+    Session wrapper counting messages, round trips, bytes and time spent in the transport.
+    """
+    def __init__(self, inst):
+        self._inst = inst
+        self.reset()
+
+    def __getattr__(self, item):
+        return getattr(self._inst, item)
+
+    def reset(self):
+        self.messages = 0
+        self.round_trips = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.io_time = 0.0
+        self._answered = False
+
+    def _sent(self, command):
+        self.messages += 1
+        self.bytes_out += len(command)
+        self._answered = False
+
+    def _received(self, answer):
+        # a response read in pieces with read_bytes() is one round trip
+        if not self._answered:
+            self.round_trips += 1
+            self._answered = True
+        self.bytes_in += len(answer) if isinstance(answer, (bytes, str)) else len(f'{answer}')
+
+    def write(self, command):
+        start = time.perf_counter()
+        ret = self._inst.write(command)
+        self.io_time += time.perf_counter() - start
+        self._sent(command)
+        return ret
+
+    def read(self):
+        start = time.perf_counter()
+        answer = self._inst.read()
+        self.io_time += time.perf_counter() - start
+        self._received(answer)
+        return answer
+
+    def read_raw(self, *args, **kwargs):
+        start = time.perf_counter()
+        answer = self._inst.read_raw(*args, **kwargs)
+        self.io_time += time.perf_counter() - start
+        self._received(answer)
+        return answer
+
+    def read_bytes(self, *args, **kwargs):
+        start = time.perf_counter()
+        answer = self._inst.read_bytes(*args, **kwargs)
+        self.io_time += time.perf_counter() - start
+        self._received(answer)
+        return answer
+
+    def query(self, question):
+        start = time.perf_counter()
+        answer = self._inst.query(question)
+        self.io_time += time.perf_counter() - start
+        self._sent(question)
+        self._received(answer)
+        return answer
+
+    @property
+    def stats(self):
+        return {
+            'messages': self.messages,
+            'round_trips': self.round_trips,
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+            'io_time': self.io_time,
+        }
+
+
+def _obzor304(session):
+    return Obzor304('TCPIP::127.0.0.1::5025::INSTR', session(Obzor304Session), poll=0)
+
+
+def _e8362b(session):
+    return AgilentE8362B('GPIB0::16::INSTR', '1,E8362B mock,1', session(AgilentE8362BMock))
+
+
+def _e8362b_measurements(session, data_format='ASCII'):
+    na = _e8362b(session)
+    for name, param in [('CH1_S11', 'S11'), ('CH1_S21', 'S21'), ('CH1_S22', 'S22')]:
+        na.ref_create_meas(Measurement(1, name, param))
+    na.format(data_format)
+    na.sense_freq_axis(1)
+    return na
+
+
+def _e8362b_setup(na):
+    na.reset()
+    na.ref_create_window(Window(1))
+    params = [('CH1_S11', 'S11'), ('CH1_S21', 'S21'), ('CH1_S12', 'S12'), ('CH1_S22', 'S22')]
+    for trace, (name, param) in enumerate(params, start=1):
+        na.ref_create_meas(Measurement(1, name, param))
+        na.display_create_trace(1, trace, name)
+    na.ref_load_cal_set(CalbrationSet(1, 'CalSet_1'))
+    na.sense_freq_start(1, 1.1, 'GHz')
+    na.sense_freq_stop(1, 1.5, 'GHz')
+    na.sense_sweep_points(1, 201)
+    na.source_power(1, 1, -10)
+    na.trigger_source('MANual')
+
+
+def _e3644a_voltage_step(src):
+    src.set_voltage_limit(1, 5, 'V')
+    src.set_voltage(1, 3.3, 'V')
+    src.set_output(1, 'ON')
+    return src.read_current(1)
+
+
+def _e3644a_iv_sweep(session):
+    sweep = IVSweep(AgilentE3644A('GPIB0::5::INSTR', '1,E3648A mock,1', session(AgilentE3644AMock)),
+                    chans=(1, 2), trigger='BUS')
+    sweep.load(np.linspace(0, 5, 21))
+    return sweep
+
+
+def _n9030a(session):
+    sa = AgilentN9030A('GPIB0::18::INSTR', '1,N9030A mock,1', session(AgilentN9030AMock))
+    sa.trace_format('REAL,32')
+    return sa
+
+
+# name: (setup(session) -> driver, operation(driver)), session(mock class) makes a counted mock session
+cases = {
+    'obzor304.measure': (_obzor304, lambda obzor: obzor.measure(0)),
+    'e8362b.setup': (_e8362b, _e8362b_setup),
+    'e8362b.calc_all_data.ascii': (_e8362b_measurements, lambda na: na.calc_all_data(1)),
+    'e8362b.calc_all_data.real64': (lambda session: _e8362b_measurements(session, 'REAL,64'),
+                                    lambda na: na.calc_all_data(1)),
+    'e3644a.voltage_step': (lambda session: AgilentE3644A('GPIB0::5::INSTR', '1,E3648A mock,1',
+                                                          session(AgilentE3644AMock)),
+                            _e3644a_voltage_step),
+    'e3644a.iv_sweep': (_e3644a_iv_sweep, lambda sweep: sweep.run()),
+    'n9030a.fetch_trace': (_n9030a, lambda sa: sa.fetch_trace(1)),
+}
+
+
+def run_case(name, latency=0.0, per_byte=0.0, repeat=10, sweep=None):
+    """
+    Run the operation repeat times, each on a fresh driver and mock, only the operation is measured.
+    Mocks get FixedLatency(latency, per_byte) and the sweep timing model, see mocktransport.
+    :return: per run means: messages, round trips, bytes, io time, host time (parsing and formatting) and wall time, s
+    """
+    setup, operation = cases[name]
+    totals = dict()
+    for _ in range(repeat):
+        sessions = list()
+
+        def session(mock_class):
+            counted = CountingSession(mock_class(latency=FixedLatency(latency, per_byte), sweep=sweep))
+            sessions.append(counted)
+            return counted
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            driver = setup(session)
+            for counted in sessions:
+                counted.reset()
+            start = time.perf_counter()
+            operation(driver)
+            wall = time.perf_counter() - start
+
+        run = {key: sum(counted.stats[key] for counted in sessions) for key in sessions[0].stats}
+        run['wall_time'] = wall
+        run['host_time'] = wall - run['io_time']
+        for key, value in run.items():
+            totals[key] = totals.get(key, 0) + value
+
+    result = {key: value / repeat for key, value in totals.items()}
+    result.update({'repeat': repeat, 'latency': latency, 'per_byte': per_byte})
+    return result
+
+
+def run(names=None, latency=0.0, per_byte=0.0, repeat=10, sweep=None):
+    return {name: run_case(name, latency, per_byte, repeat, sweep) for name in (names or cases)}
+
+
+def compare(results, baseline, tolerance=0.25, host_time=False, host_floor=1e-3):
+    """
+    :param host_time: also gate on host side time, it varies between runs with the machine load
+    :param host_floor: host time growth below this is not a regression, s
+    :return: list of regression descriptions, empty if none
+    """
+    regressions = list()
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key in ('messages', 'round_trips'):
+            if result[key] > base[key]:
+                regressions.append(f'{name}: {key} {base[key]:g} -> {result[key]:g}')
+        # some mocks answer random data of varying length
+        for key in ('bytes_out', 'bytes_in'):
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append(f'{name}: {key} {base[key]:g} -> {result[key]:g}')
+        if host_time and result['host_time'] > max(base['host_time'] * (1 + tolerance),
+                                                   base['host_time'] + host_floor):
+            regressions.append(f'{name}: host_time {base["host_time"] * 1000:.3f} ms -> '
+                               f'{result["host_time"] * 1000:.3f} ms')
+    return regressions
+
+
+def summary(results):
+    lines = [f'{"operation":<28} {"msgs":>6} {"trips":>6} {"out, B":>9} {"in, B":>9} '
+             f'{"host, ms":>9} {"wall, ms":>9}']
+    for name, result in results.items():
+        lines.append(f'{name:<28} {result["messages"]:>6g} {result["round_trips"]:>6g} {result["bytes_out"]:>9g} '
+                     f'{result["bytes_in"]:>9g} {result["host_time"] * 1000:>9.3f} {result["wall_time"] * 1000:>9.3f}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark driver operations against the mocks.')
+    parser.add_argument('cases', nargs='*', help=f'operations to run, all by default: {", ".join(cases)}')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated per message latency, s')
+    parser.add_argument('--per-byte', type=float, default=0.0, help='simulated per byte transfer time, s')
+    parser.add_argument('--if-bandwidth', type=float, help='simulate sweep time of 201 points at the IF bandwidth, Hz')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', help='write results to the file')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative bytes and host time growth')
+    parser.add_argument('--host-time', action='store_true', help='fail on host side time growth too')
+    parser.add_argument('--host-floor', type=float, default=1e-3, help='ignored host time growth, s')
+    args = parser.parse_args(argv)
+
+    sweep = SweepTime(if_bandwidth=args.if_bandwidth) if args.if_bandwidth else None
+    results = run(args.cases, args.latency, args.per_byte, args.repeat, sweep)
+    print(summary(results))
+    if args.json:
+        with open(args.json, mode='wt', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, mode='rt', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.host_time, args.host_floor)
+        for regression in regressions:
+            print(f'regression: {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
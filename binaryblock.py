@@ -0,0 +1,117 @@
+import numpy as np
+
+
+def block_dtype(data_format: str, byte_order: str = 'NORMal'):
+    """
+    Map an instrument FORMat / FORMat:BORDer pair to a NumPy dtype.
+
+    :param data_format: 'ASCii', 'REAL,32' or 'REAL,64'
+    :param byte_order: 'NORMal' (big endian) or 'SWAPped' (little endian)
+    :return: numpy dtype or None for ASCII transfers
+    """
+    fmt = data_format.upper().replace(' ', '')
+    if fmt.startswith('ASC'):
+        return None
+    if not fmt.startswith('REAL'):
+        raise ValueError(f'Unsupported data format: {data_format}')
+
+    _, _, bits = fmt.partition(',')
+    size = {'': 8, '32': 4, '64': 8}.get(bits)
+    if size is None:
+        raise ValueError(f'Unsupported data format: {data_format}')
+
+    endian = '<' if byte_order.upper().startswith('SWAP') else '>'
+    return np.dtype(f'{endian}f{size}')
+
+
+def block_header(data: bytes, offset: int = 0):
+    """
+    Parse IEEE-488.2 definite length block header '#<n><length>'.
+
+    :return: (payload start index, payload length in bytes)
+    """
+    start = data.index(b'#', offset)
+    try:
+        digits = int(data[start + 1:start + 2])
+    except ValueError:
+        raise ValueError(f'Malformed block header: {data[start:start + 12]!r}')
+    if digits == 0:
+        raise ValueError('Indefinite length blocks are not supported')
+
+    payload = start + 2 + digits
+    length = int(data[start + 2:payload])
+    return payload, length
+
+
+def parse_block(data: bytes, dtype, offset: int = 0):
+    """
+    Decode a definite length block into a NumPy array without copying the payload.
+
+    :return: (array, index of the first byte after the block)
+    """
+    dtype = np.dtype(dtype)
+    payload, length = block_header(data, offset)
+    if payload + length > len(data):
+        raise ValueError(f'Truncated block: expected {length} bytes, got {len(data) - payload}')
+    values = np.frombuffer(data, dtype=dtype, count=length // dtype.itemsize, offset=payload)
+    return values, payload + length
+
+
+def parse_blocks(data: bytes, dtype):
+    """
+    Decode a response holding several ';'-separated definite length blocks.
+    """
+    blocks = list()
+    end = 0
+    while data.find(b'#', end) != -1:
+        values, end = parse_block(data, dtype, end)
+        blocks.append(values)
+    return blocks
+
+
+def read_blocks(inst, count=1):
+    """
+    Read a response of count definite length blocks, optionally preceded by ';'-separated ASCII fields,
+    by the block headers: every payload is read with read_bytes() as exactly the announced number of bytes,
+    so a termination character inside the binary data doesn't cut the response short.
+    The terminator after the last block is consumed.
+
+    :return: whole response, for parse_block() / parse_blocks()
+    """
+    data = bytearray()
+    for _ in range(count):
+        byte = b''
+        while byte != b'#':
+            byte = inst.read_bytes(1)
+            if not byte:
+                raise ValueError(f'Response ended before the block header: {bytes(data)!r}')
+            data += byte
+        digits = inst.read_bytes(1)
+        if not digits.isdigit() or digits == b'0':
+            raise ValueError(f'Malformed block header: {b"#" + digits!r}')
+        length = inst.read_bytes(int(digits))
+        data += digits + length + read_exact(inst, int(length))
+    data += inst.read_bytes(1)
+    return bytes(data)
+
+
+def read_exact(inst, count):
+    """
+    Read exactly count bytes with read_bytes(), whatever they hold.
+    """
+    data = bytearray()
+    while len(data) < count:
+        chunk = inst.read_bytes(count - len(data))
+        if not chunk:
+            raise ValueError(f'Response ended {count - len(data)} bytes short')
+        data += chunk
+    return bytes(data)
+
+
+def make_block(values, dtype, terminator=b'\n'):
+    """
+    Encode values as a definite length block, terminated by a newline as the instruments do.
+    """
+    payload = np.asarray(values, dtype=dtype).tobytes()
+    length = str(len(payload))
+    return b'#' + str(len(length)).encode() + length.encode() + payload + terminator
@@ -0,0 +1,96 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instr import sessionpool
+
+_lock = threading.Lock()
+_found = dict()
+
+
+def probe(address: str, timeout=500):
+    """
+    Identify a single resource with a short VISA timeout, ms.
+    :return: idn string
+    """
+    inst = sessionpool.open_resource(address, open_timeout=timeout)
+    prev_timeout = inst.timeout
+    inst.timeout = timeout
+    try:
+        _, idn = sessionpool.identify(address)
+    finally:
+        inst.timeout = prev_timeout
+    return idn
+
+
+def discover(timeout=500, workers=32, resources=None, refresh=False):
+    """
+    Probe all VISA resources concurrently, dead addresses cost one timeout in parallel.
+    Result is kept and shared by all try_find() calls until refresh is requested.
+
+    :param timeout: per probe timeout, ms
+    :param workers: max number of concurrent probes
+    :param resources: addresses to probe, ResourceManager.list_resources() if not given
+    :param refresh: discard previously found instruments and probe again
+    :return: {model: (address, idn)}
+    """
+    with _lock:
+        if _found and not refresh:
+            return dict(_found)
+
+    if resources is None:
+        resources = sessionpool.resource_manager().list_resources()
+    if not resources:
+        return dict()
+
+    found = dict()
+    with ThreadPoolExecutor(max_workers=min(workers, len(resources))) as executor:
+        probes = {res: executor.submit(probe, res, timeout) for res in resources}
+        for res, future in probes.items():
+            try:
+                idn = future.result()
+            except Exception as ex:
+                sessionpool.release(res)
+                print(f'{res} probe error: {ex}')
+                continue
+            try:
+                model = idn.split(',')[1].strip()
+            except IndexError:
+                print(f'{res} unknown idn: {idn}')
+                continue
+            found.setdefault(model, (res, idn))
+
+    with _lock:
+        _found.clear()
+        _found.update(found)
+    return found
+
+
+def find_model(models, **kwargs):
+    """
+    Look up the first discovered instrument matching one of the models.
+    Models are matched against the IDN model field, then as a substring of the whole IDN.
+
+    :param models: model name or list of model names
+    :return: (address, idn) or None
+    """
+    if isinstance(models, str):
+        models = [models]
+    found = discover(**kwargs)
+    for model in models:
+        if model in found:
+            return found[model]
+    for model in models:
+        for address, idn in found.values():
+            if model in idn:
+                return address, idn
+    return None
+
+
+def forget(address: str):
+    """
+    Drop an address from the discovery result, e.g. after the instrument was disconnected.
+    """
+    with _lock:
+        for model, (res, _) in list(_found.items()):
+            if res == address:
+                del _found[model]
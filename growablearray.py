@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class GrowableArray:
+    """
+    Contiguous typed buffer growing with amortized doubling, replaces list.append of boxed floats.
+    Views returned by .view are zero-copy and stay valid until the next append reallocates.
+    """
+    __slots__ = ('_data', '_size')
+
+    def __init__(self, dtype=np.float64, capacity=1024):
+        self._data = np.empty(max(capacity, 1), dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, size):
+        if size <= len(self._data):
+            return
+        # shrink() of an empty array leaves no capacity to double
+        capacity = max(len(self._data), 1)
+        while capacity < size:
+            capacity *= 2
+        data = np.empty(capacity, dtype=self._data.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, value):
+        self._reserve(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        values = np.asarray(values)
+        end = self._size + values.size
+        self._reserve(end)
+        self._data[self._size:end] = values.ravel()
+        self._size = end
+
+    def clear(self):
+        self._size = 0
+
+    def shrink(self):
+        """
+        Release unused capacity.
+        """
+        self._data = self._data[:self._size].copy()
+
+    @property
+    def view(self):
+        return self._data[:self._size]
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from instr import sessionpool
+
+logger = logging.getLogger(__name__)
+
+# used only when the factories are told to, see instrumentfactory.use_idn_cache; set_path() moves it
+cache_path = os.path.join(os.path.expanduser('~'), '.instr', 'idn_cache.json')
+
+_lock = threading.Lock()
+_entries = None
+
+
+def _load():
+    global _entries
+    if _entries is None:
+        try:
+            with open(cache_path, mode='rt', encoding='utf-8') as f:
+                _entries = json.load(f)
+        except (OSError, ValueError):
+            _entries = dict()
+    return _entries
+
+
+def _save():
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, mode='wt', encoding='utf-8') as f:
+        json.dump(_entries, f, indent=2)
+    os.replace(tmp_path, cache_path)
+
+
+def set_path(path: str):
+    """
+    Keep the cache in another file, entries are read from it on next use.
+    """
+    global cache_path, _entries
+    with _lock:
+        cache_path = path
+        _entries = None
+
+
+def lookup(address: str):
+    """
+    :return: {'idn': str, 'model': str, 'last_seen': float} or None
+    """
+    with _lock:
+        entry = _load().get(address)
+        return dict(entry) if entry else None
+
+
+def store(address: str, idn: str):
+    model = idn.split(',')[1].strip()
+    with _lock:
+        _load()[address] = {'idn': idn.strip(), 'model': model, 'last_seen': time.time()}
+        _save()
+
+
+def touch(address: str):
+    with _lock:
+        entry = _load().get(address)
+        if entry is not None:
+            entry['last_seen'] = time.time()
+            _save()
+
+
+def invalidate(address: str):
+    with _lock:
+        if _load().pop(address, None) is not None:
+            _save()
+
+
+def clear():
+    with _lock:
+        _load().clear()
+        _save()
+
+
+class LazySession:
+    """
+    Session stand-in for an instrument known from the cache.
+
+    Nothing is sent at construction. On first real use the session is taken from the pool and the
+    instrument is identified before any command goes out, so a different instrument found at the cached
+    address after a wiring change is refused instead of being driven, and its entry is dropped.
+    If the address doesn't answer, the cache entry is invalidated and the address is probed once more
+    on a fresh session.
+    Failed calls are not retried, a command may have partly run.
+    """
+    def __init__(self, address: str, model: str):
+        self._address = address
+        self._model = model
+        self._inst = None
+
+    def __repr__(self):
+        return f'{self.__class__}(address={self._address}, model={self._model})'
+
+    def __getattr__(self, item):
+        return getattr(self._session(), item)
+
+    def _session(self):
+        if self._inst is None:
+            self._inst = self._verify()
+        return self._inst
+
+    def _verify(self):
+        try:
+            inst, idn = sessionpool.identify(self._address)
+        except Exception as ex:
+            logger.warning('%s cached %s does not answer: %s, probing again', self._address, self._model, ex)
+            invalidate(self._address)
+            sessionpool.release(self._address)
+            inst, idn = sessionpool.identify(self._address)
+
+        model = idn.split(',')[1].strip()
+        if model != self._model:
+            # the next start identifies the address afresh
+            invalidate(self._address)
+            raise RuntimeError(f'{self._address}: expected {self._model}, found {model}')
+        store(self._address, idn)
+        return inst
+
+    def _call(self, method, *args, **kwargs):
+        return getattr(self._session(), method)(*args, **kwargs)
+
+    def write(self, command):
+        return self._call('write', command)
+
+    def read(self):
+        return self._call('read')
+
+    def read_raw(self, *args, **kwargs):
+        return self._call('read_raw', *args, **kwargs)
+
+    def read_bytes(self, *args, **kwargs):
+        return self._call('read_bytes', *args, **kwargs)
+
+    def query(self, question):
+        return self._call('query', question)
+
+    def query_binary_values(self, question, **kwargs):
+        return self._call('query_binary_values', question, **kwargs)
+
+    def close(self):
+        if self._inst is not None:
+            sessionpool.release(self._address)
+            self._inst = None
@@ -0,0 +1,264 @@
+import atexit
+import bisect
+import contextlib
+import json
+import threading
+import time
+from collections import defaultdict
+
+from instr.binaryblock import read_blocks, read_exact
+
+_hook = None
+
+
+def set_hook(hook):
+    """
+    Install a process wide instrumentation hook, None disables instrumentation.
+    Hook must implement record(instrument, command, elapsed, bytes_out, bytes_in).
+    :return: previously installed hook
+    """
+    global _hook
+    prev, _hook = _hook, hook
+    return prev
+
+
+def get_hook():
+    return _hook
+
+
+def enable_metrics(dump_at_exit=False):
+    metrics = CommandMetrics()
+    set_hook(metrics)
+    if dump_at_exit:
+        atexit.register(lambda: print(metrics.summary()))
+    return metrics
+
+
+def header(command: str):
+    """
+    SCPI header without parameters: 'SOUR:FREQ 1GHz' -> 'SOUR:FREQ'
+    Program messages of several commands are keyed by the first one: 'INST:SEL OUTP1;:VOLT 1V' -> 'INST:SEL;...'
+    """
+    first, sep, _ = command.strip().partition(';')
+    return first.split(' ', 1)[0] + (';...' if sep else '')
+
+
+def timed_write(name, inst, command):
+    hook = _hook
+    if hook is None:
+        return inst.write(command)
+
+    start = time.perf_counter()
+    ret = inst.write(command)
+    hook.record(name, command, time.perf_counter() - start, len(command), 0)
+    return ret
+
+
+def timed_query(name, inst, question):
+    hook = _hook
+    if hook is None:
+        return inst.query(question)
+
+    start = time.perf_counter()
+    answer = inst.query(question)
+    hook.record(name, question, time.perf_counter() - start, len(question), _size(answer))
+    return answer
+
+
+def timed_query_raw(name, inst, question):
+    hook = _hook
+    if hook is None:
+        inst.write(question)
+        return inst.read_raw()
+
+    start = time.perf_counter()
+    inst.write(question)
+    answer = inst.read_raw()
+    hook.record(name, question, time.perf_counter() - start, len(question), len(answer))
+    return answer
+
+
+def timed_query_block(name, inst, question, blocks=1):
+    """
+    Query answered with definite length blocks, see binaryblock.read_blocks().
+    """
+    hook = _hook
+    if hook is None:
+        inst.write(question)
+        return read_blocks(inst, blocks)
+
+    start = time.perf_counter()
+    inst.write(question)
+    answer = read_blocks(inst, blocks)
+    hook.record(name, question, time.perf_counter() - start, len(question), len(answer))
+    return answer
+
+
+def timed_query_bytes(name, inst, question, count):
+    """
+    Query answered with count bytes of binary data and a terminator, see binaryblock.read_exact().
+    """
+    hook = _hook
+    if hook is None:
+        inst.write(question)
+        answer = read_exact(inst, count)
+        inst.read_bytes(1)
+        return answer
+
+    start = time.perf_counter()
+    inst.write(question)
+    answer = read_exact(inst, count)
+    inst.read_bytes(1)
+    hook.record(name, question, time.perf_counter() - start, len(question), len(answer) + 1)
+    return answer
+
+
+def timed_query_binary_values(name, inst, question, **kwargs):
+    hook = _hook
+    if hook is None:
+        return inst.query_binary_values(question, **kwargs)
+
+    start = time.perf_counter()
+    answer = inst.query_binary_values(question, **kwargs)
+    hook.record(name, question, time.perf_counter() - start, len(question), _size(answer))
+    return answer
+
+
+def record_transfer(name, question, start, bytes_in):
+    """
+    Record a query the driver reads itself, e.g. a block streamed chunk by chunk.
+    :param start: time.perf_counter() before the question was written
+    :param bytes_in: size of the whole answer
+    """
+    hook = _hook
+    if hook is not None:
+        hook.record(name, question, time.perf_counter() - start, len(question), bytes_in)
+
+
+@contextlib.contextmanager
+def invalidating_on_error(*invalidate):
+    """
+    A failed transfer leaves the instrument state unknown: the driver's cached state
+    (shadowed settings, stimulus axes) is dropped by the invalidate callables before the error propagates.
+    """
+    try:
+        yield
+    except Exception:
+        for func in invalidate:
+            func()
+        raise
+
+
+def _size(answer):
+    nbytes = getattr(answer, 'nbytes', None)
+    if nbytes is not None:
+        return nbytes
+    if isinstance(answer, (list, tuple)):
+        return 4 * len(answer)
+    return len(str(answer))
+
+
+class ConsoleHook:
+    """
+    Echo every command to the console, as the drivers used to do.
+    """
+    def __init__(self, max_length=80):
+        self._max_length = max_length
+
+    def record(self, instrument, command, elapsed, bytes_out, bytes_in):
+        print(f'{instrument} {command} ({bytes_in} bytes in {elapsed * 1000:.2f} ms)'[:self._max_length])
+
+
+class CommandStats:
+    # latency histogram bucket upper bounds, seconds
+    buckets = [0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0]
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.histogram = [0] * (len(self.buckets) + 1)
+
+    def add(self, elapsed, bytes_out, bytes_in):
+        self.count += 1
+        self.total += elapsed
+        self.min = min(self.min, elapsed)
+        self.max = max(self.max, elapsed)
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        self.histogram[bisect.bisect_left(self.buckets, elapsed)] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+            'histogram': dict(zip([str(b) for b in self.buckets] + ['inf'], self.histogram)),
+        }
+
+
+class CommandMetrics:
+    """
+    Per instrument, per SCPI header counters, latency histograms and transferred bytes.
+    Safe to use from several threads (see AsyncInstrument).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(CommandStats)
+
+    def record(self, instrument, command, elapsed, bytes_out, bytes_in):
+        with self._lock:
+            self._stats[(f'{instrument}', header(command))].add(elapsed, bytes_out, bytes_in)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self, instrument=None):
+        with self._lock:
+            return {key: stat for key, stat in self._stats.items() if instrument is None or key[0] == instrument}
+
+    def totals(self):
+        """
+        :return: {instrument: CommandStats} accumulated over all commands
+        """
+        totals = defaultdict(CommandStats)
+        with self._lock:
+            for (instrument, _), stat in self._stats.items():
+                total = totals[instrument]
+                total.count += stat.count
+                total.total += stat.total
+                total.min = min(total.min, stat.min)
+                total.max = max(total.max, stat.max)
+                total.bytes_out += stat.bytes_out
+                total.bytes_in += stat.bytes_in
+                total.histogram = [a + b for a, b in zip(total.histogram, stat.histogram)]
+        return dict(totals)
+
+    def as_dict(self):
+        with self._lock:
+            return {f'{instrument} {command}': stat.as_dict() for (instrument, command), stat in self._stats.items()}
+
+    def dump_json(self, path):
+        with open(path, mode='wt', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def summary(self, top=None):
+        rows = sorted(self.stats().items(), key=lambda item: item[1].total, reverse=True)[:top]
+        lines = [f'{"instrument":<16} {"command":<32} {"count":>7} {"total, s":>10} {"mean, ms":>10} '
+                 f'{"max, ms":>10} {"out, B":>10} {"in, B":>12}']
+        for (instrument, command), stat in rows:
+            lines.append(f'{instrument:<16} {command:<32} {stat.count:>7} {stat.total:>10.3f} {stat.mean * 1000:>10.3f} '
+                         f'{stat.max * 1000:>10.3f} {stat.bytes_out:>10} {stat.bytes_in:>12}')
+        return '\n'.join(lines)
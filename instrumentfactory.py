@@ -1,5 +1,4 @@
-import visa
-
+from instr import discovery, idncache, sessionpool
 from instr.agilent34410a import Agilent34410A
 from instr.agilent34410amock import Agilent34410AMock
 from instr.agilente3644a import AgilentE3644A
@@ -18,6 +17,8 @@ from instr.semiconductoranalyzer import SemiconductorAnalyzer
 from instr.semiconductoranalyzermock import SemiconductorAnalyzerMock
 
 mock_enabled = True
+# opt-in: remember address -> IDN between runs in idncache.cache_path
+use_idn_cache = False
 
 
 class InstrumentFactory:
@@ -29,13 +30,26 @@ class InstrumentFactory:
         # TODO remove applicable instrument when found one if needed more than one instrument of the same type
         # TODO: idea: pass list of applicable instruments to differ from the model of the same type?
         instr = self.from_address()
-        # if not instr:
-        #     return self.try_find()
+        if not instr:
+            return self.try_find()
         return instr
     def from_address(self):
         raise NotImplementedError
+    def identify(self):
+        if use_idn_cache:
+            entry = idncache.lookup(self.addr)
+            if entry is not None and entry['model'] in self.applicable:
+                return idncache.LazySession(self.addr, entry['model']), entry['idn']
+        inst, idn = sessionpool.identify(self.addr)
+        if use_idn_cache:
+            idncache.store(self.addr, idn)
+        return inst, idn
     def try_find(self):
-        raise NotImplementedError()
+        found = discovery.find_model(self.applicable)
+        if found is None:
+            return None
+        self.addr, _ = found
+        return self.from_address()
 
 
 class GeneratorFactory(InstrumentFactory):
@@ -46,9 +60,7 @@ class GeneratorFactory(InstrumentFactory):
         if mock_enabled:
             return AgilentN5183A(self.addr, '1,N5183A mock,1', AgilentN5183AMock())
         try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
+            inst, idn = self.identify()
             name = idn.split(',')[1].strip()
             if name in self.applicable:
                 return AgilentN5183A(self.addr, idn, inst)
@@ -65,9 +77,7 @@ class AnalyzerFactory(InstrumentFactory):
         if mock_enabled:
             return AgilentN9030A(self.addr, '1,N9030A mock,1', AgilentN9030AMock())
         try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
+            inst, idn = self.identify()
             name = idn.split(',')[1].strip()
             if name in self.applicable:
                 return AgilentN9030A(self.addr, idn, inst)
@@ -84,9 +94,7 @@ class MultimeterFactory(InstrumentFactory):
         if mock_enabled:
             return Agilent34410A(self.addr, '1,34410A mock,1', Agilent34410AMock())
         try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
+            inst, idn = self.identify()
             name = idn.split(',')[1].strip()
             if name in self.applicable:
                 return Agilent34410A(self.addr, idn, inst)
@@ -103,9 +111,7 @@ class SourceFactory(InstrumentFactory):
         if mock_enabled:
             return AgilentE3644A(self.addr, '1,E3648A mock,1', AgilentE3644AMock())
         try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
+            inst, idn = self.identify()
             name = idn.split(',')[1].strip()
             if name in self.applicable:
                 return AgilentE3644A(self.addr, idn, inst)
@@ -122,9 +128,7 @@ class NetworkAnalyzerFactory(InstrumentFactory):
         if mock_enabled:
             return AgilentE8362B(self.addr, '1,E8362B mock,1', AgilentE8362BMock())
         try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
+            inst, idn = self.identify()
             name = idn.split(',')[1].strip()
             if name in self.applicable:
                 return AgilentE8362B(self.addr, idn, inst)
@@ -135,18 +139,16 @@ class NetworkAnalyzerFactory(InstrumentFactory):
 
 class PowerMeterFactory(InstrumentFactory):
     def __init__(self, addr):
-        super().__init__(addr=addr, label='Анализатор цепей')
+        super().__init__(addr=addr, label='Измеритель мощности')
         self.applicable = ['N1914A', 'N1912A']
     def from_address(self):
         if mock_enabled:
             return AgilentN1914A(self.addr, '1,N1914A mock,1', AgilentN1914AMock())
         try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
+            inst, idn = self.identify()
             name = idn.split(',')[1].strip()
             if name in self.applicable:
-                return AgilentE3644A(self.addr, idn, inst)
+                return AgilentN1914A(self.addr, idn, inst)
         except Exception as ex:
             print('Source find error:', ex)
             exit(6)
@@ -164,9 +166,7 @@ class OscilloscopeFactory(InstrumentFactory):
         if mock_enabled:
             return Oscilloscope(self.addr, '1,DSO-X 3034A mock,1', OscilloscopeMock())
         try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
+            inst, idn = self.identify()
             name = idn.split(',')[1].strip()
             if name in self.applicable:
                 return Oscilloscope(self.addr, idn, inst)
@@ -187,9 +187,7 @@ class SemiconductorAnalyzerFactory(InstrumentFactory):
         if mock_enabled:
             return SemiconductorAnalyzer(self.addr, '1,B1500A mock,1', SemiconductorAnalyzerMock())
         try:
-            rm = visa.ResourceManager()
-            inst = rm.open_resource(self.addr)
-            idn = inst.query('*IDN?')
+            inst, idn = self.identify()
             name = idn.split(',')[1].strip()
             if name in self.applicable:
                 return SemiconductorAnalyzer(self.addr, idn, inst)
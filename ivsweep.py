@@ -0,0 +1,92 @@
+import time
+
+import numpy as np
+
+
+class IVSweep:
+    """
+    Voltage sweep of one or more outputs of an AgilentE3644A driven supply (E3644A, E3648A)
+    with current read back, every step is one round trip.
+
+    Trigger modes:
+        APPLy - each step sets the outputs with APPLy and measures them in the same message
+        BUS - triggered levels of the next step are loaded and armed while the current one is measured,
+              a single *TRG steps all outputs together
+    With settle > 0 the step and the measurement are sent separately with the settle time between them.
+    """
+    def __init__(self, source, chans=(1,), trigger='APPLy', current_limit=0.1, settle=0.0):
+        if trigger not in ['APPLy', 'BUS']:
+            raise ValueError(f'Wrong trigger mode: {trigger}')
+        self._source = source
+        self._chans = tuple(chans)
+        self._trigger = trigger
+        self._current_limit = current_limit
+        self._settle = settle
+        self._voltages = np.empty((len(self._chans), 0))
+        self._elapsed = 0.0
+
+    def load(self, voltages):
+        """
+        :param voltages: steps for all outputs, V, or array (len(chans), steps) with steps for each output
+        """
+        voltages = np.asarray(voltages, dtype=float)
+        self._voltages = np.broadcast_to(voltages, (len(self._chans), voltages.shape[-1]))
+
+        src = self._source
+        with src.batch():
+            for chan in self._chans:
+                src.set_trigger_source(chan, 'BUS' if self._trigger == 'BUS' else 'IMMediate')
+                src.set_output(chan, 'OFF')
+            if self._trigger == 'BUS':
+                src.send_channels(self._arm(0))
+
+    def _arm(self, step):
+        if step >= self.steps:
+            return list()
+        parts = list()
+        for chan, voltage in zip(self._chans, self._voltages[:, step]):
+            parts += [(chan, f'VOLTage:TRIGgered {voltage:.6g}'),
+                      (chan, f'CURRent:TRIGgered {self._current_limit:.6g}'),
+                      (chan, 'INITiate')]
+        return parts
+
+    def _step(self, step):
+        if self._trigger == 'BUS':
+            return [(None, '*TRG')]
+        return [(chan, f'APPLy {voltage:.6g},{self._current_limit:.6g}')
+                for chan, voltage in zip(self._chans, self._voltages[:, step])]
+
+    def run(self):
+        """
+        :return: {chan: (measured voltages, V; measured currents, A)} numpy arrays
+        """
+        src = self._source
+        readings = np.empty((self.steps, len(self._chans), 2))
+        measure = src.measure_parts(self._chans)
+        start = time.perf_counter()
+
+        src.send_channels([(chan, 'OUTPut ON') for chan in self._chans])
+        for step in range(self.steps):
+            # the next step is armed after the readback so the outputs don't move before it
+            readback = measure + (self._arm(step + 1) if self._trigger == 'BUS' else list())
+            if self._settle > 0:
+                src.send_channels(self._step(step))
+                time.sleep(self._settle)
+                answer = src.query_channels(readback)
+            else:
+                answer = src.query_channels(self._step(step) + readback)
+            readings[step] = src.parse_measure(answer, self._chans)
+
+        self._elapsed = time.perf_counter() - start
+        return {chan: (readings[:, index, 0], readings[:, index, 1]) for index, chan in enumerate(self._chans)}
+
+    def finish(self):
+        self._source.send_channels([(chan, 'OUTPut OFF') for chan in self._chans])
+
+    @property
+    def steps(self):
+        return self._voltages.shape[1]
+
+    @property
+    def elapsed(self):
+        return self._elapsed
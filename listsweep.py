@@ -0,0 +1,83 @@
+import time
+
+import numpy as np
+
+
+def scpi_list(values, fmt='{:.10g}'):
+    return ','.join(fmt.format(v) for v in values)
+
+
+class ListSweep:
+    """
+    Frequency response measurement with the generator (AgilentN5183A) in list sweep mode
+    and the analyzer (AgilentN9030A) in list sweep measurement mode.
+
+    Generator TRIG OUT must be wired to analyzer TRIG 1 IN, the analyzer measures one point
+    each time the generator reports the next point settled. Powers are fetched in one query.
+
+    Trigger modes:
+        IMMediate - generator steps by itself after the dwell time, no host traffic while running
+        BUS - host steps the generator with *TRG, one write per point and no queries
+    """
+    def __init__(self, generator, analyzer, trigger='IMMediate', rbw=100_000, sweep_time=0.001, settle=0.0005):
+        if trigger not in ['IMMediate', 'BUS']:
+            raise ValueError(f'Wrong trigger mode: {trigger}')
+        self._generator = generator
+        self._analyzer = analyzer
+        self._trigger = trigger
+        self._rbw = rbw
+        self._sweep_time = sweep_time
+        self._settle = settle
+        self._freqs = np.empty(0)
+        self._elapsed = 0.0
+
+    def load(self, freqs, pows):
+        """
+        :param freqs: frequencies, Hz
+        :param pows: generator power for each point or scalar, dBm
+        """
+        self._freqs = np.asarray(freqs, dtype=float)
+        gen, sa = self._generator, self._analyzer
+
+        with gen.batch():
+            gen.list_load(self._freqs, pows, self.dwell)
+            gen.list_trigger_source(self._trigger)
+            gen.set_trigger_output(1, 'SETTled')
+            gen.list_mode('ON')
+            gen.set_output('ON')
+
+        with sa.batch():
+            sa.configure_list()
+            sa.list_load(self._freqs, self._rbw, self._sweep_time)
+            sa.list_trigger_source('EXTernal1')
+
+    def run(self):
+        """
+        :return: (frequencies, Hz; measured powers, dBm) numpy arrays
+        """
+        gen, sa = self._generator, self._analyzer
+        start = time.perf_counter()
+
+        sa.list_initiate()
+        gen.list_initiate()
+        if self._trigger == 'BUS':
+            for _ in range(len(self._freqs)):
+                gen.trigger()
+                time.sleep(self.dwell)
+        powers = sa.fetch_list()
+
+        self._elapsed = time.perf_counter() - start
+        if len(powers) != len(self._freqs):
+            raise RuntimeError(f'Expected {len(self._freqs)} list points, got {len(powers)}')
+        return self._freqs.copy(), powers
+
+    def finish(self):
+        self._generator.list_mode('OFF')
+
+    @property
+    def dwell(self):
+        return self._sweep_time + self._settle
+
+    @property
+    def elapsed(self):
+        return self._elapsed
@@ -0,0 +1,242 @@
+"""
+Session level mock base with pluggable timing models, so batching, pipelining and async I/O
+show their gains offline:
+
+    mock = AgilentE8362BMock(latency=Jitter(GPIB, scale=0.0002), sweep=SweepTime(if_bandwidth=1e3), timeout=5000)
+
+Timing is off unless given, set_defaults() applies models to mocks created by the instrument factories.
+"""
+import copy
+import random
+import re
+import time
+
+import numpy as np
+
+from instr.binaryblock import parse_block
+
+
+class MockTimeoutError(TimeoutError):
+    pass
+
+
+class FixedLatency:
+    """
+    Transfer time of a message: fixed + per_byte * size, s
+    """
+    def __init__(self, fixed=0.0, per_byte=0.0):
+        self.fixed = fixed
+        self.per_byte = per_byte
+
+    def delay(self, nbytes):
+        return self.fixed + self.per_byte * nbytes
+
+
+# rough figures of the usual buses
+GPIB = FixedLatency(fixed=0.0005, per_byte=1e-6)
+USB = FixedLatency(fixed=0.0002, per_byte=5e-8)
+LAN = FixedLatency(fixed=0.0001, per_byte=1e-8)
+
+
+class Jitter:
+    """
+    Random addition to another latency model.
+    :param distribution: 'normal' (|N(0, scale)|), 'uniform' (U(0, scale)) or 'exponential' (mean scale)
+    """
+    def __init__(self, base=None, distribution='normal', scale=0.0001, seed=None):
+        if distribution not in ('normal', 'uniform', 'exponential'):
+            raise ValueError(f'Unknown distribution: {distribution}')
+        self.base = base
+        self.distribution = distribution
+        self.scale = scale
+        self._random = random.Random(seed)
+
+    def delay(self, nbytes):
+        base = self.base.delay(nbytes) if self.base is not None else 0.0
+        if self.distribution == 'normal':
+            return base + abs(self._random.gauss(0.0, self.scale))
+        elif self.distribution == 'uniform':
+            return base + self._random.uniform(0.0, self.scale)
+        return base + self._random.expovariate(1 / self.scale)
+
+
+class SweepTime:
+    """
+    Sweep duration from points and IF (resolution) bandwidth: overhead + points * (1 / if_bandwidth + dwell).
+    Points and bandwidth follow the SWEep:POINts and BWIDth / BANDwidth commands seen by the mock.
+    """
+    _points = re.compile(r'SWE\w*:POIN\w*\s+(\S+)', re.IGNORECASE)
+    _bandwidth = re.compile(r'(?:BWID\w*|BAND\w*)(?::RES\w*)?\s+([-+.\dEe]+)\s*([KMG]?HZ)?', re.IGNORECASE)
+    _units = {'HZ': 1.0, 'KHZ': 1e3, 'MHZ': 1e6, 'GHZ': 1e9}
+
+    def __init__(self, points=201, if_bandwidth=1e3, overhead=0.001, dwell=0.0):
+        self.points = points
+        self.if_bandwidth = if_bandwidth
+        self.overhead = overhead
+        self.dwell = dwell
+
+    def observe(self, command):
+        match = self._points.search(command)
+        if match:
+            self.points = int(float(match.group(1)))
+        match = self._bandwidth.search(command)
+        if match:
+            self.if_bandwidth = float(match.group(1)) * self._units[(match.group(2) or 'HZ').upper()]
+
+    def duration(self):
+        return self.overhead + self.points * (1 / self.if_bandwidth + self.dwell)
+
+
+defaults = {'latency': None, 'sweep': None, 'timeout': None}
+
+
+def set_defaults(latency=None, sweep=None, timeout=None):
+    """
+    Timing of mocks created without explicit models, e.g. by the instrument factories.
+    """
+    defaults.update({'latency': latency, 'sweep': sweep, 'timeout': timeout})
+
+
+def _size(answer):
+    if isinstance(answer, (bytes, str)):
+        return len(answer)
+    if isinstance(answer, (list, tuple, np.ndarray)):
+        return 4 * len(answer)
+    return len(f'{answer}')
+
+
+def _text(answer):
+    if isinstance(answer, bytes):
+        return answer.decode('latin-1')
+    if isinstance(answer, (list, tuple, np.ndarray)):
+        return ','.join(f'{value}' for value in answer)
+    return f'{answer}'
+
+
+class MockTransport:
+    """
+    Base of the session level mocks, implements the pyvisa session calls the drivers use.
+
+    Program messages are split on ';' and every command is passed to handle(), answers of the
+    queries are kept for the following read and joined with ';' as instruments do.
+    Sweeps are started by the commands matching sweep_trigger, *OPC? and *WAI wait for them to end.
+    :param latency: model with delay(nbytes), applied to every message and response
+    :param sweep: model with duration() and observe(command)
+    :param timeout: ms, like pyvisa session timeout, None waits forever
+    """
+    sweep_trigger = re.compile(r':?INIT\w*\d*(:IMM\w*)?$', re.IGNORECASE)
+
+    def __init__(self, latency=None, sweep=None, timeout=None):
+        self.latency = defaults['latency'] if latency is None else latency
+        sweep = defaults['sweep'] if sweep is None else sweep
+        self.sweep = copy.copy(sweep)
+        self.timeout = defaults['timeout'] if timeout is None else timeout
+        self._answers = list()
+        self._unread = b''
+        self._unread_offset = 0
+        self._sweep_end = 0.0
+        self.closed = False
+
+    def handle(self, command):
+        """
+        :return: answer of a query, None for commands
+        """
+        return None
+
+    def start_sweep(self):
+        duration = self.sweep.duration() if self.sweep is not None else 0.0
+        self._sweep_end = time.perf_counter() + duration
+
+    def wait_sweep(self):
+        remaining = self._sweep_end - time.perf_counter()
+        if remaining <= 0:
+            return
+        if self.timeout is not None and remaining > self.timeout / 1000:
+            time.sleep(self.timeout / 1000)
+            raise MockTimeoutError(f'Sweep takes {remaining:.3f} s, timeout is {self.timeout} ms')
+        time.sleep(remaining)
+
+    @property
+    def sweep_done(self):
+        return time.perf_counter() >= self._sweep_end
+
+    def _transfer(self, nbytes):
+        if self.latency is not None:
+            delay = self.latency.delay(nbytes)
+            if delay > 0:
+                time.sleep(delay)
+
+    def _command(self, command):
+        if self.sweep is not None:
+            self.sweep.observe(command)
+        header = command.split(' ', 1)[0]
+        if self.sweep_trigger.match(header):
+            self.start_sweep()
+        if header == '*OPC?':
+            self.wait_sweep()
+            return '1'
+        if header == '*WAI':
+            self.wait_sweep()
+            return None
+        return self.handle(command)
+
+    def write(self, command):
+        self._transfer(len(command))
+        self._answers = list()
+        self._unread = b''
+        self._unread_offset = 0
+        for part in command.split(';'):
+            part = part.strip()
+            if not part:
+                continue
+            answer = self._command(part)
+            if answer is not None:
+                self._answers.append(answer)
+        return 'success'
+
+    def _take(self):
+        if not self._answers:
+            if self.timeout is not None:
+                time.sleep(self.timeout / 1000)
+            raise MockTimeoutError('Query UNTERMINATED, nothing to read')
+        answers, self._answers = self._answers, list()
+        self._transfer(sum(_size(answer) for answer in answers) + 1)
+        return answers
+
+    def read(self):
+        return ';'.join(_text(answer) for answer in self._take())
+
+    def _response(self):
+        return b';'.join(answer if isinstance(answer, bytes) else _text(answer).encode()
+                         for answer in self._take()) + b'\n'
+
+    def read_raw(self):
+        return self._response()
+
+    def read_bytes(self, count, **kwargs):
+        """
+        Part of the response, the rest is kept for the following read_bytes().
+        """
+        if self._unread_offset >= len(self._unread):
+            self._unread, self._unread_offset = self._response(), 0
+        data = self._unread[self._unread_offset:self._unread_offset + count]
+        self._unread_offset += len(data)
+        return data
+
+    def query(self, question):
+        self.write(question)
+        return self.read()
+
+    def query_binary_values(self, question, datatype='f', is_big_endian=False, container=list, **kwargs):
+        self.write(question)
+        answer = self._take()[0]
+        if isinstance(answer, bytes):
+            values, _ = parse_block(answer, np.dtype(datatype).newbyteorder('>' if is_big_endian else '<'))
+        elif isinstance(answer, (list, tuple, np.ndarray)):
+            values = answer
+        else:
+            values = [float(value) for value in f'{answer}'.split(',')]
+        return container(values)
+
+    def close(self):
+        self.closed = True
@@ -1,28 +1,48 @@
 import datetime
-import visa
-from time import sleep
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from instr import sessionpool
+from instr.batching import Batch, join_commands, max_command_length
+from instr.instrumentation import timed_write, timed_query
+from instr.touchstone import write_touchstone
 
 TOUCHSTONE_S2P = 'S2P'
+SPARAMS_2PORT = ['S11', 'S21', 'S12', 'S22']
 
 
 class Obzor304:
-    def __init__(self, address: str):
-        # TODO: move resource manager out of this class
+    def __init__(self, address: str, inst=None, timeout=10.0, poll=0.01):
+        """
+        :param timeout: default sweep deadline of wait_complete(), s
+        :param poll: *ESR? poll interval of wait_complete(), s
+        """
         self._address = address
-        self._rm = visa.ResourceManager()
-        self._inst = self._rm.open_resource(address)
-        self._idn = self.query('*IDN?')
+        if inst is None:
+            self._inst, self._idn = sessionpool.identify(address)
+        else:
+            self._inst, self._idn = inst, inst.query('*IDN?')
         self._folder = ''
-        self._delay = 0.7
+        self._timeout = timeout
+        self._poll = poll
 
     def __str__(self):
         return f'{self._idn} at {self._address.strip("TCPIP::").strip("::INSTR")}'
 
     def send(self, command):
-        return self._inst.write(command)
+        return timed_write('OBZOR-304', self._inst, command)
 
     def query(self, question):
-        return self._inst.query(question)
+        return timed_query('OBZOR-304', self._inst, question)
+
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
+
+    def close(self):
+        sessionpool.close(self._inst)
 
     def init_instrument(self):
         # self.reset_instrument()
@@ -30,44 +50,174 @@ class Obzor304:
         self.make_data_dir()
         self.set_touchstone_file_type(TOUCHSTONE_S2P)
         self.set_trigger_source('INT')
+        self.set_continuous('OFF')
 
     def set_touchstone_file_type(self, ftype: str):
-        print('OBZOR-304: set out file type', self.send(f'MMEM:STOR:SNP:TYPE:{ftype}'), f'| file_type={ftype}')
+        return self.send(f'MMEM:STOR:SNP:TYPE:{ftype}')
 
     def set_active_window(self, num: int):
-        print('OBZOR-304: set active window:', self.send(f'DISP:WIND{num}:ACT'))
+        return self.send(f'DISP:WIND{num}:ACT')
 
     def set_trigger_source(self, source: str):
-        print('OBZOR-304: set trigger source:', self.send(f'TRIG:SOUR {source}'))
+        return self.send(f'TRIG:SOUR {source}')
+
+    def set_continuous(self, state: str):
+        return self.send(f'INITiate1:CONTinuous {state}')
 
     def make_data_dir(self):
         self._folder = r'C:\!meas\LPF_' + datetime.date.today().isoformat()
-        print('OBZOR-304: create out folder:',
-              self.send(f'MMEM:MDIR "{self._folder}"'), f'| dir={self._folder}')
+        return self.send(f'MMEM:MDIR "{self._folder}"')
 
     def reset_instrument(self):
-        print(self.send('*CLS'))
+        return self.send('*CLS')
+
+    def trigger(self):
+        """
+        Start a single sweep and arm the operation complete bit of the event status register.
+        """
+        return self.send('*CLS;:INIT1;*OPC')
+
+    def wait_complete(self, timeout=None):
+        """
+        Poll *ESR? until the sweep started by trigger() is done.
+        :param timeout: deadline, s
+        :return: sweep wait time, s
+        """
+        timeout = self._timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+        while not int(self.query('*ESR?')) & 1:
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f'OBZOR-304: sweep not complete in {timeout} s')
+            time.sleep(self._poll)
+        return time.perf_counter() - start
+
+    def fetch(self):
+        return self.query('SENS:FREQ:DATA?'), self.query('CALC1:DATA:FDAT?')
+
+    def set_sparam_traces(self):
+        """
+        Four traces S11, S21, S12, S22 on channel 1, needed for host side Touchstone files.
+        """
+        with self.batch():
+            self.send(f'CALC1:PAR:COUN {len(SPARAMS_2PORT)}')
+            for trace, param in enumerate(SPARAMS_2PORT, start=1):
+                self.send(f'CALC1:PAR{trace}:DEF {param}')
+
+    def fetch_sparams(self):
+        """
+        Frequencies and complex data of the four traces set by set_sparam_traces() in one query.
+        """
+        questions = ['SENS:FREQ:DATA?'] + [f'CALC1:TRAC{trace}:DATA:SDAT?' for trace in range(1, 5)]
+        return self.query(join_commands(questions))
+
+    @staticmethod
+    def parse_sparams(answer: str):
+        """
+        :return: (freqs, complex array (points, 2, 2)) numpy arrays
+        """
+        freqs, *traces = answer.split(';')
+        freqs = np.array(freqs.split(','), dtype=float)
+        sparams = np.empty((len(freqs), 2, 2), dtype=complex)
+        for param, trace in zip(SPARAMS_2PORT, traces):
+            values = np.array(trace.split(','), dtype=float)
+            sparams[:, int(param[1]) - 1, int(param[2]) - 1] = values[0::2] + 1j * values[1::2]
+        return freqs, sparams
+
+    def store_host(self, path, answer: str):
+        freqs, sparams = self.parse_sparams(answer)
+        write_touchstone(path, freqs, sparams, comments=[self._idn.strip()])
+        return freqs, sparams
+
+    def store(self, n: int):
+        meas_file_name = self._folder + f'\\lpf_{str(n).zfill(3)}.s2p'
+        self.send(f'MMEM:STOR:SNP "{meas_file_name}"')
+        return meas_file_name
 
     def measure(self, n: int):
-        meas_file_name = self._folder + f'\\lpf_{str(n).zfill(3)}.s2p'
-        print('OBZOR-304: trigger measure:', self.send('INIT1; *OPC?'))
-
-        # FIXME: detector doesn't work
-        # print('OBZOR-304: запускаем измерение:', self._inst.write('TRIGger:SEQuence:SINGle'))
-        # TODO: get confirmation for measurement end
-        # print(self._inst.query('*OPC?'))
-        # while self._inst.query('*OPC?') != '1':
-        #     print('waiting')
-
-        sleep(self._delay)
-        freqs = self.query('SENS:FREQ:DATA?')
-        amps = self.query('CALC1:DATA:FDAT?')
-        # print('freqs:', freqs.count(',') + 1, freqs)
-        # print('amp:', amps.count(',') + 1, amps)
-        print('OBZOR-304: save measure:',
-              self.send(f'MMEM:STOR:SNP "{meas_file_name}"'), f'\nФайл: {meas_file_name}')
+        self.trigger()
+        self.wait_complete()
+        freqs, amps = self.fetch()
+        self.store(n)
         return freqs, amps
 
+    def measure_series(self, parts, timeout=None, host_dir=None):
+        """
+        Measure parts one by one, yield results while the next part is being measured.
+
+        After the sweep of part N is fetched, the instrument side save of part N and the trigger
+        of part N+1 go out in one message, and part N is parsed on the host while N+1 sweeps.
+
+        With host_dir set, the S-parameters of the traces set by set_sparam_traces() are fetched
+        instead and part N is written to host_dir/lpf_NNN.s2p while N+1 sweeps,
+        nothing is stored on the instrument drive.
+
+        :param parts: part numbers, or number of parts to measure starting from 0
+        :param timeout: per sweep deadline, s
+        :param host_dir: folder for host side Touchstone files
+        :return: generator of (n, freqs, amps, cycle time in s), freqs and amps as numpy arrays,
+                 amps are complex (points, 2, 2) S-parameters with host_dir set
+        """
+        if isinstance(parts, int):
+            parts = range(parts)
+        parts = list(parts)
+        if not parts:
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = None
+            last_done = time.perf_counter()
+            self.trigger()
+            for i, n in enumerate(parts):
+                self.wait_complete(timeout)
+                if host_dir is None:
+                    freqs, amps = self.fetch()
+                    with self.batch():
+                        self.store(n)
+                        if i + 1 < len(parts):
+                            self.trigger()
+                    parsed = executor.submit(self.parse, freqs, amps)
+                else:
+                    answer = self.fetch_sparams()
+                    if i + 1 < len(parts):
+                        self.trigger()
+                    path = os.path.join(host_dir, f'lpf_{str(n).zfill(3)}.s2p')
+                    parsed = executor.submit(self.store_host, path, answer)
+
+                done = time.perf_counter()
+                cycle, last_done = done - last_done, done
+                if pending is not None:
+                    yield pending[0], *pending[1].result(), pending[2]
+                pending = n, parsed, cycle
+
+            yield pending[0], *pending[1].result(), pending[2]
+
+    @staticmethod
+    def parse(freqs: str, amps: str):
+        """
+        FDAT returns two values per point, second one is only used by polar and Smith formats.
+        :return: (freqs, amps) numpy arrays
+        """
+        freqs = np.array(freqs.split(','), dtype=float)
+        amps = np.array(amps.split(','), dtype=float).reshape(-1, 2)[:, 0]
+        return freqs, amps
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+
+    @property
+    def poll(self):
+        return self._poll
+
+    @poll.setter
+    def poll(self, value):
+        self._poll = value
+
     def finish(self):
-        print('OBZOR-304: continuous trigger off:', self.send('INITiate1:CONTinuous ON'))
+        self.send('INITiate1:CONTinuous ON')
         self.set_trigger_source('INT')
@@ -1,28 +1,33 @@
-import datetime
 import random
 
+from instr.mocktransport import MockTransport
 from instr.obzor304 import Obzor304
 
-TOUCHSTONE_S2P = "S2P"
 
-
-class Obzor304Mock(Obzor304):
-
-    def __init__(self, address: str):
-        self._address = address
-        self._idn = 'OBZOR304 mock'
-        self._folder = ""
-        self._delay = 0
-
-    def send(self, command):
-        print('Obzor304 mock:', command)
-        return 'success'
-
-    def query(self, question):
-        print('Obzor304 mock', question)
-        if question == 'SENS:FREQ:DATA?':
+class Obzor304Session(MockTransport):
+    """
+    *ESR? reports operation complete once the sweep started by INIT1 is over, see the sweep timing model.
+    """
+    def handle(self, question):
+        question = question.lstrip(':')
+        if question == '*IDN?':
+            return 'OBZOR304 mock'
+        elif question == 'SENS:FREQ:DATA?':
             return '300,4000,50000,600000,7000000'
+        elif question == '*ESR?':
+            return '1' if self.sweep_done else '0'
         elif question == 'CALC1:DATA:FDAT?':
             amps = list(map(lambda x: x - random.randint(1, 2), [2, 0, 1, 0, 1, 0, -3, 0, -6, 0]))
             return ','.join(map(str, amps))
-        return 'success'
+        elif question.startswith('CALC1:TRAC') and question.endswith(':DATA:SDAT?'):
+            values = [random.uniform(-1, 1) for _ in range(10)]
+            return ','.join(map(str, values))
+        elif '?' in question:
+            return 'success'
+        return None
+
+
+class Obzor304Mock(Obzor304):
+
+    def __init__(self, address: str, **timing):
+        super().__init__(address, Obzor304Session(**timing), timeout=1.0, poll=0)
@@ -1,3 +1,52 @@
+import time
+
+import numpy as np
+
+from instr import sessionpool
+from instr.batching import Batch, max_command_length
+from instr.instrumentation import record_transfer, timed_write, timed_query
+
+# :WAVeform:FORMat -> dtype of the signed codes sent LSB first
+WAVEFORM_DTYPES = {'BYTE': np.dtype('i1'), 'WORD': np.dtype('<i2')}
+# format field of :WAVeform:PREamble?
+PREAMBLE_FORMATS = {0: 'BYTE', 1: 'WORD'}
+
+
+class WaveformPreamble:
+    """
+    :WAVeform:PREamble? answer, scales codes to volts: (code - y_reference) * y_increment + y_origin
+    """
+    __slots__ = ('format', 'type', 'points', 'count', 'x_increment', 'x_origin', 'x_reference',
+                 'y_increment', 'y_origin', 'y_reference')
+
+    def __init__(self, answer: str):
+        values = answer.strip().split(',')
+        self.format, self.type, self.points, self.count = (int(float(value)) for value in values[:4])
+        (self.x_increment, self.x_origin, self.x_reference,
+         self.y_increment, self.y_origin, self.y_reference) = (float(value) for value in values[4:10])
+
+    def __str__(self):
+        return f'<{self.__class__.__name__}>(points={self.points}, dt={self.x_increment:g}, dv={self.y_increment:g})'
+
+    def volts(self, codes, out=None):
+        """
+        Scale codes to volts into out (allocated as float32 if not given).
+        """
+        if out is None:
+            out = np.empty(len(codes), dtype=np.float32)
+        np.subtract(codes, self.y_reference, out=out, casting='unsafe')
+        out *= self.y_increment
+        out += self.y_origin
+        return out
+
+    def times(self, start=0, stop=None):
+        """
+        Sample times of points start..stop, s
+        """
+        stop = self.points if stop is None else stop
+        return (np.arange(start, stop) - self.x_reference) * self.x_increment + self.x_origin
+
+
 class Oscilloscope:
 
     def __init__(self, address: str, idn: str, inst):
@@ -5,6 +54,7 @@ class Oscilloscope:
         self._idn = idn
         self._name = idn.split(',')[1].strip()
         self._inst = inst
+        self._waveform_format = 'BYTE'
 
     def __str__(self):
         return f'{self._name}'
@@ -13,44 +63,112 @@ class Oscilloscope:
         return f'{self.__class__}(idn={self._idn})'
 
     def send(self, command):
-        print(f'{self._name}', self._inst.write(command))
+        return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        answer = self._inst.query(question)
-        print(f'{self._name} {answer}')
-        return answer
+        return timed_query(self._name, self._inst, question)
 
-    def ping(self):
-        print(self.query('*IDN?'))
-
-    def set_autocalibrate(self, state):
-        self.send(f':CAL:AUTO {state}')
-
-    def set_span(self, value, unit):
-        self.send(f':SENS:FREQ:SPAN {value}{unit}')
-
-    def set_marker_mode(self, marker: int, mode='POS'):
-        self.send(f':CALC:MARK{marker}:MODE {mode}')
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
 
-    def set_pow_attenuation(self, value):
-        self.send(f':POW:ATT {value}')
+    def close(self):
+        sessionpool.close(self._inst)
 
-    def set_measure_center_freq(self, value, unit):
-        # TODO hack for E4446A
-        com = f':SENSe:FREQuency:RF:CENTer {value}{unit}'
-        if self._name == 'E4446A':
-            com = f':SENSe:FREQuency:CENTer {value}{unit}'
-        self.send(com)
-
-    def set_marker1_x_center(self, value, unit):
-        self.send(f':CALCulate:MARKer1:X:CENTer {value}{unit}')
-
-    def read_pow(self, marker: int=1) -> float:
-        answer = self.query(f':CALCulate:MARKer{marker}:Y?')
-        return float(answer)
+    def ping(self):
+        print(self.query('*IDN?'))
 
-    def remove_marker(self, marker=1):
-        return self.send(f':CALC:MARK{marker}:MODE OFF')
+    # :WAVeform subsystem
+    def digitize(self, chan=1):
+        """
+        Acquire a single record and stop, returns when the acquisition is done.
+        """
+        return self.query(f':DIGitize CHANnel{chan};*OPC?')
+
+    def waveform_source(self, chan=1):
+        return self.send(f':WAVeform:SOURce CHANnel{chan}')
+
+    def waveform_format(self, fmt='BYTE'):
+        """
+        BYTE - 8-bit codes, WORD - 16-bit codes; both are transferred signed, LSB first
+        """
+        fmt = fmt.upper()
+        if fmt not in WAVEFORM_DTYPES:
+            raise ValueError(f'Unsupported waveform format: {fmt}')
+        self._waveform_format = fmt
+        with self.batch():
+            self.send(f':WAVeform:FORMat {fmt}')
+            self.send(':WAVeform:BYTeorder LSBFirst')
+            self.send(':WAVeform:UNSigned 0')
+
+    def waveform_points(self, points, mode='RAW'):
+        """
+        RAW - full acquisition memory, NORMal - screen resolution record
+        """
+        with self.batch():
+            self.send(f':WAVeform:POINts:MODE {mode}')
+            self.send(f':WAVeform:POINts {points}')
+
+    def waveform_preamble(self):
+        return WaveformPreamble(self.query(':WAVeform:PREamble?'))
+
+    def read_waveform(self, chan=1, out=None, path=None, chunk_size=1 << 20):
+        """
+        Fetch the record of the channel with :WAVeform:DATA? and scale it to volts chunk by chunk,
+        so only chunk_size bytes of codes are held at a time.
+
+        The code width is taken from the preamble, not from the last waveform_format() call.
+
+        :param out: preallocated float array of at least preamble.points elements
+        :param path: .npy file to memory-map the result to if out is not given
+        :param chunk_size: bytes per read
+        :return: (WaveformPreamble, volts array), sample times are preamble.times()
+        """
+        preamble = WaveformPreamble(self.query(f':WAVeform:SOURce CHANnel{chan};:WAVeform:PREamble?'))
+        fmt = PREAMBLE_FORMATS.get(preamble.format)
+        if fmt is None:
+            raise ValueError(f'Unsupported waveform format in preamble: {preamble.format}')
+        self._waveform_format = fmt
+        dtype = WAVEFORM_DTYPES[fmt]
+
+        if out is not None and preamble.points > len(out):
+            raise ValueError(f'Record of {preamble.points} points does not fit into {len(out)} elements')
+        if out is None:
+            if path is not None:
+                out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(preamble.points,))
+            else:
+                out = np.empty(preamble.points, dtype=np.float32)
+
+        question = ':WAVeform:DATA?'
+        start = time.perf_counter()
+        self._inst.write(question)
+        header = self._inst.read_bytes(2)
+        if header[:1] != b'#':
+            raise ValueError(f'Malformed block header: {header!r}')
+        digits = self._inst.read_bytes(int(header[1:2]))
+        length = int(digits)
+        points = length // dtype.itemsize
+        chunk_size -= chunk_size % dtype.itemsize
+        if points > len(out):
+            # drain the block so the session stays in step with the instrument
+            done = 0
+            while done < length:
+                done += len(self._inst.read_bytes(min(chunk_size, length - done)))
+            self._inst.read_bytes(1)
+            raise ValueError(f'Record of {points} points does not fit into {len(out)} elements')
+
+        done = 0
+        while done < length:
+            data = self._inst.read_bytes(min(chunk_size, length - done))
+            first = done // dtype.itemsize
+            codes = np.frombuffer(data, dtype=dtype)
+            preamble.volts(codes, out=out[first:first + len(codes)])
+            done += len(data)
+        self._inst.read_bytes(1)
+
+        record_transfer(self._name, question, start, len(header) + len(digits) + length + 1)
+        if isinstance(out, np.memmap):
+            out.flush()
+        return preamble, out[:points]
 
     def set_system_local(self):
         # pass
@@ -1,12 +1,49 @@
-class OscilloscopeMock:
+import re
 
-    def __init__(self):
-        pass
+import numpy as np
 
-    def write(self, command):
-        return 'success'
+from instr.binaryblock import make_block
+from instr.mocktransport import MockTransport
 
-    def query(self, question):
-        answer = '-2'
-        return answer
 
+class OscilloscopeMock(MockTransport):
+    """
+    Serves a 1 MHz sine on every channel as :WAVeform:DATA? blocks of the set format and points.
+    """
+    _format = re.compile(r':?WAV\w*:FORM\w*\s+(\w+)', re.IGNORECASE)
+    _points = re.compile(r':?WAV\w*:POIN\w*\s+(\d+)', re.IGNORECASE)
+
+    def __init__(self, **timing):
+        super().__init__(**timing)
+        self._waveform_format = 'BYTE'
+        self._waveform_points = 1000
+
+    def _preamble(self):
+        word = self._waveform_format == 'WORD'
+        x_increment = 1e-9
+        y_increment = 1 / 100 / (256 if word else 1)
+        return (f'{int(word)},0,{self._waveform_points},1,{x_increment:e},'
+                f'{-self._waveform_points / 2 * x_increment:e},0,{y_increment:e},0,0')
+
+    def _waveform(self):
+        word = self._waveform_format == 'WORD'
+        t = np.arange(self._waveform_points) * 1e-9
+        codes = np.round(100 * np.sin(2 * np.pi * 1e6 * t) * (256 if word else 1))
+        return make_block(codes, '<i2' if word else 'i1', terminator=b'')
+
+    def handle(self, command):
+        match = self._format.match(command)
+        if match:
+            self._waveform_format = match.group(1).upper()
+            return None
+        match = self._points.match(command)
+        if match:
+            self._waveform_points = int(match.group(1))
+            return None
+        if command.lstrip(':').upper().startswith('WAV') and command.endswith(':PREamble?'):
+            return self._preamble()
+        if command.lstrip(':').upper().startswith('WAV') and command.endswith(':DATA?'):
+            return self._waveform()
+        if '?' in command:
+            return '-2'
+        return None
@@ -0,0 +1,110 @@
+"""
+Vectorized phase noise analysis of single sideband traces L(f), dBc/Hz over offset frequency, Hz,
+as returned by Pna20.calc_phase_noise().
+"""
+import numpy as np
+
+from instr.runningmedian import running_median
+
+
+def _clip(offsets, noise, start=None, stop=None):
+    """
+    Part of the trace within [start, stop], the ends interpolated on log-log scale.
+    """
+    offsets = np.asarray(offsets, dtype=float)
+    noise = np.asarray(noise, dtype=float)
+    start = offsets[0] if start is None else max(start, offsets[0])
+    stop = offsets[-1] if stop is None else min(stop, offsets[-1])
+    if start >= stop:
+        raise ValueError(f'Offset range {start:g}..{stop:g} Hz is outside of the trace')
+
+    inside = (offsets > start) & (offsets < stop)
+    ends = np.interp(np.log10([start, stop]), np.log10(offsets), noise)
+    return (np.concatenate(([start], offsets[inside], [stop])),
+            np.concatenate(([ends[0]], noise[inside], [ends[1]])))
+
+
+def integrated_noise(offsets, noise, start=None, stop=None):
+    """
+    Single sideband noise power integrated over the offset range, each segment between
+    two points taken as a power law (straight line on log-log scale).
+    :return: integrated noise, dBc
+    """
+    f, level = _clip(offsets, noise, start, stop)
+    p = 10 ** (level / 10)
+    f1, f2, p1, p2 = f[:-1], f[1:], p[:-1], p[1:]
+    ratio = f2 / f1
+    slope = np.log(p2 / p1) / np.log(ratio)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        power_law = p1 * f1 / (slope + 1) * (ratio ** (slope + 1) - 1)
+    segments = np.where(np.isclose(slope, -1), p1 * f1 * np.log(ratio), power_law)
+    return 10 * np.log10(np.sum(segments))
+
+
+def rms_phase(offsets, noise, start=None, stop=None):
+    """
+    RMS phase deviation of both sidebands over the offset range.
+    :return: rad
+    """
+    return np.sqrt(2 * 10 ** (integrated_noise(offsets, noise, start, stop) / 10))
+
+
+def rms_jitter(offsets, noise, carrier, start=None, stop=None):
+    """
+    :param carrier: carrier frequency, Hz
+    :return: RMS jitter over the offset range, s
+    """
+    return rms_phase(offsets, noise, start, stop) / (2 * np.pi * carrier)
+
+
+def jitter_table(offsets, noise, carrier, ranges):
+    """
+    :param ranges: list of (start, stop) offset ranges, Hz
+    :return: structured array of start, stop, integrated noise (dBc), rms phase (rad, deg) and rms jitter (s)
+    """
+    table = np.zeros(len(ranges), dtype=[('start', 'f8'), ('stop', 'f8'), ('noise', 'f8'),
+                                         ('phase', 'f8'), ('phase_deg', 'f8'), ('jitter', 'f8')])
+    for row, (start, stop) in zip(table, ranges):
+        integrated = integrated_noise(offsets, noise, start, stop)
+        phase = np.sqrt(2 * 10 ** (integrated / 10))
+        row['start'], row['stop'], row['noise'] = start, stop, integrated
+        row['phase'], row['phase_deg'], row['jitter'] = phase, np.degrees(phase), phase / (2 * np.pi * carrier)
+    return table
+
+
+def spot_noise(offsets, noise, spots=None):
+    """
+    Noise at given offsets interpolated on log frequency scale, decade offsets within the trace by default.
+    :return: (spot offsets, noise at them, dBc/Hz)
+    """
+    offsets = np.asarray(offsets, dtype=float)
+    if spots is None:
+        spots = 10.0 ** np.arange(np.ceil(np.log10(offsets[0])), np.floor(np.log10(offsets[-1])) + 1)
+    spots = np.asarray(spots, dtype=float)
+    spots = spots[(spots >= offsets[0]) & (spots <= offsets[-1])]
+    return spots, np.interp(np.log10(spots), np.log10(offsets), noise)
+
+
+def find_spurs(offsets, noise, threshold=10.0, window=31):
+    """
+    Points standing above the running median of the trace by more than threshold,
+    adjacent points of one spur are merged to the highest one.
+    :param threshold: dB above the noise floor
+    :param window: running median width, points, odd
+    :return: structured array of offset (Hz), level (dBc/Hz) and excess over the floor (dB)
+    """
+    offsets = np.asarray(offsets, dtype=float)
+    noise = np.asarray(noise, dtype=float)
+    excess = noise - running_median(noise, window)
+
+    above = excess > threshold
+    # split runs of consecutive points above the floor and keep the peak of every run
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], above.view(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    peaks = np.array([start + np.argmax(excess[start:end]) for start, end in zip(starts, ends)], dtype=int)
+
+    spurs = np.zeros(len(peaks), dtype=[('offset', 'f8'), ('level', 'f8'), ('excess', 'f8')])
+    spurs['offset'] = offsets[peaks]
+    spurs['level'] = noise[peaks]
+    spurs['excess'] = excess[peaks]
+    return spurs
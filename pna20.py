@@ -1,9 +1,19 @@
+import numpy as np
 import visa
 
+from instr import discovery, sessionpool
+from instr.batching import Batch, max_command_length
+from instr.instrumentation import timed_write, timed_query, timed_query_binary_values
+
+# traces transferred as binary blocks
+BINARY_TRACES = ['CALC:FN:TRAC:FREQ?', 'CALC:FN:TRAC:NOIS?', 'CALC:FN:TRAC:IMAG?']
+
 
 class Pna20(object):
 
     model = 'PNA20'
+    # properties that talk to the instrument, AsyncInstrument reads them on its worker thread
+    io_properties = ('operation_complete',)
 
     def __init__(self, idn: str, inst):
         self._idn = idn
@@ -18,16 +28,18 @@ class Pna20(object):
         return f'{self.__class__}(idn={self._idn})'
 
     def send(self, command):
-        print(f'{self._name} send {command} ->', self._inst.write(command))
+        return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        print(f'{self._name} ask {question}')
-        if question in ['CALC:FN:TRAC:FREQ?', 'CALC:FN:TRAC:NOIS?', 'CALC:FN:TRAC:IMAG?']:
-            answer = self._inst.query_binary_values(question)
-        else:
-            answer = self._inst.query(question)
-        print(f'> {answer}')
-        return answer
+        if question in BINARY_TRACES:
+            return timed_query_binary_values(self._name, self._inst, question, container=np.array)
+        return timed_query(self._name, self._inst, question)
+
+    def batch(self, max_length=max_command_length):
+        return Batch(self, max_length)
+
+    def close(self):
+        sessionpool.close(self._inst)
 
     def ping(self):
         return self._inst.query('*IDN?')
@@ -57,6 +69,15 @@ class Pna20(object):
     def calc_trace_noise(self, mode: str):
         return self.query(f'CALC:{mode}:TRAC:NOIS?')
 
+    def calc_trace_imag(self, mode: str):
+        return self.query(f'CALC:{mode}:TRAC:IMAG?')
+
+    def calc_phase_noise(self, mode='FN'):
+        """
+        :return: (offsets, Hz; noise, dBc/Hz) numpy arrays, see phasenoise for the analysis
+        """
+        return self.calc_trace_freq(mode), self.calc_trace_noise(mode)
+
     # :MEASURE subsystem
     def measure_supply_current(self, supply=1):
         return self.query(f'MEAS:SUPP{supply}:CURR?').strip()
@@ -148,25 +169,18 @@ class Pna20(object):
 
     @classmethod
     def from_address_string(cls, address: str):
-        rm = visa.ResourceManager()
         try:
-            inst = rm.open_resource(address)
-            idn = inst.query('*IDN?')
+            inst, idn = sessionpool.identify(address)
             return cls(idn, inst=inst)
         except visa.VisaIOError as ex:
+            sessionpool.release(address)
             raise RuntimeError(f'VISA error: {address}: {ex}')
 
     @classmethod
-    def try_find(cls):
-        rm = visa.ResourceManager()
-        for res in rm.list_resources():
-            print(f'trying {res}')
-            try:
-                inst = rm.open_resource(res)
-                idn = inst.query('*IDN?')
-                if cls.model in idn:
-                    return cls(idn=idn, inst=inst), res
-            except visa.VisaIOError as ex:
-                print(f'VISA error: {ex}')
-
-
+    def try_find(cls, timeout=500):
+        found = discovery.find_model(cls.model, timeout=timeout)
+        if found is None:
+            return None
+        res, idn = found
+        inst = sessionpool.open_resource(res)
+        return cls(idn=idn, inst=inst), res
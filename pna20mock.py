@@ -1,18 +1,12 @@
+from instr.mocktransport import MockTransport
 from instr.pna20 import Pna20
 
 
-class Pna20Mock(Pna20):
-
-    idn = 'AnaPico, PNA20 mock, sn, firmware'
-
-    def __init__(self, idn: str, inst=None):
-        super().__init__(idn, inst)
-
-    def send(self, command):
-        print(f'{self._name} send: {command}')
-        return 'success'
+class Pna20Session(MockTransport):
 
-    def query(self, question):
+    def handle(self, question):
+        if '?' not in question:
+            return None
         answer = question
         if question == 'CALC:FN:TRAC:FREQ?':
             answer = [10.986328125, 12.20703125, 13.427734375, 14.6484375, 15.869140625, 17.08984375, 18.310546875, 19.53125, 20.751953125, 21.97265625, 23.193359375, 24.4140625, 25.634765625, 26.85546875, 28.076171875, 29.296875, 30.517578125, 31.73828125, 32.958984375, 34.1796875, 35.400390625, 36.62109375, 37.841796875, 39.0625, 40.283203125, 41.50390625, 42.724609375, 43.9453125, 45.166015625, 46.38671875, 47.607421875, 48.828125, 50.048828125, 51.26953125, 52.490234375, 53.7109375, 54.931640625, 56.15234375, 57.373046875, 58.59375, 59.814453125, 61.03515625, 62.255859375, 63.4765625, 64.697265625, 65.91796875, 67.138671875, 68.359375, 69.580078125, 70.80078125, 72.021484375, 73.2421875, 74.462890625, 75.68359375, 76.904296875, 78.125, 79.345703125, 80.56640625, 81.787109375, 83.0078125, 84.228515625, 85.44921875, 86.669921875, 87.890625, 89.111328125, 90.33203125, 91.552734375, 92.7734375, 93.994140625, 95.21484375, 96.435546875, 97.65625, 98.876953125, 100.09765625, 101.318359375, 102.5390625, 103.759765625, 104.98046875, 106.201171875, 107.421875, 108.642578125, 109.86328125, 111.083984375, 112.3046875, 113.525390625, 114.74609375, 115.966796875, 117.1875, 118.408203125, 119.62890625, 120.849609375, 122.0703125, 123.291015625, 124.51171875, 125.732421875, 126.953125, 128.173828125, 129.39453125, 130.615234375, 131.8359375, 133.056640625, 134.27734375, 135.498046875, 136.71875, 137.939453125, 139.16015625, 140.380859375, 141.6015625, 142.822265625, 144.04296875, 145.263671875, 146.484375, 147.705078125, 148.92578125, 150.146484375, 151.3671875, 152.587890625, 153.80859375, 155.029296875, 156.25, 157.470703125, 158.69140625, 159.912109375, 161.1328125, 162.353515625, 163.57421875, 164.794921875, 166.015625, 167.236328125, 168.45703125, 169.677734375, 170.8984375, 172.119140625, 173.33984375, 174.560546875, 175.78125, 177.001953125, 178.22265625, 179.443359375, 180.6640625, 181.884765625, 183.10546875, 184.326171875, 185.546875, 186.767578125, 187.98828125, 189.208984375, 190.4296875, 191.650390625, 192.87109375, 194.091796875, 195.3125, 196.533203125, 197.75390625, 198.974609375, 200.1953125, 201.416015625, 202.63671875, 203.857421875, 205.078125, 206.298828125, 207.51953125, 208.740234375, 209.9609375, 211.181640625, 212.40234375, 213.623046875, 214.84375, 216.064453125, 217.28515625, 218.505859375, 219.7265625, 220.947265625, 222.16796875, 223.388671875, 224.609375, 225.830078125, 227.05078125, 228.271484375, 229.4921875, 230.712890625, 231.93359375, 233.154296875, 234.375, 235.595703125, 236.81640625, 238.037109375, 239.2578125, 240.478515625, 241.69921875, 242.919921875, 244.140625, 245.361328125, 246.58203125, 247.802734375, 249.0234375, 250.244140625, 251.46484375, 252.685546875, 253.90625, 255.126953125, 256.34765625, 257.568359375, 258.7890625, 260.009765625, 261.23046875, 262.451171875, 263.671875, 264.892578125, 266.11328125, 267.333984375, 268.5546875, 269.775390625, 270.99609375, 272.216796875, 273.4375, 274.658203125, 275.87890625, 277.099609375, 278.3203125, 279.541015625, 280.76171875, 281.982421875, 283.203125, 284.423828125, 285.64453125, 286.865234375, 288.0859375, 289.306640625, 290.52734375, 291.748046875, 292.96875, 294.189453125, 295.41015625, 296.630859375, 297.8515625, 299.072265625, 300.29296875, 301.513671875, 302.734375, 303.955078125, 305.17578125, 306.396484375, 307.6171875, 308.837890625, 310.05859375, 311.279296875, 312.5, 313.720703125, 314.94140625, 316.162109375, 317.3828125, 318.603515625, 319.82421875, 321.044921875, 322.265625, 323.486328125, 324.70703125, 325.927734375, 327.1484375, 328.369140625, 329.58984375, 330.810546875, 332.03125, 333.251953125, 334.47265625, 335.693359375, 336.9140625, 338.134765625, 339.35546875, 340.576171875, 341.796875, 343.017578125, 344.23828125, 345.458984375, 346.6796875, 347.900390625, 349.12109375, 350.341796875, 351.5625, 352.783203125, 354.00390625, 355.224609375, 356.4453125, 357.666015625, 358.88671875, 360.107421875, 361.328125, 362.548828125, 363.76953125, 364.990234375, 366.2109375, 367.431640625, 368.65234375, 369.873046875, 371.09375, 372.314453125, 373.53515625, 374.755859375, 375.9765625, 377.197265625, 378.41796875, 379.638671875, 380.859375, 382.080078125, 383.30078125, 384.521484375, 385.7421875, 386.962890625, 388.18359375, 389.404296875, 390.625, 391.845703125, 393.06640625, 394.287109375, 395.5078125, 396.728515625, 397.94921875, 399.169921875, 400.390625, 401.611328125, 402.83203125, 404.052734375, 405.2734375, 406.494140625, 407.71484375, 408.935546875, 410.15625, 411.376953125, 412.59765625, 413.818359375, 415.0390625, 416.259765625, 417.48046875, 418.701171875, 419.921875, 421.142578125, 422.36328125, 423.583984375, 424.8046875, 426.025390625, 427.24609375, 428.466796875, 429.6875, 430.908203125, 432.12890625, 433.349609375, 434.5703125, 435.791015625, 437.01171875, 438.232421875, 439.453125, 440.673828125, 441.89453125, 443.115234375, 444.3359375, 445.556640625, 446.77734375, 447.998046875, 449.21875, 450.439453125, 451.66015625, 452.880859375, 454.1015625, 455.322265625, 456.54296875, 457.763671875, 458.984375, 460.205078125, 461.42578125, 462.646484375, 463.8671875, 465.087890625, 466.30859375, 467.529296875, 468.75, 469.970703125, 471.19140625, 472.412109375, 473.6328125, 474.853515625, 476.07421875, 477.294921875, 478.515625, 479.736328125, 480.95703125, 482.177734375, 483.3984375, 484.619140625, 485.83984375, 487.060546875, 488.28125, 489.501953125, 490.72265625, 491.943359375, 493.1640625, 494.384765625, 495.60546875, 496.826171875, 498.046875, 499.267578125, 500.48828125, 512.6953125, 524.90234375, 537.109375, 549.31640625, 561.5234375, 573.73046875, 585.9375, 598.14453125, 610.3515625, 622.55859375, 634.765625, 646.97265625, 659.1796875, 671.38671875, 683.59375, 695.80078125, 708.0078125, 720.21484375, 732.421875, 744.62890625, 756.8359375, 769.04296875, 781.25, 793.45703125, 805.6640625, 817.87109375, 830.078125, 842.28515625, 854.4921875, 866.69921875, 878.90625, 891.11328125, 903.3203125, 915.52734375, 927.734375, 939.94140625, 952.1484375, 964.35546875, 976.5625, 988.76953125, 1000.9765625, 1013.18359375, 1025.390625, 1037.59765625, 1049.8046875, 1062.01171875, 1074.21875, 1086.42578125, 1098.6328125, 1110.83984375, 1123.046875, 1135.25390625, 1147.4609375, 1159.66796875, 1171.875, 1184.08203125, 1196.2890625, 1208.49609375, 1220.703125, 1232.91015625, 1245.1171875, 1257.32421875, 1269.53125, 1281.73828125, 1293.9453125, 1306.15234375, 1318.359375, 1330.56640625, 1342.7734375, 1354.98046875, 1367.1875, 1379.39453125, 1391.6015625, 1403.80859375, 1416.015625, 1428.22265625, 1440.4296875, 1452.63671875, 1464.84375, 1477.05078125, 1489.2578125, 1501.46484375, 1513.671875, 1525.87890625, 1538.0859375, 1550.29296875, 1562.5, 1574.70703125, 1586.9140625, 1599.12109375, 1611.328125, 1623.53515625, 1635.7421875, 1647.94921875, 1660.15625, 1672.36328125, 1684.5703125, 1696.77734375, 1708.984375, 1721.19140625, 1733.3984375, 1745.60546875, 1757.8125, 1770.01953125, 1782.2265625, 1794.43359375, 1806.640625, 1818.84765625, 1831.0546875, 1843.26171875, 1855.46875, 1867.67578125, 1879.8828125, 1892.08984375, 1904.296875, 1916.50390625, 1928.7109375, 1940.91796875, 1953.125, 1965.33203125, 1977.5390625, 1989.74609375, 2001.953125, 2014.16015625, 2026.3671875, 2038.57421875, 2050.78125, 2062.98828125, 2075.1953125, 2087.40234375, 2099.609375, 2111.81640625, 2124.0234375, 2136.23046875, 2148.4375, 2160.64453125, 2172.8515625, 2185.05859375, 2197.265625, 2209.47265625, 2221.6796875, 2233.88671875, 2246.09375, 2258.30078125, 2270.5078125, 2282.71484375, 2294.921875, 2307.12890625, 2319.3359375, 2331.54296875, 2343.75, 2355.95703125, 2368.1640625, 2380.37109375, 2392.578125, 2404.78515625, 2416.9921875, 2429.19921875, 2441.40625, 2453.61328125, 2465.8203125, 2478.02734375, 2490.234375, 2502.44140625, 2514.6484375, 2526.85546875, 2539.0625, 2551.26953125, 2563.4765625, 2575.68359375, 2587.890625, 2600.09765625, 2612.3046875, 2624.51171875, 2636.71875, 2648.92578125, 2661.1328125, 2673.33984375, 2685.546875, 2697.75390625, 2709.9609375, 2722.16796875, 2734.375, 2746.58203125, 2758.7890625, 2770.99609375, 2783.203125, 2795.41015625, 2807.6171875, 2819.82421875, 2832.03125, 2844.23828125, 2856.4453125, 2868.65234375, 2880.859375, 2893.06640625, 2905.2734375, 2917.48046875, 2929.6875, 2941.89453125, 2954.1015625, 2966.30859375, 2978.515625, 2990.72265625, 3002.9296875, 3015.13671875, 3027.34375, 3039.55078125, 3051.7578125, 3063.96484375, 3076.171875, 3088.37890625, 3100.5859375, 3112.79296875, 3125.0, 3137.20703125, 3149.4140625, 3161.62109375, 3173.828125, 3186.03515625, 3198.2421875, 3210.44921875, 3222.65625, 3234.86328125, 3247.0703125, 3259.27734375, 3271.484375, 3283.69140625, 3295.8984375, 3308.10546875, 3320.3125, 3332.51953125, 3344.7265625, 3356.93359375, 3369.140625, 3381.34765625, 3393.5546875, 3405.76171875, 3417.96875, 3430.17578125, 3442.3828125, 3454.58984375, 3466.796875, 3479.00390625, 3491.2109375, 3503.41796875, 3515.625, 3527.83203125, 3540.0390625, 3552.24609375, 3564.453125, 3576.66015625, 3588.8671875, 3601.07421875, 3613.28125, 3625.48828125, 3637.6953125, 3649.90234375, 3662.109375, 3674.31640625, 3686.5234375, 3698.73046875, 3710.9375, 3723.14453125, 3735.3515625, 3747.55859375, 3759.765625, 3771.97265625, 3784.1796875, 3796.38671875, 3808.59375, 3820.80078125, 3833.0078125, 3845.21484375, 3857.421875, 3869.62890625, 3881.8359375, 3894.04296875, 3906.25, 3918.45703125, 3930.6640625, 3942.87109375, 3955.078125, 3967.28515625, 3979.4921875, 3991.69921875, 4003.90625, 4016.11328125, 4028.3203125, 4040.52734375, 4052.734375, 4064.94140625, 4077.1484375, 4089.35546875, 4101.5625, 4113.76953125, 4125.9765625, 4138.18359375, 4150.390625, 4162.59765625, 4174.8046875, 4187.01171875, 4199.21875, 4211.42578125, 4223.6328125, 4235.83984375, 4248.046875, 4260.25390625, 4272.4609375, 4284.66796875, 4296.875, 4309.08203125, 4321.2890625, 4333.49609375, 4345.703125, 4357.91015625, 4370.1171875, 4382.32421875, 4394.53125, 4406.73828125, 4418.9453125, 4431.15234375, 4443.359375, 4455.56640625, 4467.7734375, 4479.98046875, 4492.1875, 4504.39453125, 4516.6015625, 4528.80859375, 4541.015625, 4553.22265625, 4565.4296875, 4577.63671875, 4589.84375, 4602.05078125, 4614.2578125, 4626.46484375, 4638.671875, 4650.87890625, 4663.0859375, 4675.29296875, 4687.5, 4699.70703125, 4711.9140625, 4724.12109375, 4736.328125, 4748.53515625, 4760.7421875, 4772.94921875, 4785.15625, 4797.36328125, 4809.5703125, 4821.77734375, 4833.984375, 4846.19140625, 4858.3984375, 4870.60546875, 4882.8125, 4895.01953125, 4907.2265625, 4919.43359375, 4931.640625, 4943.84765625, 4956.0546875, 4968.26171875, 4980.46875, 4992.67578125, 5004.8828125, 5126.953125, 5249.0234375, 5371.09375, 5493.1640625, 5615.234375, 5737.3046875, 5859.375, 5981.4453125, 6103.515625, 6225.5859375, 6347.65625, 6469.7265625, 6591.796875, 6713.8671875, 6835.9375, 6958.0078125, 7080.078125, 7202.1484375, 7324.21875, 7446.2890625, 7568.359375, 7690.4296875, 7812.5, 7934.5703125, 8056.640625, 8178.7109375, 8300.78125, 8422.8515625, 8544.921875, 8666.9921875, 8789.0625, 8911.1328125, 9033.203125, 9155.2734375, 9277.34375, 9399.4140625, 9521.484375, 9643.5546875, 9765.625, 9887.6953125, 10009.765625, 10131.8359375, 10253.90625, 10375.9765625, 10498.046875, 10620.1171875, 10742.1875, 10864.2578125, 10986.328125, 11108.3984375, 11230.46875, 11352.5390625, 11474.609375, 11596.6796875, 11718.75, 11840.8203125, 11962.890625, 12084.9609375, 12207.03125, 12329.1015625, 12451.171875, 12573.2421875, 12695.3125, 12817.3828125, 12939.453125, 13061.5234375, 13183.59375, 13305.6640625, 13427.734375, 13549.8046875, 13671.875, 13793.9453125, 13916.015625, 14038.0859375, 14160.15625, 14282.2265625, 14404.296875, 14526.3671875, 14648.4375, 14770.5078125, 14892.578125, 15014.6484375, 15136.71875, 15258.7890625, 15380.859375, 15502.9296875, 15625.0, 15747.0703125, 15869.140625, 15991.2109375, 16113.28125, 16235.3515625, 16357.421875, 16479.4921875, 16601.5625, 16723.6328125, 16845.703125, 16967.7734375, 17089.84375, 17211.9140625, 17333.984375, 17456.0546875, 17578.125, 17700.1953125, 17822.265625, 17944.3359375, 18066.40625, 18188.4765625, 18310.546875, 18432.6171875, 18554.6875, 18676.7578125, 18798.828125, 18920.8984375, 19042.96875, 19165.0390625, 19287.109375, 19409.1796875, 19531.25, 19653.3203125, 19775.390625, 19897.4609375, 20019.53125, 20141.6015625, 20263.671875, 20385.7421875, 20507.8125, 20629.8828125, 20751.953125, 20874.0234375, 20996.09375, 21118.1640625, 21240.234375, 21362.3046875, 21484.375, 21606.4453125, 21728.515625, 21850.5859375, 21972.65625, 22094.7265625, 22216.796875, 22338.8671875, 22460.9375, 22583.0078125, 22705.078125, 22827.1484375, 22949.21875, 23071.2890625, 23193.359375, 23315.4296875, 23437.5, 23559.5703125, 23681.640625, 23803.7109375, 23925.78125, 24047.8515625, 24169.921875, 24291.9921875, 24414.0625, 24536.1328125, 24658.203125, 24780.2734375, 24902.34375, 25024.4140625, 25146.484375, 25268.5546875, 25390.625, 25512.6953125, 25634.765625, 25756.8359375, 25878.90625, 26000.9765625, 26123.046875, 26245.1171875, 26367.1875, 26489.2578125, 26611.328125, 26733.3984375, 26855.46875, 26977.5390625, 27099.609375, 27221.6796875, 27343.75, 27465.8203125, 27587.890625, 27709.9609375, 27832.03125, 27954.1015625, 28076.171875, 28198.2421875, 28320.3125, 28442.3828125, 28564.453125, 28686.5234375, 28808.59375, 28930.6640625, 29052.734375, 29174.8046875, 29296.875, 29418.9453125, 29541.015625, 29663.0859375, 29785.15625, 29907.2265625, 30029.296875, 30151.3671875, 30273.4375, 30395.5078125, 30517.578125, 30639.6484375, 30761.71875, 30883.7890625, 31005.859375, 31127.9296875, 31250.0, 31372.0703125, 31494.140625, 31616.2109375, 31738.28125, 31860.3515625, 31982.421875, 32104.4921875, 32226.5625, 32348.6328125, 32470.703125, 32592.7734375, 32714.84375, 32836.9140625, 32958.984375, 33081.0546875, 33203.125, 33325.1953125, 33447.265625, 33569.3359375, 33691.40625, 33813.4765625, 33935.546875, 34057.6171875, 34179.6875, 34301.7578125, 34423.828125, 34545.8984375, 34667.96875, 34790.0390625, 34912.109375, 35034.1796875, 35156.25, 35278.3203125, 35400.390625, 35522.4609375, 35644.53125, 35766.6015625, 35888.671875, 36010.7421875, 36132.8125, 36254.8828125, 36376.953125, 36499.0234375, 36621.09375, 36743.1640625, 36865.234375, 36987.3046875, 37109.375, 37231.4453125, 37353.515625, 37475.5859375, 37597.65625, 37719.7265625, 37841.796875, 37963.8671875, 38085.9375, 38208.0078125, 38330.078125, 38452.1484375, 38574.21875, 38696.2890625, 38818.359375, 38940.4296875, 39062.5, 39184.5703125, 39306.640625, 39428.7109375, 39550.78125, 39672.8515625, 39794.921875, 39916.9921875, 40039.0625, 40161.1328125, 40283.203125, 40405.2734375, 40527.34375, 40649.4140625, 40771.484375, 40893.5546875, 41015.625, 41137.6953125, 41259.765625, 41381.8359375, 41503.90625, 41625.9765625, 41748.046875, 41870.1171875, 41992.1875, 42114.2578125, 42236.328125, 42358.3984375, 42480.46875, 42602.5390625, 42724.609375, 42846.6796875, 42968.75, 43090.8203125, 43212.890625, 43334.9609375, 43457.03125, 43579.1015625, 43701.171875, 43823.2421875, 43945.3125, 44067.3828125, 44189.453125, 44311.5234375, 44433.59375, 44555.6640625, 44677.734375, 44799.8046875, 44921.875, 45043.9453125, 45166.015625, 45288.0859375, 45410.15625, 45532.2265625, 45654.296875, 45776.3671875, 45898.4375, 46020.5078125, 46142.578125, 46264.6484375, 46386.71875, 46508.7890625, 46630.859375, 46752.9296875, 46875.0, 46997.0703125, 47119.140625, 47241.2109375, 47363.28125, 47485.3515625, 47607.421875, 47729.4921875, 47851.5625, 47973.6328125, 48095.703125, 48217.7734375, 48339.84375, 48461.9140625, 48583.984375, 48706.0546875, 48828.125, 48950.1953125, 49072.265625, 49194.3359375, 49316.40625, 49438.4765625, 49560.546875, 49682.6171875, 49804.6875, 49926.7578125, 50048.828125, 51269.53125, 52490.234375, 53710.9375, 54931.640625, 56152.34375, 57373.046875, 58593.75, 59814.453125, 61035.15625, 62255.859375, 63476.5625, 64697.265625, 65917.96875, 67138.671875, 68359.375, 69580.078125, 70800.78125, 72021.484375, 73242.1875, 74462.890625, 75683.59375, 76904.296875, 78125.0, 79345.703125, 80566.40625, 81787.109375, 83007.8125, 84228.515625, 85449.21875, 86669.921875, 87890.625, 89111.328125, 90332.03125, 91552.734375, 92773.4375, 93994.140625, 95214.84375, 96435.546875, 97656.25, 98876.953125, 100097.65625, 101318.359375, 102539.0625, 103759.765625, 104980.46875, 106201.171875, 107421.875, 108642.578125, 109863.28125, 111083.984375, 112304.6875, 113525.390625, 114746.09375, 115966.796875, 117187.5, 118408.203125, 119628.90625, 120849.609375, 122070.3125, 123291.015625, 124511.71875, 125732.421875, 126953.125, 128173.828125, 129394.53125, 130615.234375, 131835.9375, 133056.640625, 134277.34375, 135498.046875, 136718.75, 137939.453125, 139160.15625, 140380.859375, 141601.5625, 142822.265625, 144042.96875, 145263.671875, 146484.375, 147705.078125, 148925.78125, 150146.484375, 151367.1875, 152587.890625, 153808.59375, 155029.296875, 156250.0, 157470.703125, 158691.40625, 159912.109375, 161132.8125, 162353.515625, 163574.21875, 164794.921875, 166015.625, 167236.328125, 168457.03125, 169677.734375, 170898.4375, 172119.140625, 173339.84375, 174560.546875, 175781.25, 177001.953125, 178222.65625, 179443.359375, 180664.0625, 181884.765625, 183105.46875, 184326.171875, 185546.875, 186767.578125, 187988.28125, 189208.984375, 190429.6875, 191650.390625, 192871.09375, 194091.796875, 195312.5, 196533.203125, 197753.90625, 198974.609375, 200195.3125, 201416.015625, 202636.71875, 203857.421875, 205078.125, 206298.828125, 207519.53125, 208740.234375, 209960.9375, 211181.640625, 212402.34375, 213623.046875, 214843.75, 216064.453125, 217285.15625, 218505.859375, 219726.5625, 220947.265625, 222167.96875, 223388.671875, 224609.375, 225830.078125, 227050.78125, 228271.484375, 229492.1875, 230712.890625, 231933.59375, 233154.296875, 234375.0, 235595.703125, 236816.40625, 238037.109375, 239257.8125, 240478.515625, 241699.21875, 242919.921875, 244140.625, 245361.328125, 246582.03125, 247802.734375, 249023.4375, 250244.140625, 251464.84375, 252685.546875, 253906.25, 255126.953125, 256347.65625, 257568.359375, 258789.0625, 260009.765625, 261230.46875, 262451.1875, 263671.875, 264892.5625, 266113.28125, 267334.0, 268554.6875, 269775.375, 270996.09375, 272216.8125, 273437.5, 274658.1875, 275878.90625, 277099.625, 278320.3125, 279541.0, 280761.71875, 281982.4375, 283203.125, 284423.8125, 285644.53125, 286865.25, 288085.9375, 289306.625, 290527.34375, 291748.0625, 292968.75, 294189.4375, 295410.15625, 296630.875, 297851.5625, 299072.25, 300292.96875, 301513.6875, 302734.375, 303955.0625, 305175.78125, 306396.5, 307617.1875, 308837.875, 310058.59375, 311279.3125, 312500.0, 313720.6875, 314941.40625, 316162.125, 317382.8125, 318603.5, 319824.21875, 321044.9375, 322265.625, 323486.3125, 324707.03125, 325927.75, 327148.4375, 328369.125, 329589.84375, 330810.5625, 332031.25, 333251.9375, 334472.65625, 335693.375, 336914.0625, 338134.75, 339355.46875, 340576.1875, 341796.875, 343017.5625, 344238.28125, 345459.0, 346679.6875, 347900.375, 349121.09375, 350341.8125, 351562.5, 352783.1875, 354003.90625, 355224.625, 356445.3125, 357666.0, 358886.71875, 360107.4375, 361328.125, 362548.8125, 363769.53125, 364990.25, 366210.9375, 367431.625, 368652.34375, 369873.0625, 371093.75, 372314.4375, 373535.15625, 374755.875, 375976.5625, 377197.25, 378417.96875, 379638.6875, 380859.375, 382080.0625, 383300.78125, 384521.5, 385742.1875, 386962.875, 388183.59375, 389404.3125, 390625.0, 391845.6875, 393066.40625, 394287.125, 395507.8125, 396728.5, 397949.21875, 399169.9375, 400390.625, 401611.3125, 402832.03125, 404052.75, 405273.4375, 406494.125, 407714.84375, 408935.5625, 410156.25, 411376.9375, 412597.65625, 413818.375, 415039.0625, 416259.75, 417480.46875, 418701.1875, 419921.875, 421142.5625, 422363.28125, 423584.0, 424804.6875, 426025.375, 427246.09375, 428466.8125, 429687.5, 430908.1875, 432128.90625, 433349.625, 434570.3125, 435791.0, 437011.71875, 438232.4375, 439453.125, 440673.8125, 441894.53125, 443115.25, 444335.9375, 445556.625, 446777.34375, 447998.0625, 449218.75, 450439.4375, 451660.15625, 452880.875, 454101.5625, 455322.25, 456542.96875, 457763.6875, 458984.375, 460205.0625, 461425.78125, 462646.5, 463867.1875, 465087.875, 466308.59375, 467529.3125, 468750.0, 469970.6875, 471191.40625, 472412.125, 473632.8125, 474853.5, 476074.21875, 477294.9375, 478515.625, 479736.3125, 480957.03125, 482177.75, 483398.4375, 484619.125, 485839.84375, 487060.5625, 488281.25, 489501.9375, 490722.65625, 491943.375, 493164.0625, 494384.75, 495605.46875, 496826.1875, 498046.875, 499267.5625, 500488.28125, 512695.3125, 524902.375, 537109.375, 549316.375, 561523.4375, 573730.5, 585937.5, 598144.5, 610351.5625, 622558.625, 634765.625, 646972.625, 659179.6875, 671386.75, 683593.75, 695800.75, 708007.8125, 720214.875, 732421.875, 744628.875, 756835.9375, 769043.0, 781250.0, 793457.0, 805664.0625, 817871.125, 830078.125, 842285.125, 854492.1875, 866699.25, 878906.25, 891113.25, 903320.3125, 915527.375, 927734.375, 939941.375, 952148.4375, 964355.5, 976562.5, 988769.5]
@@ -26,6 +20,12 @@ class Pna20Mock(Pna20):
             answer = '1000000000'
         elif question == 'MEAS:SUPP1:CURR?':
             answer = '0.002'
-        print(f'{self._name} query: {question}\n> {answer}')
         return answer
 
+
+class Pna20Mock(Pna20):
+
+    idn = 'AnaPico, PNA20 mock, sn, firmware'
+
+    def __init__(self, idn: str, inst=None, **timing):
+        super().__init__(idn, inst if inst is not None else Pna20Session(**timing))
@@ -0,0 +1,113 @@
+import threading
+
+import numpy as np
+
+
+class SweepRingBuffer:
+    """
+    Preallocated ring of timestamped sweep frames, the oldest unread frame is overwritten
+    when the consumer falls behind. One producer thread, any number of consumer threads.
+
+        buffer = SweepRingBuffer(capacity=64, points=201)
+        threading.Thread(target=vna.stream_sweeps, args=(buffer, 1, 'CH1_S21')).start()
+        for seq, timestamp, frame in buffer:
+            ...
+
+    A producer failure passed to close(error) is raised to the consumers once the buffer is drained.
+    """
+    def __init__(self, capacity: int, points: int, dtype=np.float64):
+        self._frames = np.zeros((capacity, points), dtype=dtype)
+        self._stamps = np.zeros(capacity, dtype=np.float64)
+        self._capacity = capacity
+        self._written = 0
+        self._read = 0
+        self._dropped = 0
+        self._closed = False
+        self._error = None
+        self._cond = threading.Condition()
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            if item is None:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield item
+
+    def put(self, values, timestamp: float):
+        with self._cond:
+            if self._written - self._read >= self._capacity:
+                self._read += 1
+                self._dropped += 1
+            slot = self._written % self._capacity
+            self._frames[slot] = values
+            self._stamps[slot] = timestamp
+            self._written += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None, out=None):
+        """
+        Take the oldest unread frame, wait for one if the buffer is empty.
+        :param out: array to copy the frame into, a new array is allocated if not given
+        :return: (sequence number, timestamp, frame) or None when closed and drained or on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._written > self._read or self._closed, timeout):
+                return None
+            if self._written == self._read:
+                return None
+            seq = self._read
+            slot = seq % self._capacity
+            if out is None:
+                out = self._frames[slot].copy()
+            else:
+                out[...] = self._frames[slot]
+            self._read += 1
+            return seq, self._stamps[slot], out
+
+    def latest(self):
+        """
+        Newest frame regardless of the read position, doesn't consume anything.
+        :return: (sequence number, timestamp, frame) or None if nothing was written yet
+        """
+        with self._cond:
+            if not self._written:
+                return None
+            slot = (self._written - 1) % self._capacity
+            return self._written - 1, self._stamps[slot], self._frames[slot].copy()
+
+    def close(self, error=None):
+        """
+        :param error: exception that ended the acquisition, the first one given is kept
+        """
+        with self._cond:
+            if self._error is None:
+                self._error = error
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def pending(self):
+        with self._cond:
+            return self._written - self._read
+
+    @property
+    def written(self):
+        return self._written
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def error(self):
+        return self._error
@@ -0,0 +1,17 @@
+import numpy as np
+
+
+def running_median(values, window):
+    """
+    Median of every point's neighbourhood, the ends padded with the edge values, so the result has
+    the length of values. An even window is narrowed by one point, a window longer than values is cut to it.
+    """
+    values = np.asarray(values, dtype=float)
+    window = min(window, len(values))
+    if not window % 2:
+        window -= 1
+    if window < 1:
+        return values.copy()
+    half = window // 2
+    padded = np.pad(values, half, mode='edge')
+    return np.median(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class RunningStats:
+    """
+    Count, min, max, mean and standard deviation of a stream, updated with whole batches of values
+    (pairwise merge of Chan et al., no per value Python loop and no stored history).
+    """
+    __slots__ = ('count', 'mean', 'min', 'max', '_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._m2 = 0.0
+
+    def __str__(self):
+        return (f'<{self.__class__.__name__}>(count={self.count}, mean={self.mean:g}, std={self.std:g}, '
+                f'min={self.min:g}, max={self.max:g})')
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        n = values.size
+        if not n:
+            return self
+        mean = values.mean()
+        m2 = np.square(values - mean).sum()
+
+        total = self.count + n
+        delta = mean - self.mean
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        return self
+
+    @property
+    def variance(self):
+        """
+        Sample variance, nan for less than two values.
+        """
+        return self._m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def as_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'std': self.std, 'min': self.min, 'max': self.max}
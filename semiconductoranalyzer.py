@@ -1,10 +1,75 @@
+import numpy as np
+
+from instr import sessionpool
+from instr.batching import Batch, max_command_length
+from instr.instrumentation import timed_write, timed_query, timed_query_bytes
+
+# FMT 3 output: one 4-byte big endian word per data item
+#   bit 31      source - 0 measured data, 1 source output data
+#   bits 30..26 range code, full scale of the count below
+#   bits 25..9  count, signed, value = count * full scale / 50000
+#   bits 8..6   status
+#   bits 5..3   channel number
+#   bits 2..0   kind of data
+KIND_VOLTAGE, KIND_CURRENT, KIND_TIME = 0, 1, 2
+FULL_SCALE_COUNT = 50000
+
+STATUS = {0: 'normal', 1: 'A/D overflow', 2: 'oscillation', 3: 'other channel in compliance',
+          4: 'this channel in compliance', 5: 'target value not found', 6: 'search stopped', 7: 'invalid data'}
+
+# range code -> full scale of voltage, V; current, A (FLEX RI codes 8 (1 pA) .. 20 (1 A)); time, s
+VOLTAGE_RANGES = {code: value for code, value in enumerate((0.5, 2.0, 5.0, 20.0, 40.0, 100.0, 200.0, 500.0,
+                                                            1500.0, 3000.0))}
+CURRENT_RANGES = {code: 10.0 ** (code - 20) for code in range(8, 21)}
+TIME_RANGES = {code: 10.0 ** (code - 3) for code in range(0, 8)}
+
+_full_scale = np.full((8, 32), np.nan)
+for _kind, _ranges in ((KIND_VOLTAGE, VOLTAGE_RANGES), (KIND_CURRENT, CURRENT_RANGES), (KIND_TIME, TIME_RANGES)):
+    _full_scale[_kind, list(_ranges)] = list(_ranges.values())
+
+ITEM_DTYPE = np.dtype([('source', bool), ('chan', 'u1'), ('kind', 'u1'), ('status', 'u1'), ('value', 'f8')])
+
+STAIRCASE_DTYPE = np.dtype([('voltage', 'f8'), ('current', 'f8'), ('status', 'u1'), ('time', 'f8')])
+
+
+def decode_fmt3(data: bytes):
+    """
+    Decode FMT 3 binary output, trailing terminator bytes are ignored.
+    :return: structured array of ITEM_DTYPE, one element per data item
+    """
+    words = np.frombuffer(data, dtype='>u4', count=len(data) // 4)
+    codes = (words >> 26) & 0x1f
+    counts = ((words >> 9) & 0x1ffff).astype(np.int32)
+    counts -= (counts & 0x10000) << 1
+    kinds = words & 0x7
+
+    items = np.empty(len(words), dtype=ITEM_DTYPE)
+    items['source'] = words >> 31
+    items['chan'] = (words >> 3) & 0x7
+    items['kind'] = kinds
+    items['status'] = (words >> 6) & 0x7
+    items['value'] = counts * _full_scale[kinds, codes] / FULL_SCALE_COUNT
+    return items
+
+
 class SemiconductorAnalyzer:
+    """
+    Keysight B1500A, FLEX command set.
+    """
     def __init__(self, address: str, idn: str, inst):
         self._address = address
         self._idn = idn
         self._name = idn.split(',')[1].strip()
         self._inst = inst
 
+        self._sweep_chan = None
+        self._sweep_steps = 0
+        self._measure_chans = tuple()
+        self._forced = dict()
+        # items per step besides the measured data, FMT mode and TSC
+        self._source_output = False
+        self._timestamp = False
+
     def __str__(self):
         return f'{self._name}'
 
@@ -12,16 +77,173 @@ class SemiconductorAnalyzer:
         return f'{self.__class__}(idn={self._idn})'
 
     def send(self, command):
-        print(f'{self._name}', self._inst.write(command))
+        return timed_write(self._name, self._inst, command)
 
     def query(self, question):
-        answer = self._inst.query(question)
-        print(f'{self._name} {answer}')
-        return answer
+        return timed_query(self._name, self._inst, question)
+
+    def query_bytes(self, question, count):
+        return timed_query_bytes(self._name, self._inst, question, count)
+
+    def batch(self, max_length=max_command_length):
+        # FLEX commands have no header path, they are joined as they are
+        return Batch(self, max_length, join=';'.join)
+
+    def close(self):
+        sessionpool.close(self._inst)
 
     def ping(self):
         print(self.query('*IDN?'))
 
+    def reset(self):
+        self._sweep_chan = None
+        self._sweep_steps = 0
+        self._measure_chans = tuple()
+        self._forced.clear()
+        self._source_output = False
+        self._timestamp = False
+        return self.send('*RST')
+
+    def enable(self, chans):
+        return self.send(f'CN {",".join(str(chan) for chan in chans)}')
+
+    def disable(self, chans=None):
+        """
+        Output switches off, all channels if chans not given.
+        """
+        self._forced.clear()
+        return self.send('CL' if chans is None else f'CL {",".join(str(chan) for chan in chans)}')
+
+    def set_format(self, fmt=3, mode=1):
+        """
+        :param fmt: 3 - 4-byte binary, see decode_fmt3(); 1, 5 - ASCII
+        :param mode: 0 - measured data only, 1 - with source output data of the sweep channel
+        """
+        if mode not in (0, 1):
+            raise ValueError(f'Unsupported output data mode: {mode}')
+        self._source_output = mode == 1
+        return self.send(f'FMT {fmt},{mode}')
+
+    def set_timestamp(self, state=1):
+        self._timestamp = bool(int(state))
+        return self.send(f'TSC {state}')
+
+    def set_integration(self, mode=1, factor=1):
+        """
+        High speed ADC integration: mode 0 - auto, 1 - manual (factor samples), 2 - power line cycles
+        """
+        return self.send(f'AIT 0,{mode},{factor}')
+
+    def measure_range(self, chan, code=0):
+        """
+        Current measurement range, FLEX RI code: 0 - auto, 8 (1 pA) .. 20 (1 A) - fixed
+        """
+        return self.send(f'RI {chan},{code}')
+
+    def force_voltage(self, chan, value, compliance, range_code=0):
+        """
+        Constant voltage, V, with current compliance, A
+        """
+        self._forced[chan] = (KIND_VOLTAGE, value)
+        return self.send(f'DV {chan},{range_code},{value},{compliance}')
+
+    def force_current(self, chan, value, compliance, range_code=0):
+        """
+        Constant current, A, with voltage compliance, V
+        """
+        self._forced[chan] = (KIND_CURRENT, value)
+        return self.send(f'DI {chan},{range_code},{value},{compliance}')
+
+    def staircase_source(self, chan, start, stop, steps, compliance, source='VOLTage', mode=1, range_code=0,
+                         power_compliance=None):
+        """
+        Sweep source: WV (voltage, current compliance) or WI (current, voltage compliance).
+        :param mode: 1 - linear single, 2 - log single, 3 - linear double, 4 - log double
+        """
+        command = 'WV' if source.upper().startswith('VOLT') else 'WI'
+        power = '' if power_compliance is None else f',{power_compliance}'
+        self._sweep_chan = chan
+        self._sweep_steps = steps * (2 if mode in (3, 4) else 1)
+        self._forced.pop(chan, None)
+        return self.send(f'{command} {chan},{mode},{range_code},{start},{stop},{steps},{compliance}{power}')
+
+    def sweep_timing(self, hold=0.0, delay=0.0):
+        """
+        Hold time before the first step and delay before each measurement, s
+        """
+        return self.send(f'WT {hold},{delay}')
+
+    def sweep_abort(self, state=2):
+        """
+        2 - stop the sweep on compliance, oscillation or overflow
+        """
+        return self.send(f'WM {state}')
+
+    def measurement_mode(self, mode, chans):
+        """
+        :param mode: 1 - spot, 2 - staircase sweep, ...
+        :param chans: channels measured at each step
+        """
+        self._measure_chans = tuple(chans)
+        return self.send(f'MM {mode},{",".join(str(chan) for chan in chans)}')
+
+    def configure_staircase(self, chan, start, stop, steps, compliance, measure_chans=None, bias=None,
+                            source='VOLTage', hold=0.0, delay=0.0):
+        """
+        Staircase sweep of chan with the other channels held at constant voltages, in one message.
+        :param bias: {chan: (voltage, V; current compliance, A)}
+        :param measure_chans: channels measured at each step, chan and the bias channels by default
+        """
+        bias = bias or dict()
+        measure_chans = measure_chans or (chan, *bias)
+        with self.batch():
+            self.enable(sorted({chan, *bias, *measure_chans}))
+            self.set_format(3, 1)
+            self.set_timestamp(1)
+            for bias_chan, (value, bias_compliance) in bias.items():
+                self.force_voltage(bias_chan, value, bias_compliance)
+            self.staircase_source(chan, start, stop, steps, compliance, source)
+            self.sweep_timing(hold, delay)
+            self.measurement_mode(2, measure_chans)
+
+    def measure_staircase(self):
+        """
+        Run the sweep set up by configure_staircase() and decode the whole answer at once.
+        The answer is read as the number of words the setup produces, a sweep stopped by WM still
+        sends dummy data for the remaining steps; any word may hold the terminator byte.
+        Voltage of a measured channel is the sweep output for the sweep channel, the forced
+        value for a bias channel.
+        :return: {chan: structured array of STAIRCASE_DTYPE, one element per step}
+        """
+        per_step = len(self._measure_chans) * (2 if self._timestamp else 1) + int(self._source_output)
+        items = decode_fmt3(self.query_bytes('XE', 4 * self._sweep_steps * per_step))
+        measured = items[~items['source']]
+        steps = np.count_nonzero(measured['kind'] != KIND_TIME) // max(len(self._measure_chans), 1)
+
+        sweep = items[items['source']][:steps]
+        results = dict()
+        for chan in self._measure_chans:
+            result = np.zeros(steps, dtype=STAIRCASE_DTYPE)
+            for field in ('voltage', 'current', 'time'):
+                result[field] = np.nan
+            own = measured[measured['chan'] == chan]
+            for kind, field in ((KIND_VOLTAGE, 'voltage'), (KIND_CURRENT, 'current')):
+                data = own[own['kind'] == kind]
+                if len(data):
+                    result[field][:len(data)] = data['value']
+                    result['status'][:len(data)] |= data['status']
+            times = own[own['kind'] == KIND_TIME]['value']
+            result['time'][:len(times)] = times
+
+            if chan == self._sweep_chan and len(sweep):
+                field = 'voltage' if sweep['kind'][0] == KIND_VOLTAGE else 'current'
+                result[field][:len(sweep)] = sweep['value']
+            elif chan in self._forced:
+                kind, value = self._forced[chan]
+                result['voltage' if kind == KIND_VOLTAGE else 'current'] = value
+            results[chan] = result
+        return results
+
     @property
     def name(self):
         return self._name
@@ -1,11 +1,166 @@
-class SemiconductorAnalyzerMock:
+import numpy as np
 
-    def __init__(self):
-        pass
+from instr.mocktransport import MockTransport
+THERMAL_VOLTAGE = 0.02585
 
-    def write(self, command):
-        return 'success'
+KIND_VOLTAGE, KIND_CURRENT, KIND_TIME = 0, 1, 2
 
-    def query(self, question):
-        answer = '42'
-        return answer
+# FMT 3 range codes and full scales written out here on their own, not taken from the driver,
+# so the mock round trip checks the decoder against a separate encoder
+_RANGES = {
+    KIND_VOLTAGE: [(0, 0.5), (1, 2.0), (2, 5.0), (3, 20.0), (4, 40.0), (5, 100.0), (6, 200.0), (7, 500.0),
+                   (8, 1500.0), (9, 3000.0)],
+    KIND_CURRENT: [(8, 1e-12), (9, 1e-11), (10, 1e-10), (11, 1e-9), (12, 1e-8), (13, 1e-7), (14, 1e-6),
+                   (15, 1e-5), (16, 1e-4), (17, 1e-3), (18, 1e-2), (19, 1e-1), (20, 1.0)],
+    KIND_TIME: [(0, 1e-3), (1, 1e-2), (2, 1e-1), (3, 1.0), (4, 10.0), (5, 100.0), (6, 1e3), (7, 1e4)],
+}
+
+
+def fmt3_word(value, kind, chan, status=0, source=False):
+    """
+    Pack one data item into a FMT 3 word with the smallest range that holds the value:
+    source 1 bit, range code 5 bits, count 17 bits (value = count * full scale / 50000),
+    status 3 bits, channel 3 bits, kind of data 3 bits.
+    """
+    code, full_scale = next(((code, full_scale) for code, full_scale in _RANGES[kind] if abs(value) <= full_scale),
+                            _RANGES[kind][-1])
+    count = min(max(round(value * 50000 / full_scale), -0x10000), 0xffff)
+    return ((int(source) << 31) | (code << 26) | ((count & 0x1ffff) << 9) | (int(status) << 6) | (int(chan) << 3) |
+            kind)
+
+
+def encode_fmt3(values, kinds, chans, status, source):
+    words = [fmt3_word(*item) for item in zip(values, kinds, chans, status, source)]
+    return np.array(words, dtype='>u4').tobytes()
+
+
+def diode_current(anode, saturation=1e-14, ideality=1.8):
+    return saturation * np.expm1(anode / (ideality * THERMAL_VOLTAGE))
+
+
+def mosfet_current(gate, drain, threshold=0.7, k=2e-3, modulation=0.05, subthreshold=1.5):
+    """
+    Square law n-channel MOSFET with channel length modulation and an exponential subthreshold tail,
+    source and bulk grounded.
+    """
+    overdrive = subthreshold * THERMAL_VOLTAGE * np.logaddexp(0, (gate - threshold) / (subthreshold * THERMAL_VOLTAGE))
+    drain = np.asarray(drain, dtype=float)
+    effective = np.minimum(drain, overdrive)
+    return k * (overdrive - effective / 2) * effective * (1 + modulation * drain)
+
+
+class SemiconductorAnalyzerMock(MockTransport):
+    """
+    FLEX staircase sweep of a device with grounded source: diode (anode on the first SMU)
+    or n-channel MOSFET (drain on the first SMU, gate on the second), answers XE in FMT 3.
+    """
+    def __init__(self, device='diode', terminals=None, noise=1e-3, seed=None, **timing):
+        super().__init__(**timing)
+        if device not in ['diode', 'mosfet']:
+            raise ValueError(f'Unknown device: {device}')
+        self.device = device
+        self.terminals = terminals or ({'anode': 1} if device == 'diode' else {'drain': 1, 'gate': 2})
+        self.noise = noise
+        self._random = np.random.default_rng(seed)
+        self._reset()
+
+    def _reset(self):
+        self._source_output = False
+        self._timestamp = False
+        self._forced = dict()
+        self._sweep = None
+        self._timing = (0.0, 0.0)
+        self._measure_chans = tuple()
+
+    def _voltages(self, chan, steps):
+        if self._sweep is not None and self._sweep[0] == chan:
+            return self._sweep[1]
+        return np.full(steps, self._forced.get(chan, (0.0, 1.0))[0])
+
+    def _compliance(self, chan):
+        if self._sweep is not None and self._sweep[0] == chan:
+            return self._sweep[2]
+        return self._forced.get(chan, (0.0, 1.0))[1]
+
+    def _currents(self, steps):
+        voltages = {name: self._voltages(chan, steps) for name, chan in self.terminals.items()}
+        if self.device == 'diode':
+            device = {'anode': diode_current(voltages['anode'])}
+        else:
+            device = {'drain': mosfet_current(voltages['gate'], voltages['drain']),
+                      'gate': np.zeros(steps)}
+        currents = dict()
+        for name, chan in self.terminals.items():
+            current = device[name] * (1 + self._random.normal(0, self.noise, steps))
+            current += self._random.normal(0, 1e-13, steps)
+            currents[chan] = current
+        return currents
+
+    def _measure(self):
+        if self._sweep is None:
+            return b''
+        chan, voltages, _ = self._sweep
+        steps = len(voltages)
+        currents = self._currents(steps)
+        hold, delay = self._timing
+
+        values, kinds, chans, status, source = list(), list(), list(), list(), list()
+        for index, measured in enumerate(self._measure_chans):
+            current = currents.get(measured, self._random.normal(0, 1e-13, steps))
+            compliance = self._compliance(measured)
+            limited = np.abs(current) >= compliance
+            current = np.clip(current, -compliance, compliance)
+            if self._timestamp:
+                values.append(hold + np.arange(1, steps + 1) * (delay + 0.002 * len(self._measure_chans)) +
+                              0.002 * index)
+                kinds.append(np.full(steps, KIND_TIME))
+                chans.append(np.full(steps, measured))
+                status.append(np.zeros(steps))
+                source.append(np.zeros(steps, dtype=bool))
+            values.append(current)
+            kinds.append(np.full(steps, KIND_CURRENT))
+            chans.append(np.full(steps, measured))
+            status.append(np.where(limited, 4, 0))
+            source.append(np.zeros(steps, dtype=bool))
+        if self._source_output:
+            values.append(voltages)
+            kinds.append(np.full(steps, KIND_VOLTAGE))
+            chans.append(np.full(steps, chan))
+            status.append(np.zeros(steps))
+            source.append(np.ones(steps, dtype=bool))
+
+        # items are sent step by step: time and data of each measured channel, then the sweep output
+        order = np.arange(steps * len(values)).reshape(len(values), steps).T.ravel()
+        return encode_fmt3(*(np.concatenate(field)[order] for field in (values, kinds, chans, status, source)))
+
+    def handle(self, command):
+        header, _, args = command.strip().partition(' ')
+        header = header.upper()
+        args = [arg.strip() for arg in args.split(',')] if args else list()
+        if header == '*RST' or (header == 'CL' and not args):
+            self._reset()
+        elif header == 'FMT':
+            self._source_output = len(args) > 1 and args[1] == '1'
+        elif header == 'TSC':
+            self._timestamp = args[0] == '1'
+        elif header == 'DV':
+            self._forced[int(args[0])] = (float(args[2]), float(args[3]))
+        elif header == 'WV':
+            chan, mode, _, start, stop, steps, compliance = args[:7]
+            start, stop, steps = float(start), float(stop), int(steps)
+            if mode in ('2', '4'):
+                voltages = np.geomspace(start, stop, steps)
+            else:
+                voltages = np.linspace(start, stop, steps)
+            if mode in ('3', '4'):
+                voltages = np.concatenate((voltages, voltages[::-1]))
+            self._sweep = (int(chan), voltages, float(compliance))
+        elif header == 'WT':
+            self._timing = (float(args[0]), float(args[1]))
+        elif header == 'MM':
+            self._measure_chans = tuple(int(arg) for arg in args[1:])
+        elif header == 'XE':
+            return self._measure()
+        elif '?' in header:
+            return '42'
+        return None
@@ -0,0 +1,107 @@
+import atexit
+import threading
+
+_lock = threading.Lock()
+_address_locks = dict()
+_rm = None
+_sessions = dict()
+_idns = dict()
+
+
+def resource_manager():
+    """
+    Process wide VISA resource manager, created on first use.
+    """
+    global _rm
+    with _lock:
+        if _rm is None:
+            # imported on first use, so drivers can share the pool bookkeeping with mock sessions without a VISA library
+            import visa
+            _rm = visa.ResourceManager()
+        return _rm
+
+
+def _address_lock(address):
+    with _lock:
+        return _address_locks.setdefault(address, threading.Lock())
+
+
+def open_resource(address: str, **kwargs):
+    """
+    Return an already open session for the address, open a new one if needed.
+    Sessions stay open between test runs until release() or interpreter exit.
+    Keyword arguments are passed to ResourceManager.open_resource() for new sessions.
+    Raw socket sessions (TCPIP::host::port::SOCKET) are '\n' terminated unless told otherwise,
+    binary responses must then be read by their block headers (binaryblock.read_blocks()), not read_raw().
+    """
+    if address.upper().endswith('::SOCKET'):
+        kwargs.setdefault('read_termination', '\n')
+        kwargs.setdefault('write_termination', '\n')
+    rm = resource_manager()
+    with _address_lock(address):
+        inst = _sessions.get(address)
+        if inst is None:
+            inst = rm.open_resource(address, **kwargs)
+            _sessions[address] = inst
+        return inst
+
+
+def identify(address: str):
+    """
+    Open (or reuse) a session and identify the instrument, *IDN? is asked once per session.
+    :return: (session, idn string)
+    """
+    inst = open_resource(address)
+    with _address_lock(address):
+        idn = _idns.get(address)
+        if idn is None:
+            idn = inst.query('*IDN?')
+            _idns[address] = idn
+        return inst, idn
+
+
+def is_pooled(address: str, inst=None):
+    with _lock:
+        return address in _sessions and (inst is None or _sessions[address] is inst)
+
+
+def release(address: str):
+    """
+    Close the pooled session, next open_resource() opens a fresh one.
+    Use after a VISA error has left the session in unknown state.
+    """
+    with _address_lock(address):
+        inst = _sessions.pop(address, None)
+        _idns.pop(address, None)
+    if inst is not None:
+        try:
+            inst.close()
+        except Exception as ex:
+            print(f'{address} close error: {ex}')
+
+
+def close(inst):
+    """
+    Close a driver's session: a pooled session is released from the pool, any other (a mock) is closed.
+    """
+    with _lock:
+        address = next((address for address, pooled in _sessions.items() if pooled is inst), None)
+    if address is None:
+        inst.close()
+    else:
+        release(address)
+
+
+def close_all():
+    global _rm
+    with _lock:
+        addresses = list(_sessions)
+    for address in addresses:
+        release(address)
+    with _lock:
+        if _rm is not None:
+            _rm.close()
+            _rm = None
+
+
+atexit.register(close_all)
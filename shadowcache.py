@@ -0,0 +1,93 @@
+def _short(node):
+    """
+    SCPI short form of a header node: 'PRESet', 'preset' and 'PRES2' -> 'PRES', 'FPRESet' -> 'FPR'
+    """
+    node = node.rstrip('0123456789')
+    if node.startswith('*') or len(node) <= 4:
+        return node
+    return node[:3] if node[3] in 'AEIOU' else node[:4]
+
+
+def header_nodes(command):
+    return tuple(_short(node) for node in command.strip(' :').split(' ', 1)[0].upper().split(':'))
+
+
+def header_key(command):
+    """
+    Header of a setting in one spelling: short form nodes with their numeric suffix, 1 if omitted,
+    'SOURce:FREQuency', ':SOUR1:FREQ' -> ('SOUR1', 'FREQ1'), 'CALC2:MARK' -> ('CALC2', 'MARK1')
+    """
+    key = list()
+    for node in command.strip(' :').split(' ', 1)[0].upper().split(':'):
+        name = node.rstrip('0123456789')
+        key.append(_short(name) + (node[len(name):] or ('' if name.startswith('*') else '1')))
+    return tuple(key)
+
+
+class ShadowCache:
+    """
+    Last written value of every settable parameter of an instrument.
+
+    Settings sent through send() are skipped when the instrument already has the same value,
+    every spelling of a header shares one entry (see header_key()).
+    The whole shadow is dropped when a reset, preset, local mode or state recall command is seen,
+    or when any command fails, since the instrument state is unknown after that.
+    Commands are matched on header prefixes in either form, so 'SYST:PRES' also covers
+    'SYSTem:PRESet:USER' and 'MMEM:LOAD' covers 'MMEMory:LOAD:STATe'.
+
+    :param invalidating: headers of the driver's own state changing commands, e.g. 'CONFigure'
+    """
+
+    invalidating_headers = ('*RST', '*RCL', 'SYSTem:PRESet', 'SYSTem:FPRESet', 'SYSTem:LOCal', 'MMEMory:LOAD')
+
+    def __init__(self, invalidating=()):
+        self._invalidating = {header_nodes(header) for header in (*self.invalidating_headers, *invalidating)}
+        self._values = dict()
+        self._written = 0
+        self._saved = 0
+        self._invalidated = 0
+
+    def __contains__(self, header):
+        return header_key(header) in self._values
+
+    def send(self, send, command):
+        """
+        Send the setting with send() unless its header already holds the same value.
+        :return: send() result or None if skipped
+        """
+        header, _, value = command.strip().partition(' ')
+        key = header_key(header)
+        if key in self._values and self._values[key] == value:
+            self._saved += 1
+            return None
+        ret = send(command)
+        self._values[key] = value
+        self._written += 1
+        return ret
+
+    def observe(self, command):
+        """
+        Called for every outgoing command, drops the shadow on state changing commands.
+        :return: True if the shadow was dropped
+        """
+        for part in command.split(';'):
+            nodes = header_nodes(part)
+            if any(nodes[:len(prefix)] == prefix for prefix in self._invalidating):
+                self.invalidate()
+                return True
+        return False
+
+    def invalidate(self, header=None):
+        if header is None:
+            if self._values:
+                self._invalidated += 1
+            self._values.clear()
+        else:
+            self._values.pop(header_key(header), None)
+
+    def get(self, header, default=None):
+        return self._values.get(header_key(header), default)
+
+    @property
+    def stats(self):
+        return {'written': self._written, 'saved': self._saved, 'invalidated': self._invalidated}
@@ -0,0 +1,192 @@
+"""
+SCPI over TCP simulator serving the instrument mocks on raw sockets, port 5025 style.
+
+    python -m instr.simulator E8362B N9030A:5030 --latency 0.002
+
+serves the E8362B mock on localhost:5025 and the N9030A mock on localhost:5030,
+drivers connect with TCPIP::localhost::5025::SOCKET addresses.
+Messages are '\\n' terminated, ';'-joined program messages are answered with one ';'-joined response,
+*IDN? is answered by the server.
+"""
+import argparse
+import socketserver
+import threading
+
+from instr.agilent34410amock import Agilent34410AMock
+from instr.agilente3644amock import AgilentE3644AMock
+from instr.agilente8362bmock import AgilentE8362BMock
+from instr.agilentn1914amock import AgilentN1914AMock
+from instr.agilentn5183amock import AgilentN5183AMock
+from instr.agilentn9030amock import AgilentN9030AMock
+from instr.mocktransport import FixedLatency, MockTimeoutError
+from instr.oscilloscopemock import OscilloscopeMock
+from instr.semiconductoranalyzermock import SemiconductorAnalyzerMock
+
+default_port = 5025
+
+# model: (mock class, *IDN? answer)
+models = {
+    'N5183A': (AgilentN5183AMock, 'Agilent Technologies,N5183A,SIM00001,A.01.00'),
+    'N9030A': (AgilentN9030AMock, 'Agilent Technologies,N9030A,SIM00002,A.01.00'),
+    '34410A': (Agilent34410AMock, 'Agilent Technologies,34410A,SIM00003,2.35-2.35-0.09-46-09'),
+    'E3648A': (AgilentE3644AMock, 'Agilent Technologies,E3648A,0,1.7-5.0-1.0'),
+    'E8362B': (AgilentE8362BMock, 'Agilent Technologies,E8362B,SIM00005,A.09.42.03'),
+    'N1914A': (AgilentN1914AMock, 'Agilent Technologies,N1914A,SIM00006,A1.01.00'),
+    'DSO-X 3034A': (OscilloscopeMock, 'AGILENT TECHNOLOGIES,DSO-X 3034A,SIM00007,02.35'),
+    'B1500A': (SemiconductorAnalyzerMock, 'Agilent Technologies,B1500A,SIM00008,A.05.03'),
+}
+
+
+def address(port=default_port, host='localhost'):
+    return f'TCPIP::{host}::{port}::SOCKET'
+
+
+def find_model(name: str):
+    """
+    Model lookup ignoring case and spaces: 'dsox3034a' -> 'DSO-X 3034A'
+    """
+    def key(model):
+        return model.replace(' ', '').replace('-', '').upper()
+    for model in models:
+        if key(model) == key(name):
+            return model
+    raise ValueError(f'Unknown model {name}, available: {", ".join(models)}')
+
+
+class SimulatedInstrument:
+    """
+    One mock behind a lock, shared by all connections to the port as a real instrument would be.
+    """
+    def __init__(self, model: str, latency=0.0, **timing):
+        mock_class, self.idn = models[model]
+        self.model = model
+        if latency:
+            timing['latency'] = FixedLatency(latency)
+        self._mock = mock_class(**timing)
+        self._lock = threading.Lock()
+
+    def handle(self, message: str):
+        """
+        :return: response bytes without terminator, None if the message has no queries
+        """
+        with self._lock:
+            if '*IDN?' in message.upper():
+                parts = [part.strip() for part in message.split(';') if part.strip()]
+                answers = [answer for answer in map(self._handle, parts) if answer is not None]
+                return b';'.join(answers) if answers else None
+            return self._handle(message)
+
+    def _handle(self, command: str):
+        if command.lstrip(':').upper() == '*IDN?':
+            return self.idn.encode()
+        self._mock.write(command)
+        if '?' not in command:
+            return None
+        try:
+            return self._mock.read_raw()[:-1]
+        except MockTimeoutError:
+            # no answer, the client times out as with a real instrument
+            return None
+
+
+class ScpiHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        instrument = self.server.instrument
+        for line in self.rfile:
+            message = line.decode('ascii', errors='replace').strip()
+            if not message:
+                continue
+            response = instrument.handle(message)
+            if response is not None:
+                self.wfile.write(response + b'\n')
+
+
+class ScpiServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, instrument: SimulatedInstrument, port=default_port, host='localhost'):
+        self.instrument = instrument
+        super().__init__((host, port), ScpiHandler)
+
+    @property
+    def address(self):
+        host, port = self.server_address[:2]
+        return address(port, host)
+
+
+class Simulator:
+    """
+    Several simulated instruments, one port each, served from background threads.
+
+        with Simulator({'E8362B': 5025, '34410A': 5026}) as sim:
+            na = AgilentE8362B.from_address_string(sim.address('E8362B'))
+    """
+    def __init__(self, ports: dict, host='localhost', latency=0.0, **timing):
+        """
+        :param latency: per message delay, s, or see mocktransport for the timing models passed as keywords
+        """
+        self._servers = {model: ScpiServer(SimulatedInstrument(find_model(model), latency, **timing), port, host)
+                         for model, port in ports.items()}
+        self._threads = list()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        for server in self._servers.values():
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def address(self, model):
+        return self._servers[model].address
+
+    @property
+    def addresses(self):
+        return {model: server.address for model, server in self._servers.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve instrument mocks as SCPI raw socket instruments.')
+    parser.add_argument('models', nargs='+', help=f'MODEL or MODEL:PORT, available: {", ".join(models)}')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=default_port, help='first port for models given without one')
+    parser.add_argument('--latency', type=float, default=0.0, help='added delay per message, s')
+    args = parser.parse_args(argv)
+
+    ports = dict()
+    next_port = args.port
+    for spec in args.models:
+        model, sep, port = spec.rpartition(':')
+        if not sep:
+            model, port = spec, next_port
+            next_port += 1
+        ports[model] = int(port)
+
+    sim = Simulator(ports, args.host, args.latency)
+    for model, addr in sim.addresses.items():
+        print(f'{model} at {addr}')
+    sim.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Vectorized analysis of spectrum analyzer traces: levels, dBm over frequency, Hz,
+as returned by AgilentN9030A.fetch_trace().
+"""
+import numpy as np
+
+from instr.runningmedian import running_median
+
+PEAK_DTYPE = [('index', 'i8'), ('freq', 'f8'), ('level', 'f8'), ('excess', 'f8')]
+
+# noise bandwidth of a gaussian RBW filter relative to its 3 dB bandwidth
+GAUSSIAN_NBW = 1.056
+
+
+def find_peaks(freqs, levels, threshold=None, excursion=6.0, window=51):
+    """
+    Local maxima standing above the running median of the trace by more than excursion,
+    a flat top counts as one peak at its first point.
+    :param threshold: lowest peak level, dBm
+    :param excursion: dB above the noise floor
+    :param window: running median width, points
+    :return: structured array of index, freq (Hz), level (dBm) and excess over the floor (dB), by frequency
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    excess = levels - running_median(levels, window)
+
+    padded = np.concatenate(([-np.inf], levels, [-np.inf]))
+    maxima = (padded[1:-1] > padded[:-2]) & (padded[1:-1] >= padded[2:])
+    maxima &= excess > excursion
+    if threshold is not None:
+        maxima &= levels > threshold
+    index = np.flatnonzero(maxima)
+
+    peaks = np.zeros(len(index), dtype=PEAK_DTYPE)
+    peaks['index'] = index
+    peaks['freq'] = freqs[index]
+    peaks['level'] = levels[index]
+    peaks['excess'] = excess[index]
+    return peaks
+
+
+def largest_peaks(freqs, levels, count=5, **kwargs):
+    """
+    count highest peaks of find_peaks(), by level
+    """
+    peaks = find_peaks(freqs, levels, **kwargs)
+    return peaks[np.argsort(peaks['level'])[::-1][:count]]
+
+
+def _level_near(freqs, levels, targets, tolerance):
+    """
+    Highest level and its frequency within target +- tolerance, nan outside of the trace.
+    """
+    low = np.searchsorted(freqs, targets - tolerance, side='left')
+    high = np.searchsorted(freqs, targets + tolerance, side='right')
+    found = np.full(len(targets), np.nan)
+    at = np.full(len(targets), np.nan)
+    for row, (start, stop) in enumerate(zip(low, high)):
+        if start < stop:
+            best = start + np.argmax(levels[start:stop])
+            found[row], at[row] = levels[best], freqs[best]
+    return at, found
+
+
+def harmonics(freqs, levels, fundamental=None, count=5, tolerance=None):
+    """
+    Levels at the harmonics of the fundamental, the highest peak of the trace by default.
+    :param tolerance: search range around each harmonic, Hz, two bins by default
+    :return: structured array of order, freq (Hz), level (dBm) and level relative to the fundamental (dBc),
+             nan for harmonics outside of the trace
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    if tolerance is None:
+        tolerance = 2 * (freqs[-1] - freqs[0]) / max(len(freqs) - 1, 1)
+    if fundamental is None:
+        fundamental = freqs[np.argmax(levels)]
+
+    orders = np.arange(1, count + 1)
+    at, found = _level_near(freqs, levels, orders * fundamental, tolerance)
+    table = np.zeros(count, dtype=[('order', 'i8'), ('freq', 'f8'), ('level', 'f8'), ('dbc', 'f8')])
+    table['order'] = orders
+    table['freq'] = at
+    table['level'] = found
+    table['dbc'] = found - found[0]
+    return table
+
+
+def spurs(freqs, levels, fundamental=None, count=10, tolerance=None, **kwargs):
+    """
+    Peaks other than the carrier and its harmonics.
+    :return: structured array of find_peaks() fields and level relative to the carrier (dBc), by level
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    if tolerance is None:
+        tolerance = 2 * (freqs[-1] - freqs[0]) / max(len(freqs) - 1, 1)
+    if fundamental is None:
+        fundamental = freqs[np.argmax(levels)]
+    carrier = _level_near(freqs, levels, np.array([fundamental]), tolerance)[1][0]
+
+    peaks = find_peaks(freqs, levels, **kwargs)
+    order = np.rint(peaks['freq'] / fundamental)
+    harmonic = (order >= 1) & (np.abs(peaks['freq'] - order * fundamental) <= tolerance)
+    peaks = peaks[~harmonic]
+    peaks = peaks[np.argsort(peaks['level'])[::-1][:count]]
+
+    table = np.zeros(len(peaks), dtype=PEAK_DTYPE + [('dbc', 'f8')])
+    for name, _ in PEAK_DTYPE:
+        table[name] = peaks[name]
+    table['dbc'] = peaks['level'] - carrier
+    return table
+
+
+def channel_power(freqs, levels, center, bandwidth, rbw, nbw=GAUSSIAN_NBW):
+    """
+    Power within center +- bandwidth / 2, each bin scaled from the RBW noise bandwidth to the bin width.
+    :param rbw: resolution bandwidth of the trace, Hz
+    :return: dBm
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    inside = np.abs(freqs - center) <= bandwidth / 2
+    if not np.any(inside):
+        raise ValueError(f'Channel {center:g} +- {bandwidth / 2:g} Hz is outside of the trace')
+    step = (freqs[-1] - freqs[0]) / max(len(freqs) - 1, 1)
+    power = np.sum(10 ** (levels[inside] / 10)) * step / (rbw * nbw)
+    return 10 * np.log10(power)
+
+
+def occupied_bandwidth(freqs, levels, percent=99.0, center=None, span=None):
+    """
+    Bandwidth holding percent of the power within center +- span / 2 (whole trace by default),
+    ends interpolated on the cumulative power.
+    :return: (bandwidth, lower edge, upper edge), Hz
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    if center is not None and span is not None:
+        inside = np.abs(freqs - center) <= span / 2
+        freqs, levels = freqs[inside], levels[inside]
+
+    cumulative = np.cumsum(10 ** (levels / 10))
+    cumulative /= cumulative[-1]
+    tail = (1 - percent / 100) / 2
+    low, high = np.interp([tail, 1 - tail], cumulative, freqs)
+    return high - low, low, high
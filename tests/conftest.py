@@ -0,0 +1,12 @@
+import importlib.util
+import os
+import sys
+
+# the repository root is the instr package
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if 'instr' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('instr', os.path.join(root, '__init__.py'),
+                                                  submodule_search_locations=[root])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['instr'] = module
+    spec.loader.exec_module(module)
@@ -0,0 +1,31 @@
+import pytest
+
+from instr.agilent34410a import Agilent34410A
+from instr.agilent34410amock import Agilent34410AMock
+
+
+def dmm():
+    return Agilent34410A('GPIB0::22::INSTR', '1,34410A mock,1', Agilent34410AMock())
+
+
+def test_stream_collects_all_readings():
+    meter = dmm()
+    meter.configure_stream(500, aperture=1e-4)
+    readings, stats = meter.stream(500, max_chunk=200, poll=0.005)
+    assert len(readings) == stats.count == 500
+
+
+def test_stream_aborts_on_timeout():
+    meter = dmm()
+    meter.configure_stream(1000, aperture=1e-2)
+    with pytest.raises(TimeoutError, match='of 1000 readings'):
+        meter.stream(1000, poll=0.005, timeout=0.05)
+    assert meter._inst._started is None
+
+
+def test_default_timeout_follows_the_integration_time():
+    meter = dmm()
+    meter.set_nplc(10)
+    assert meter._reading_time == pytest.approx(0.2)
+    meter.set_aperture(1e-3)
+    assert meter._reading_time == pytest.approx(1e-3)
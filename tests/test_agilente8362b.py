@@ -0,0 +1,203 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('visa')
+
+from instr.agilente8362b import AgilentE8362B, Measurement
+from instr.agilente8362bmock import AgilentE8362BMock
+
+
+class Recording(AgilentE8362BMock):
+    """
+    Mock keeping every program message as sent.
+    """
+    def __init__(self, **timing):
+        super().__init__(**timing)
+        self.messages = list()
+
+    def write(self, command):
+        self.messages.append(command)
+        return super().write(command)
+
+
+def analyzer(measurements=(('CH1_S11', 'S11'), ('CH1_S21', 'S21'), ('CH1_S22', 'S22'))):
+    session = Recording()
+    na = AgilentE8362B('GPIB0::16::INSTR', '1,E8362B mock,1', session)
+    for name, param in measurements:
+        na.ref_create_meas(Measurement(1, name, param))
+    session.messages.clear()
+    return na, session
+
+
+def mock_values(name, cycle=0):
+    return np.array(AgilentE8362BMock.data[name][cycle].split(','), dtype=float)
+
+
+def test_calc_all_data_ascii():
+    na, session = analyzer()
+    data = na.calc_all_data(1)
+
+    assert set(data) == {'freq', 'CH1_S11', 'CH1_S21', 'CH1_S22'}
+    np.testing.assert_array_equal(data['freq'], np.linspace(1.1e9, 1.5e9, 201))
+    for name in ('CH1_S11', 'CH1_S21', 'CH1_S22'):
+        np.testing.assert_array_equal(data[name], mock_values(name))
+
+    # axis settings in one query, all selects and data queries in one message
+    assert len(session.messages) == 2
+    assert session.messages[1].count('PARameter:SELect') == 3
+    assert session.messages[1].count('DATA? FDATA') == 3
+
+
+def test_calc_all_data_reuses_the_axis():
+    na, session = analyzer()
+    first = na.calc_all_data(1)
+    session.messages.clear()
+    second = na.calc_all_data(1)
+
+    assert len(session.messages) == 1
+    assert second['freq'] is first['freq']
+    np.testing.assert_array_equal(second['CH1_S21'], mock_values('CH1_S21', cycle=1))
+
+
+def test_calc_all_data_without_measurements():
+    na, session = analyzer(measurements=())
+    assert list(na.calc_all_data(1)) == ['freq']
+
+
+def test_calc_record_data_ascii():
+    na, _ = analyzer(measurements=())
+    meas = Measurement(1, 'CH1_S21', 'S21')
+    na.ref_create_meas(meas)
+    # the mock moves to the next sweep once S22 is read
+    na.ref_create_meas(Measurement(1, 'CH1_S22', 'S22'))
+    na.calc_record_data()
+    na.calc_record_data()
+    assert meas.sweeps == 2
+    np.testing.assert_array_equal(meas.sweep(1)[1], mock_values('CH1_S21', cycle=1))
+
+
+def test_calc_sparams_ascii_one_port():
+    na, session = analyzer(measurements=(('CH1_S11', 'S11'),))
+    freqs, sparams = na.calc_sparams(1)
+
+    assert sparams.shape == (201, 1, 1)
+    np.testing.assert_array_equal(freqs, np.linspace(1.1e9, 1.5e9, 201))
+    np.testing.assert_allclose(20 * np.log10(np.abs(sparams[:, 0, 0])), mock_values('CH1_S11'))
+    assert session.messages[-1].count('DATA? SDATA') == 1
+
+
+def test_calc_sparams_ascii_two_ports():
+    # reciprocal network, S12 is served from the S21 trace
+    na, session = analyzer(measurements=(('CH1_S11', 'S11'), ('CH1_S21', 'S21'), ('CH1_S21', 'S12'),
+                                         ('CH1_S22', 'S22')))
+    freqs, sparams = na.calc_sparams(1)
+
+    assert sparams.shape == (201, 2, 2)
+    np.testing.assert_array_equal(sparams[:, 0, 1], sparams[:, 1, 0])
+    np.testing.assert_allclose(20 * np.log10(np.abs(sparams[:, 1, 1])), mock_values('CH1_S22'))
+    np.testing.assert_array_equal(sparams.imag, 0)
+    assert session.messages[-1].count('DATA? SDATA') == 4
+
+
+def test_calc_sparams_missing_parameters():
+    na, _ = analyzer()
+    with pytest.raises(ValueError, match='misses measurements for S12'):
+        na.calc_sparams(1)
+    with pytest.raises(ValueError, match='No S-parameter measurements on channel 2'):
+        na.calc_sparams(2)
+
+
+def axis_queries(session):
+    return [m for m in session.messages if 'STARt?' in m or ':X?' in m]
+
+
+def test_freq_axis_cached():
+    na, session = analyzer()
+    axis = na.sense_freq_axis(1)
+    assert na.sense_freq_axis(1) is axis
+    assert len(axis_queries(session)) == 1
+
+
+def test_freq_axis_rebuilt_from_settings():
+    na, session = analyzer()
+    axis = na.sense_freq_axis(1)
+
+    # same value keeps the axis, a new one rebuilds it on the host without a query
+    na.sense_freq_start(1, 1.1, 'GHz')
+    assert na.sense_freq_axis(1) is axis
+    na.sense_freq_start(1, 1.2, 'GHz')
+    na.sense_freq_stop(1, 1400, 'MHz')
+    na.sense_sweep_points(1, 5)
+    np.testing.assert_allclose(na.sense_freq_axis(1), [1.2e9, 1.25e9, 1.3e9, 1.35e9, 1.4e9])
+    assert len(axis_queries(session)) == 1
+
+
+def test_freq_axis_unknown_setting_asks_again():
+    na, session = analyzer()
+    na.sense_freq_axis(1)
+    na.sense_freq_stop(1, 'MAX', '')
+    session.messages.clear()
+
+    na.sense_freq_axis(1)
+    assert session.messages == ['SENSe1:FREQuency:STOP?']
+
+
+def test_freq_axis_non_linear_sweep():
+    na, session = analyzer()
+    na.sense_freq_axis(1)
+    na.sense_sweep_type(1, 'SEGMent')
+    session.messages.clear()
+
+    axis = na.sense_freq_axis(1)
+    assert session.messages == ['SENSe1:X?']
+    np.testing.assert_array_equal(axis, np.array(AgilentE8362BMock.freqs.split(','), dtype=float))
+
+
+@pytest.mark.parametrize('invalidate', [
+    lambda na: na.reset(),
+    lambda na: na.calib_import_device_state('state.csa'),
+    lambda na: na.invalidate_freq_axis(1),
+    lambda na: na.invalidate_freq_axis(),
+])
+def test_freq_axis_invalidated(invalidate):
+    na, session = analyzer()
+    na.sense_freq_axis(1)
+    invalidate(na)
+    na.sense_freq_axis(1)
+    assert len(axis_queries(session)) == 2
+
+
+def test_freq_axis_per_channel():
+    na, session = analyzer()
+    na.sense_freq_axis(1)
+    na.sense_freq_axis(2)
+    na.invalidate_freq_axis(2)
+    na.sense_freq_axis(1)
+    assert len(axis_queries(session)) == 2
+
+
+def test_freq_axis_invalidated_by_cal_set():
+    from instr.agilente8362b import CalbrationSet
+
+    na, session = analyzer()
+    na.sense_freq_axis(1)
+    na.ref_load_cal_set(CalbrationSet(1, 'cal'))
+    na.sense_freq_axis(1)
+    assert len(axis_queries(session)) == 2
+
+
+def test_freq_axis_invalidated_by_failed_transfer():
+    na, session = analyzer()
+    na.sense_freq_axis(1)
+    na.sense_sweep_points(1, 201)
+    session.timeout = 1
+    with pytest.raises(TimeoutError):
+        na.query('SENSe1:SWEep:POINts')
+    session.timeout = None
+
+    na.sense_freq_axis(1)
+    assert len(axis_queries(session)) == 2
+    # the shadow is dropped as well, the same setting goes out again
+    session.messages.clear()
+    na.sense_sweep_points(1, 201)
+    assert session.messages == ['SENSe1:SWEep:POINts 201']
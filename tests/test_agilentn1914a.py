@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+import pytest
+
+from instr.agilentn1914a import AgilentN1914A
+from instr.agilentn1914amock import AgilentN1914AMock
+
+
+class Recording(AgilentN1914AMock):
+    """
+    Mock keeping every program message as sent.
+    """
+    def __init__(self, **timing):
+        super().__init__(**timing)
+        self.messages = list()
+
+    def write(self, command):
+        self.messages.append(command)
+        return super().write(command)
+
+
+def meter():
+    session = Recording()
+    return AgilentN1914A('GPIB0::13::INSTR', '1,N1914A mock,1', session), session
+
+
+@pytest.mark.parametrize('fmt', ['ASCii', 'REAL'])
+def test_acquire(fmt):
+    pm, session = meter()
+    pm.configure_buffered(50, chans=(1, 2), rate='FAST', fmt=fmt)
+    assert len(session.messages) == 1
+
+    session.messages.clear()
+    start = time.time()
+    timestamps, readings = pm.acquire(chans=(1, 2))
+
+    assert session.messages == ['INITiate1:IMMediate;:INITiate2:IMMediate;*OPC?;:FETCh1?;:FETCh2?']
+    assert readings.shape == (2, 50)
+    np.testing.assert_allclose(readings, -2, atol=0.1)
+    np.testing.assert_allclose(np.diff(timestamps), 1 / 400, rtol=1e-4)
+    assert timestamps[0] - start == pytest.approx(1 / 400, abs=0.05)
+
+
+def test_acquire_default_rate():
+    pm, _ = meter()
+    pm.set_trigger_count(1, 3)
+    timestamps, readings = pm.acquire()
+    assert readings.shape == (1, 3)
+    np.testing.assert_allclose(np.diff(timestamps), 1 / 20, rtol=1e-4)
+
+
+def test_acquire_rejects_mixed_rates():
+    pm, session = meter()
+    pm.set_measurement_rate(1, 'FAST')
+    pm.set_measurement_rate(2, 'DOUBle')
+    session.messages.clear()
+    with pytest.raises(ValueError, match='different measurement rates'):
+        pm.acquire(chans=(1, 2))
+    assert session.messages == []
+
+    pm.reset()
+    assert pm.acquire(chans=(1, 2))[1].shape == (2, 1)
+
+
+def test_unknown_measurement_rate():
+    pm, _ = meter()
+    with pytest.raises(ValueError, match='Unknown measurement rate: SLOW'):
+        pm.set_measurement_rate(1, 'SLOW')
+
+
+@pytest.mark.parametrize('setter, args', [
+    ('set_frequency', (1, 1, 'GHz')),
+    ('set_averaging', (1, 16)),
+    ('set_averaging', (1, None)),
+    ('set_measurement_rate', (1, 'FAST')),
+    ('set_continuous', (1, 'OFF')),
+    ('set_trigger_source', (1, 'BUS')),
+    ('set_trigger_count', (1, 10)),
+    ('set_unit', (1, 'W')),
+    ('set_data_format', ('REAL',)),
+])
+def test_setters_report_shadowed_writes(setter, args):
+    pm, _ = meter()
+    assert getattr(pm, setter)(*args) is not None
+    assert getattr(pm, setter)(*args) is None
+
+
+def test_read_pow():
+    pm, _ = meter()
+    assert pm.read_pow(1) == pytest.approx(-2, abs=0.1)
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from instr.agilente3644a import AgilentE3644A
+from instr.agilente3644amock import AgilentE3644AMock
+from instr.agilentn9030a import AgilentN9030A
+from instr.agilentn9030amock import AgilentN9030AMock
+from instr.asyncinstrument import AsyncInstrument
+from instr.batching import CoalescingSession
+from instr.mocktransport import FixedLatency
+
+LATENCY = 0.02
+
+
+def analyzer():
+    return AgilentN9030A('GPIB0::18::INSTR', '1,N9030A mock,1', AgilentN9030AMock(latency=FixedLatency(LATENCY)))
+
+
+def source():
+    return AgilentE3644A('GPIB0::5::INSTR', '1,E3648A mock,1', AgilentE3644AMock(latency=FixedLatency(LATENCY)))
+
+
+async def bench(sa, src):
+    return await asyncio.gather(sa.fetch_trace(), src.read_current(2), sa.fetch_trace(), src.read_current(1))
+
+
+def test_two_instruments_run_at_the_same_time():
+    start = time.perf_counter()
+    results = asyncio.run(bench(AsyncInstrument(analyzer()), AsyncInstrument(source())))
+    overlapped = time.perf_counter() - start
+
+    sa, src = analyzer(), source()
+    start = time.perf_counter()
+    sa.fetch_trace(), src.read_current(2), sa.fetch_trace(), src.read_current(1)
+    serial = time.perf_counter() - start
+
+    assert len(results[0][0]) == 1001
+    assert overlapped < 0.8 * serial
+
+
+def test_commands_to_one_instrument_keep_their_order():
+    async def steps(src):
+        await asyncio.gather(*(src.set_voltage(chan, 1.0, 'V') for chan in (1, 2, 1, 2)))
+        return await src.get('active_channel')
+
+    src = AsyncInstrument(source())
+    assert asyncio.run(steps(src)) == 2
+
+
+def test_io_properties_are_awaited_and_set_on_the_worker():
+    async def select(src):
+        await src.set('active_channel', 2)
+        return await src.active_channel
+
+    src = AsyncInstrument(source())
+    assert asyncio.run(select(src)) == 2
+    with pytest.raises(AttributeError):
+        src.active_channel = 1
+
+
+def test_batch_is_an_async_context_manager():
+    async def configure(src):
+        async with src.batch() as batched:
+            assert batched is src
+            assert isinstance(src.instrument._inst, CoalescingSession)
+            await src.set_voltage_limit(2, 5, 'V')
+            await src.set_voltage(2, 3.3, 'V')
+        return src.instrument._inst
+
+    src = AsyncInstrument(source())
+    session = asyncio.run(configure(src))
+    assert isinstance(session, AgilentE3644AMock)
+
+
+def test_close_closes_the_session():
+    async def use(sa):
+        async with sa:
+            await sa.fetch_trace()
+
+    sa = AsyncInstrument(analyzer())
+    asyncio.run(use(sa))
+    assert sa.instrument._inst.closed
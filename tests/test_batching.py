@@ -0,0 +1,60 @@
+import pytest
+
+from instr.batching import Batch, join_commands
+from instr.shadowcache import ShadowCache
+
+
+class FailingSession:
+    def __init__(self):
+        self.messages = list()
+        self.fail = False
+
+    def write(self, command):
+        if self.fail:
+            raise TimeoutError('write timed out')
+        self.messages.append(command)
+
+
+class Driver:
+    def __init__(self, inst):
+        self._inst = inst
+        self._shadow = ShadowCache()
+        self.axis_invalidated = 0
+
+    def send(self, command):
+        self._shadow.observe(command)
+        return self._inst.write(command)
+
+    def invalidate_freq_axis(self):
+        self.axis_invalidated += 1
+
+
+def test_join_commands():
+    assert join_commands(['SENS:FREQ 1GHz', 'POW -10', ':OUTP ON', '*WAI']) == 'SENS:FREQ 1GHz;:POW -10;:OUTP ON;*WAI'
+
+
+def test_batch_coalesces_writes():
+    session = FailingSession()
+    driver = Driver(session)
+    with Batch(driver):
+        driver.send('POW -10')
+        driver.send('OUTP ON')
+        assert session.messages == []
+    assert session.messages == ['POW -10;:OUTP ON']
+    assert driver._inst is session
+
+
+def test_failed_flush_drops_caches():
+    session = FailingSession()
+    driver = Driver(session)
+    session.fail = True
+    with pytest.raises(TimeoutError):
+        with Batch(driver):
+            driver._shadow.send(driver.send, 'POW -10')
+    assert 'POW' not in driver._shadow
+    assert driver.axis_invalidated == 1
+    assert driver._inst is session
+
+    session.fail = False
+    driver._shadow.send(driver.send, 'POW -10')
+    assert session.messages == ['POW -10']
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from instr.binaryblock import block_dtype, block_header, make_block, parse_block, parse_blocks, read_blocks
+from instr.instrumentation import timed_query_block
+from instr.mocktransport import MockTransport
+
+
+class BlockSession(MockTransport):
+    """
+    Answers every query with the given response, read_raw() stops at the first '\n' as a
+    session with the termination character enabled does.
+    """
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+    def handle(self, command):
+        return self.response if '?' in command else None
+
+    def read_raw(self):
+        data = super().read_raw()
+        return data[:data.index(b'\n') + 1]
+
+
+# 0x0A bytes inside the payload in both precisions
+values = np.array([1.0, np.frombuffer(b'\n' * 4, '>f4')[0], np.frombuffer(b'\n' * 8, '>f8')[0], -3.25, 10.0])
+
+
+@pytest.mark.parametrize('dtype', ['>f4', '<f4', '>f8', '<f8'])
+def test_make_parse_round_trip(dtype):
+    block = make_block(values, dtype)
+    decoded, end = parse_block(block, dtype)
+    np.testing.assert_array_equal(decoded, values.astype(dtype))
+    assert block[end:] == b'\n'
+
+
+def test_make_block_header():
+    assert make_block([1.0, 2.0], '>f8')[:4] == b'#216'
+    assert make_block([], '>f4') == b'#10\n'
+
+
+def test_block_header():
+    assert block_header(b'1;+2.0;#3120' + bytes(120)) == (12, 120)
+    with pytest.raises(ValueError):
+        block_header(b'#0' + bytes(8))
+    with pytest.raises(ValueError):
+        block_header(b'#x12')
+
+
+def test_parse_blocks():
+    data = make_block([1, 2, 3], '>f8', terminator=b';') + make_block([4, 5], '>f8')
+    first, second = parse_blocks(data, '>f8')
+    np.testing.assert_array_equal(first, [1, 2, 3])
+    np.testing.assert_array_equal(second, [4, 5])
+
+
+def test_block_dtype():
+    assert block_dtype('ASCii,0') is None
+    assert block_dtype('REAL,32') == np.dtype('>f4')
+    assert block_dtype('REAL,64', 'SWAPped') == np.dtype('<f8')
+    with pytest.raises(ValueError):
+        block_dtype('INT,16')
+
+
+def test_read_blocks_ignores_termination_in_payload():
+    block = make_block(values, '>f8', terminator=b'')
+    assert b'\n' in block
+    session = BlockSession(block)
+    session.write('DATA?')
+    data = read_blocks(session)
+    np.testing.assert_array_equal(parse_block(data, '>f8')[0], values)
+    assert data.endswith(b'\n')
+
+
+def test_read_blocks_with_ascii_fields():
+    response = b'+1.0E9;+2.0E9;' + make_block(values, '<f8', terminator=b';') + make_block(values[:2], '<f8',
+                                                                                            terminator=b'')
+    session = BlockSession(response)
+    session.write('START?;STOP?;DATA?;DATA?')
+    data = read_blocks(session, 2)
+    assert data.split(b';')[:2] == [b'+1.0E9', b'+2.0E9']
+    first, second = parse_blocks(data, '<f8')
+    np.testing.assert_array_equal(first, values)
+    np.testing.assert_array_equal(second, values[:2])
+
+
+def test_timed_query_block():
+    session = BlockSession(make_block(values, '>f4', terminator=b''))
+    data = timed_query_block('mock', session, 'DATA?')
+    np.testing.assert_array_equal(parse_block(data, '>f4')[0], values.astype('>f4'))
+
+
+@pytest.mark.parametrize('data_format', ['REAL,32', 'REAL,64'])
+@pytest.mark.parametrize('order', ['NORMal', 'SWAPped'])
+def test_e8362b_binary_matches_ascii(data_format, order):
+    pytest.importorskip('visa')
+    from instr.agilente8362b import AgilentE8362B, Measurement
+    from instr.agilente8362bmock import AgilentE8362BMock
+
+    def fetch(fmt, border='NORMal'):
+        na = AgilentE8362B('GPIB0::16::INSTR', '1,E8362B mock,1', AgilentE8362BMock())
+        for name, param in [('CH1_S11', 'S11'), ('CH1_S21', 'S21'), ('CH1_S22', 'S22')]:
+            na.ref_create_meas(Measurement(1, name, param))
+        na.format_border(border)
+        na.format(fmt)
+        return na.calc_all_data(1)
+
+    ascii_data = fetch('ASCII')
+    binary_data = fetch(data_format, order)
+    assert set(binary_data) == set(ascii_data)
+    for name, expected in ascii_data.items():
+        tolerance = 1e-6 if data_format == 'REAL,32' else 0
+        np.testing.assert_allclose(binary_data[name], expected, rtol=tolerance)
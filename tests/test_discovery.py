@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from instr import discovery, sessionpool
+
+IDNS = {
+    'GPIB0::16::INSTR': 'Agilent Technologies,E8362B,MY123,A.01',
+    'GPIB0::18::INSTR': 'Agilent Technologies,N9030A,MY456,A.02',
+}
+
+
+class Session:
+    def __init__(self, address, open_timeout=None):
+        self.address = address
+        self.open_timeout = open_timeout
+        self.timeout = 2000
+        self.timeouts = list()
+        self.closed = False
+
+    def query(self, question):
+        self.timeouts.append(self.timeout)
+        if self.address not in IDNS:
+            time.sleep(self.timeout / 1000)
+            raise TimeoutError(f'{self.address} timeout')
+        return IDNS[self.address]
+
+    def close(self):
+        self.closed = True
+
+
+class ResourceManager:
+    def __init__(self, resources):
+        self.resources = resources
+        self.opened = dict()
+
+    def list_resources(self):
+        return tuple(self.resources)
+
+    def open_resource(self, address, **kwargs):
+        self.opened[address] = Session(address, **kwargs)
+        return self.opened[address]
+
+
+@pytest.fixture
+def rm(monkeypatch):
+    rm = ResourceManager(list(IDNS) + [f'GPIB0::{address}::INSTR' for address in range(1, 7)])
+    monkeypatch.setattr(sessionpool, '_rm', rm)
+    monkeypatch.setattr(sessionpool, '_sessions', dict())
+    monkeypatch.setattr(sessionpool, '_idns', dict())
+    monkeypatch.setattr(discovery, '_found', dict())
+    return rm
+
+
+def test_probe_uses_the_short_timeout_and_restores_it(rm):
+    assert discovery.probe('GPIB0::16::INSTR', timeout=300) == IDNS['GPIB0::16::INSTR']
+    session = rm.opened['GPIB0::16::INSTR']
+    assert session.open_timeout == 300
+    assert session.timeouts == [300]
+    assert session.timeout == 2000
+
+    with pytest.raises(TimeoutError):
+        discovery.probe('GPIB0::1::INSTR', timeout=50)
+    assert rm.opened['GPIB0::1::INSTR'].timeout == 2000
+
+
+def test_dead_addresses_time_out_in_parallel(rm):
+    start = time.perf_counter()
+    found = discovery.discover(timeout=200)
+    elapsed = time.perf_counter() - start
+
+    assert found == {'E8362B': ('GPIB0::16::INSTR', IDNS['GPIB0::16::INSTR']),
+                     'N9030A': ('GPIB0::18::INSTR', IDNS['GPIB0::18::INSTR'])}
+    # six dead addresses probed one after another would take 1.2 s
+    assert elapsed < 0.6
+    assert all(rm.opened[f'GPIB0::{address}::INSTR'].closed for address in range(1, 7))
+    assert not sessionpool.is_pooled('GPIB0::1::INSTR')
+    assert sessionpool.is_pooled('GPIB0::16::INSTR')
+
+
+def test_result_is_shared_until_refresh(rm):
+    discovery.discover(timeout=10, resources=['GPIB0::16::INSTR'])
+    assert discovery.find_model('N9030A', timeout=10) is None
+    assert discovery.find_model(['N9030A', 'E8362B'])[0] == 'GPIB0::16::INSTR'
+    # substring of the IDN
+    assert discovery.find_model('MY123')[0] == 'GPIB0::16::INSTR'
+
+    discovery.forget('GPIB0::16::INSTR')
+    assert discovery.find_model('E8362B', timeout=10, resources=['GPIB0::18::INSTR']) is None
+    found = discovery.discover(timeout=10, resources=['GPIB0::18::INSTR'], refresh=True)
+    assert list(found) == ['N9030A']
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from instr.growablearray import GrowableArray
+
+
+def test_append_doubles_capacity():
+    array = GrowableArray(capacity=4)
+    capacities = list()
+    for value in range(9):
+        array.append(value)
+        capacities.append(array.capacity)
+    assert capacities == [4, 4, 4, 4, 8, 8, 8, 8, 16]
+    np.testing.assert_array_equal(array.view, np.arange(9))
+    assert len(array) == 9
+
+
+def test_extend_reserves_once():
+    array = GrowableArray(np.int32, capacity=2)
+    array.extend(np.arange(6).reshape(2, 3))
+    assert array.capacity == 8
+    assert array.dtype == np.int32
+    np.testing.assert_array_equal(array.view, np.arange(6))
+    array.extend([])
+    assert len(array) == 6
+
+
+def test_view_is_zero_copy():
+    array = GrowableArray(capacity=8)
+    array.extend([1.0, 2.0, 3.0])
+    view = array.view
+    assert np.shares_memory(view, array.view)
+    assert view.base is not None
+
+    view[0] = 10
+    assert array.view[0] == 10
+
+    # appends within capacity keep old views valid
+    array.append(4.0)
+    assert np.shares_memory(view, array.view)
+
+
+def test_view_detached_by_reallocation():
+    array = GrowableArray(capacity=2)
+    array.extend([1.0, 2.0])
+    view = array.view
+    array.append(3.0)
+    assert not np.shares_memory(view, array.view)
+    np.testing.assert_array_equal(view, [1.0, 2.0])
+    np.testing.assert_array_equal(array.view, [1.0, 2.0, 3.0])
+
+
+def test_clear_keeps_capacity():
+    array = GrowableArray(capacity=4)
+    array.extend(range(10))
+    array.clear()
+    assert len(array) == 0
+    assert array.capacity == 16
+    assert array.view.size == 0
+
+
+@pytest.mark.parametrize('size', [0, 3])
+def test_shrink(size):
+    array = GrowableArray(capacity=64)
+    array.extend(range(size))
+    array.shrink()
+    assert array.capacity == size
+    assert array.nbytes == size * 8
+    array.append(7)
+    np.testing.assert_array_equal(array.view, list(range(size)) + [7])
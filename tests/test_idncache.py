@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from instr import idncache, sessionpool
+
+
+class Session:
+    def __init__(self, idn):
+        self.idn = idn
+        self.written = list()
+
+    def write(self, command):
+        self.written.append(command)
+
+    def query(self, question):
+        return self.idn if question == '*IDN?' else '0'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    prev = idncache.cache_path
+    idncache.set_path(str(tmp_path / 'idn_cache.json'))
+    yield tmp_path / 'idn_cache.json'
+    idncache.set_path(prev)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """
+    sessionpool.identify() answers from the queue: a Session or an exception to raise.
+    """
+    answers, released = list(), list()
+
+    def identify(address):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer, answer.idn
+
+    monkeypatch.setattr(sessionpool, 'identify', identify)
+    monkeypatch.setattr(sessionpool, 'release', released.append)
+    return answers, released
+
+
+def test_store_and_lookup_use_the_configured_path(cache):
+    idncache.store('GPIB0::19::INSTR', 'Agilent Technologies,N5183A,MY123,A.01 ')
+    assert json.loads(cache.read_text())['GPIB0::19::INSTR']['model'] == 'N5183A'
+
+    idncache.set_path(str(cache))
+    entry = idncache.lookup('GPIB0::19::INSTR')
+    assert entry['idn'] == 'Agilent Technologies,N5183A,MY123,A.01'
+    idncache.invalidate('GPIB0::19::INSTR')
+    assert idncache.lookup('GPIB0::19::INSTR') is None
+
+
+def test_hit_identifies_on_first_use(cache, pool):
+    answers, released = pool
+    session = Session('Agilent Technologies,N5183A,MY123,A.01')
+    answers.append(session)
+
+    lazy = idncache.LazySession('GPIB0::19::INSTR', 'N5183A')
+    assert answers == [session]
+    lazy.write(':FREQ 1GHz')
+    lazy.write(':POW 0dBm')
+    assert session.written == [':FREQ 1GHz', ':POW 0dBm']
+    assert idncache.lookup('GPIB0::19::INSTR')['model'] == 'N5183A'
+    assert released == []
+
+
+def test_mismatch_is_refused_and_invalidated(cache, pool):
+    answers, _ = pool
+    idncache.store('GPIB0::19::INSTR', 'Agilent Technologies,N5183A,MY123,A.01')
+    session = Session('Agilent Technologies,E4438C,MY456,C.05')
+    answers.append(session)
+
+    lazy = idncache.LazySession('GPIB0::19::INSTR', 'N5183A')
+    with pytest.raises(RuntimeError, match='expected N5183A, found E4438C'):
+        lazy.write(':FREQ 1GHz')
+    assert session.written == []
+    assert idncache.lookup('GPIB0::19::INSTR') is None
+
+
+def test_silent_address_is_probed_again(cache, pool):
+    answers, released = pool
+    idncache.store('GPIB0::19::INSTR', 'Agilent Technologies,N5183A,MY123,A.01')
+    session = Session('Agilent Technologies,N5183A,MY123,A.02')
+    answers += [TimeoutError('no answer'), session]
+
+    lazy = idncache.LazySession('GPIB0::19::INSTR', 'N5183A')
+    lazy.write(':FREQ 1GHz')
+    assert released == ['GPIB0::19::INSTR']
+    assert session.written == [':FREQ 1GHz']
+    assert idncache.lookup('GPIB0::19::INSTR')['idn'].endswith('A.02')
+
+
+def test_failed_call_is_not_retried(cache, pool):
+    answers, _ = pool
+
+    class Failing(Session):
+        def write(self, command):
+            super().write(command)
+            raise TimeoutError('lost')
+
+    session = Failing('Agilent Technologies,N5183A,MY123,A.01')
+    answers.append(session)
+    with pytest.raises(TimeoutError):
+        idncache.LazySession('GPIB0::19::INSTR', 'N5183A').write(':FREQ 1GHz')
+    assert session.written == [':FREQ 1GHz']
+
+
+def test_factories_leave_the_cache_off_by_default():
+    pytest.importorskip('visa')
+    from instr import instrumentfactory
+    assert instrumentfactory.use_idn_cache is False
+
+
+def test_factory_hit_sends_nothing_until_used(cache, pool, monkeypatch):
+    pytest.importorskip('visa')
+    from instr import instrumentfactory
+    monkeypatch.setattr(instrumentfactory, 'mock_enabled', False)
+    monkeypatch.setattr(instrumentfactory, 'use_idn_cache', True)
+    answers, _ = pool
+    idncache.store('GPIB0::19::INSTR', 'Agilent Technologies,N5183A,MY123,A.01')
+
+    gen = instrumentfactory.GeneratorFactory('GPIB0::19::INSTR').from_address()
+    assert isinstance(gen._inst, idncache.LazySession)
+    session = Session('Agilent Technologies,N5183A,MY123,A.01')
+    answers.append(session)
+    gen.send(':OUTP ON')
+    assert session.written == [':OUTP ON']
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from instr import instrumentation
+from instr.agilente3644a import AgilentE3644A
+from instr.agilente3644amock import AgilentE3644AMock
+from instr.instrumentation import CommandMetrics, CommandStats, ConsoleHook, header
+
+
+@pytest.fixture
+def metrics():
+    metrics = CommandMetrics()
+    prev = instrumentation.set_hook(metrics)
+    yield metrics
+    instrumentation.set_hook(prev)
+
+
+def source():
+    return AgilentE3644A('GPIB0::5::INSTR', '1,E3648A mock,1', AgilentE3644AMock())
+
+
+def test_header():
+    assert header('SOUR:FREQ 1GHz') == 'SOUR:FREQ'
+    assert header('  *IDN?') == '*IDN?'
+    assert header('INST:SEL OUTP1;:VOLT 1V') == 'INST:SEL;...'
+
+
+def test_set_hook_returns_the_previous_one(metrics):
+    assert instrumentation.get_hook() is metrics
+    other = CommandMetrics()
+    assert instrumentation.set_hook(other) is metrics
+    assert instrumentation.set_hook(metrics) is other
+
+
+def test_driver_calls_are_recorded_per_header(metrics):
+    src = source()
+    src.set_voltage(2, 3.3, 'V')
+    src.set_voltage(2, 1.0, 'V')
+    src.read_current(2)
+
+    stats = metrics.stats('E3648A mock')
+    assert stats[('E3648A mock', 'VOLT')].count == 2
+    assert stats[('E3648A mock', 'VOLT')].bytes_out == len('VOLT 3.3V') + len('VOLT 1.0V')
+    assert stats[('E3648A mock', 'MEAS:CURR?')].bytes_in > 0
+    assert metrics.stats('other') == {}
+    assert metrics.totals()['E3648A mock'].count == sum(stat.count for stat in stats.values())
+
+
+def test_nothing_is_recorded_without_a_hook(metrics):
+    instrumentation.set_hook(None)
+    try:
+        source().set_voltage(1, 1.0, 'V')
+    finally:
+        instrumentation.set_hook(metrics)
+    assert metrics.stats() == {}
+
+
+def test_histogram_buckets():
+    stat = CommandStats()
+    for elapsed in (0.00005, 0.0001, 0.0002, 0.05, 20.0):
+        stat.add(elapsed, 10, 0)
+    assert stat.histogram[0] == 2
+    assert stat.histogram[1] == 1
+    assert stat.histogram[CommandStats.buckets.index(0.1)] == 1
+    assert stat.histogram[-1] == 1
+    assert stat.count == 5 and stat.bytes_out == 50
+    assert stat.min == 0.00005 and stat.max == 20.0
+    assert stat.mean == pytest.approx(sum((0.00005, 0.0001, 0.0002, 0.05, 20.0)) / 5)
+    assert CommandStats().as_dict()['min'] == 0.0
+
+
+def test_reset_dump_and_summary(metrics, tmp_path):
+    metrics.record('N9030A', ':TRACE:DATA? TRACE1', 0.002, 19, 8000)
+    metrics.record('N9030A', ':TRACE:DATA? TRACE2', 0.004, 19, 8000)
+    path = tmp_path / 'metrics.json'
+    metrics.dump_json(path)
+    dumped = json.loads(path.read_text())
+    assert dumped['N9030A :TRACE:DATA?']['count'] == 2
+    assert dumped['N9030A :TRACE:DATA?']['histogram']['0.003'] == 1
+    assert ':TRACE:DATA?' in metrics.summary(top=1)
+
+    metrics.reset()
+    assert metrics.stats() == {}
+
+
+def test_console_hook(capsys):
+    ConsoleHook(max_length=19).record('N9030A', ':TRACE:DATA? TRACE1', 0.001, 19, 8000)
+    out = capsys.readouterr().out
+    assert out == 'N9030A :TRACE:DATA?\n'
+
+
+def test_invalidating_on_error():
+    dropped = list()
+    with instrumentation.invalidating_on_error(lambda: dropped.append('shadow'), lambda: dropped.append('axis')):
+        pass
+    assert dropped == []
+
+    with pytest.raises(TimeoutError):
+        with instrumentation.invalidating_on_error(lambda: dropped.append('shadow'), lambda: dropped.append('axis')):
+            raise TimeoutError
+    assert dropped == ['shadow', 'axis']
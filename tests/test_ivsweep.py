@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from instr.agilente3644a import AgilentE3644A
+from instr.agilente3644amock import AgilentE3644AMock
+from instr.ivsweep import IVSweep
+
+
+class Recording(AgilentE3644AMock):
+    """
+    Mock keeping every program message as sent.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.messages = list()
+
+    def write(self, command):
+        self.messages.append(command)
+        return super().write(command)
+
+
+def supply(**kwargs):
+    session = Recording(**kwargs)
+    return AgilentE3644A('GPIB0::5::INSTR', '1,E3648A mock,1', session), session
+
+
+@pytest.mark.parametrize('trigger', ['APPLy', 'BUS'])
+def test_single_output(trigger):
+    src, session = supply(load_resistance=100.0)
+    sweep = IVSweep(src, chans=(1,), trigger=trigger, current_limit=0.1)
+    voltages = np.linspace(0, 5, 11)
+    sweep.load(voltages)
+    session.messages.clear()
+
+    result = sweep.run()
+    voltage, current = result[1]
+    np.testing.assert_allclose(voltage, voltages)
+    np.testing.assert_allclose(current, voltages / 100, atol=1e-9)
+    # outputs on, then one round trip per step
+    assert len(session.messages) == 1 + sweep.steps
+    assert sweep.elapsed > 0
+
+
+def test_current_limit():
+    src, _ = supply(load_resistance=10.0)
+    sweep = IVSweep(src, trigger='APPLy', current_limit=0.2)
+    sweep.load([1, 2, 3, 4])
+    _, current = sweep.run()[1]
+    np.testing.assert_allclose(current, [0.1, 0.2, 0.2, 0.2])
+
+
+@pytest.mark.parametrize('trigger', ['APPLy', 'BUS'])
+def test_two_outputs_own_steps(trigger):
+    src, _ = supply()
+    sweep = IVSweep(src, chans=(1, 2), trigger=trigger)
+    voltages = np.array([[0, 1, 2, 3], [5, 4, 3, 2]], dtype=float)
+    sweep.load(voltages)
+
+    result = sweep.run()
+    np.testing.assert_allclose(result[1][0], voltages[0])
+    np.testing.assert_allclose(result[2][0], voltages[1])
+
+
+def test_bus_steps_with_one_trigger():
+    src, session = supply()
+    sweep = IVSweep(src, chans=(1, 2), trigger='BUS')
+    sweep.load([1.0, 2.0])
+    # the first step is armed by load()
+    assert 'VOLTage:TRIGgered 1' in session.messages[-1]
+    session.messages.clear()
+
+    sweep.run()
+    steps = session.messages[1:]
+    assert all(message.startswith('*TRG') for message in steps)
+    assert all(message.count('*TRG') == 1 for message in steps)
+    # the next levels are armed after the readback, the last step arms nothing
+    assert steps[0].index('MEASure') < steps[0].index('VOLTage:TRIGgered 2')
+    assert 'TRIGgered' not in steps[1]
+
+
+def test_settle_splits_step_and_measurement():
+    src, session = supply()
+    sweep = IVSweep(src, trigger='APPLy', settle=0.01)
+    sweep.load([1.0, 2.0, 3.0])
+    session.messages.clear()
+
+    voltage, _ = sweep.run()[1]
+    np.testing.assert_allclose(voltage, [1.0, 2.0, 3.0])
+    assert len(session.messages) == 1 + 2 * sweep.steps
+    assert sweep.elapsed >= 0.03
+
+
+def test_finish_turns_outputs_off():
+    src, session = supply()
+    sweep = IVSweep(src, chans=(1, 2))
+    sweep.load([1.0])
+    sweep.finish()
+    assert 'OUTPut OFF' in session.messages[-1]
+    assert session.messages[-1].count('OUTPut OFF') == 2
+
+
+def test_wrong_trigger_mode():
+    src, _ = supply()
+    with pytest.raises(ValueError, match='Wrong trigger mode: EXT'):
+        IVSweep(src, trigger='EXT')
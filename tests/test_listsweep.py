@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from instr.agilentn5183a import AgilentN5183A
+from instr.agilentn5183amock import AgilentN5183AMock
+from instr.agilentn9030a import AgilentN9030A
+from instr.agilentn9030amock import AgilentN9030AMock
+from instr.listsweep import ListSweep, scpi_list
+
+
+class Recording:
+    """
+    Mock mixin keeping every program message as sent.
+    """
+    def __init__(self, **timing):
+        super().__init__(**timing)
+        self.messages = list()
+
+    def write(self, command):
+        self.messages.append(command)
+        return super().write(command)
+
+
+class GeneratorMock(Recording, AgilentN5183AMock):
+    pass
+
+
+class AnalyzerMock(Recording, AgilentN9030AMock):
+    pass
+
+
+def pair():
+    gen = AgilentN5183A('GPIB0::19::INSTR', '1,N5183A mock,1', GeneratorMock())
+    sa = AgilentN9030A('GPIB0::18::INSTR', '1,N9030A mock,1', AnalyzerMock())
+    return gen, sa
+
+
+def test_scpi_list():
+    assert scpi_list([1e9, 1.5e9, 2]) == '1000000000,1500000000,2'
+
+
+def test_load_sends_one_message_per_instrument():
+    gen, sa = pair()
+    sweep = ListSweep(gen, sa, sweep_time=0.002, settle=0.001)
+    sweep.load(np.linspace(1e9, 2e9, 11), -10)
+
+    assert len(gen._inst.messages) == 1
+    message = gen._inst.messages[0]
+    assert ':SOUR:LIST:FREQ 1000000000,1100000000' in message
+    assert ':SOUR:LIST:POW ' + ','.join(['-10'] * 11) in message
+    assert 'DWEL ' + ','.join(['0.003'] * 11) in message
+    assert 'OUTP:STAT ON' in message
+    assert len(sa._inst.messages) == 1
+    assert sa._inst.messages[0].startswith(':CONF:LIST')
+    assert 'EXTernal1' in sa._inst.messages[0]
+
+
+@pytest.mark.parametrize('trigger, triggers', [('IMMediate', 0), ('BUS', 5)])
+def test_run(trigger, triggers):
+    gen, sa = pair()
+    sweep = ListSweep(gen, sa, trigger=trigger, sweep_time=0.0, settle=0.0)
+    freqs = np.linspace(1e9, 2e9, 5)
+    sweep.load(freqs, 0)
+    gen._inst.messages.clear()
+
+    measured, powers = sweep.run()
+    np.testing.assert_array_equal(measured, freqs)
+    np.testing.assert_array_equal(powers, [-2.0] * 5)
+    assert gen._inst.messages.count('*TRG') == triggers
+    assert sweep.elapsed > 0
+
+    sweep.finish()
+    assert ':SOUR:FREQ:MODE CW' in gen._inst.messages
+
+
+def test_run_checks_the_point_count():
+    gen, sa = pair()
+    sweep = ListSweep(gen, sa)
+    sweep.load(np.linspace(1e9, 2e9, 5), 0)
+    sa._inst.write(':LIST:FREQ 1e9,2e9')
+    with pytest.raises(RuntimeError, match='Expected 5 list points, got 2'):
+        sweep.run()
+
+
+def test_reload_skips_unchanged_settings():
+    gen, sa = pair()
+    sweep = ListSweep(gen, sa)
+    sweep.load(np.linspace(1e9, 2e9, 5), 0)
+    sweep.load(np.linspace(1e9, 3e9, 5), 0)
+    assert 'OUTP:STAT ON' not in gen._inst.messages[1]
+    assert ':LIST:FREQ 1000000000,1500000000' in gen._inst.messages[1]
+
+
+def test_wrong_trigger():
+    with pytest.raises(ValueError):
+        ListSweep(*pair(), trigger='EXTernal')
@@ -0,0 +1,122 @@
+import math
+import statistics
+import time
+
+import pytest
+
+from instr import mocktransport
+from instr.mocktransport import FixedLatency, GPIB, Jitter, MockTimeoutError, MockTransport, SweepTime
+
+
+class Echo(MockTransport):
+    def handle(self, command):
+        return command.rstrip('?') if command.endswith('?') else None
+
+
+@pytest.fixture
+def defaults():
+    yield mocktransport.defaults
+    mocktransport.set_defaults()
+
+
+def test_fixed_latency():
+    model = FixedLatency(fixed=0.001, per_byte=1e-6)
+    assert model.delay(0) == 0.001
+    assert model.delay(1000) == pytest.approx(0.002)
+    assert GPIB.delay(100) > mocktransport.USB.delay(100) > mocktransport.LAN.delay(100)
+
+
+@pytest.mark.parametrize('distribution, mean', [('normal', 0.01 * math.sqrt(2 / math.pi)),
+                                                ('uniform', 0.005),
+                                                ('exponential', 0.01)])
+def test_jitter_distributions(distribution, mean):
+    model = Jitter(FixedLatency(fixed=1.0), distribution=distribution, scale=0.01, seed=1)
+    delays = [model.delay(0) - 1.0 for _ in range(5000)]
+    assert min(delays) >= 0
+    assert statistics.mean(delays) == pytest.approx(mean, rel=0.1)
+    if distribution == 'uniform':
+        assert max(delays) <= 0.01
+
+
+def test_jitter_seed_repeats():
+    first = Jitter(seed=7)
+    second = Jitter(seed=7)
+    assert [first.delay(10) for _ in range(5)] == [second.delay(10) for _ in range(5)]
+
+
+def test_jitter_unknown_distribution():
+    with pytest.raises(ValueError, match='Unknown distribution: poisson'):
+        Jitter(distribution='poisson')
+
+
+def test_sweep_time_follows_commands():
+    model = SweepTime(points=201, if_bandwidth=1e3, overhead=0.001)
+    assert model.duration() == pytest.approx(0.202)
+
+    model.observe('SENSe1:SWEep:POINts 401')
+    model.observe('SENS1:BWID 10 kHz')
+    assert (model.points, model.if_bandwidth) == (401, 1e4)
+    assert model.duration() == pytest.approx(0.0411)
+
+    model.observe(':SENS:BAND:RES 1e5')
+    model.dwell = 0.001
+    assert model.duration() == pytest.approx(0.001 + 401 * (1e-5 + 0.001))
+
+
+def test_sweep_observed_by_transport():
+    session = Echo(sweep=SweepTime(overhead=0.0))
+    session.write('SENS:SWE:POIN 11;SENS:BWID 1KHZ')
+    assert session.sweep.duration() == pytest.approx(0.011)
+
+
+def test_transport_copies_the_sweep_model():
+    model = SweepTime()
+    session = Echo(sweep=model)
+    session.write('SENS:SWE:POIN 11')
+    assert model.points == 201
+
+
+def test_opc_waits_for_the_sweep():
+    session = Echo(sweep=SweepTime(points=0, overhead=0.05))
+    start = time.perf_counter()
+    assert session.query(':INIT1:IMM;*OPC?') == '1'
+    assert time.perf_counter() - start >= 0.045
+    assert session.sweep_done
+
+
+def test_sweep_longer_than_timeout():
+    session = Echo(sweep=SweepTime(points=0, overhead=1.0), timeout=20)
+    session.write('INIT')
+    assert not session.sweep_done
+    with pytest.raises(MockTimeoutError, match='timeout is 20 ms'):
+        session.query('*OPC?')
+
+
+def test_unanswered_read_times_out():
+    session = Echo(timeout=1)
+    session.write('SENS:FREQ 1')
+    with pytest.raises(MockTimeoutError, match='nothing to read'):
+        session.read()
+
+
+def test_latency_applied_per_transfer():
+    session = Echo(latency=FixedLatency(fixed=0.01))
+    start = time.perf_counter()
+    assert session.query('A?;B?') == 'A;B'
+    assert time.perf_counter() - start >= 0.019
+
+
+def test_set_defaults(defaults):
+    latency = FixedLatency(fixed=0.001)
+    mocktransport.set_defaults(latency=latency, sweep=SweepTime(points=11), timeout=100)
+    session = Echo()
+    assert session.latency is latency
+    assert session.sweep.points == 11
+    assert session.timeout == 100
+
+    # explicit models win
+    assert Echo(timeout=5).timeout == 5
+
+    mocktransport.set_defaults()
+    session = Echo()
+    assert (session.latency, session.sweep, session.timeout) == (None, None, None)
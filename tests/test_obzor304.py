@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from instr.mocktransport import SweepTime
+from instr.obzor304 import Obzor304
+from instr.obzor304mock import Obzor304Session
+from instr.touchstone import read_touchstone
+
+
+class RecordingSession(Obzor304Session):
+    """
+    Session keeping every program message as sent.
+    """
+    def __init__(self, **timing):
+        super().__init__(**timing)
+        self.messages = list()
+
+    def write(self, command):
+        self.messages.append(command)
+        return super().write(command)
+
+
+def obzor(sweep=0.0):
+    session = RecordingSession(sweep=SweepTime(points=0, overhead=sweep))
+    vna = Obzor304('TCPIP::127.0.0.1::5025::INSTR', session)
+    session.messages.clear()
+    return vna, session
+
+
+def test_wait_complete_waits_for_the_sweep():
+    vna, session = obzor(sweep=0.05)
+    vna.trigger()
+    assert vna.wait_complete(timeout=1.0) >= 0.04
+
+
+def test_wait_complete_deadline():
+    vna, session = obzor(sweep=0.5)
+    vna.trigger()
+    with pytest.raises(TimeoutError, match='not complete in 0.05 s'):
+        vna.wait_complete(timeout=0.05)
+
+
+def test_measure_series_pipelines_save_and_next_trigger():
+    vna, session = obzor(sweep=0.01)
+    results = list(vna.measure_series([3, 4, 5], timeout=1.0))
+
+    assert [n for n, *_ in results] == [3, 4, 5]
+    for _, freqs, amps, cycle in results:
+        np.testing.assert_array_equal(freqs, [300, 4000, 50000, 600000, 7000000])
+        assert amps.shape == (5,)
+        assert cycle > 0
+
+    messages = [m for m in session.messages if m != '*ESR?']
+    stores = [m for m in messages if 'MMEM:STOR:SNP' in m]
+    assert len(stores) == 3
+    # the save of part N and the trigger of part N+1 go out in one message, the last save alone
+    assert all(m.endswith(':INIT1;*OPC') for m in stores[:2])
+    assert 'INIT1' not in stores[2]
+    assert sum('INIT1' in m for m in messages) == 3
+
+
+def test_measure_series_to_host_files(tmp_path):
+    vna, session = obzor()
+    vna.set_sparam_traces()
+    results = list(vna.measure_series(2, timeout=1.0, host_dir=str(tmp_path)))
+
+    assert [n for n, *_ in results] == [0, 1]
+    for n, freqs, sparams, _ in results:
+        assert sparams.shape == (5, 2, 2)
+        read_freqs, read_sparams = read_touchstone(tmp_path / f'lpf_{n:03}.s2p')[:2]
+        np.testing.assert_allclose(read_freqs, freqs)
+        np.testing.assert_allclose(read_sparams, sparams, rtol=1e-6, atol=1e-9)
+    assert not any('MMEM:STOR:SNP' in m for m in session.messages)
+
+
+def test_measure_series_of_nothing():
+    vna, session = obzor()
+    assert list(vna.measure_series([])) == []
+    assert session.messages == []
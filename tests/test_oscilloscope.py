@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from instr.oscilloscope import Oscilloscope
+from instr.oscilloscopemock import OscilloscopeMock
+
+
+class RecordingMock(OscilloscopeMock):
+    def __init__(self, **timing):
+        super().__init__(**timing)
+        self.commands = list()
+
+    def handle(self, command):
+        self.commands.append(command)
+        return super().handle(command)
+
+
+def scope(mock):
+    return Oscilloscope('TCPIP::127.0.0.1::INSTR', '1,MSO7104B mock,1', mock)
+
+
+@pytest.mark.parametrize('fmt', ['BYTE', 'WORD'])
+def test_read_waveform_takes_the_format_from_the_preamble(fmt):
+    mock = OscilloscopeMock()
+    mock.write(f':WAVeform:FORMat {fmt}')
+    osc = scope(mock)
+    osc._waveform_format = 'WORD' if fmt == 'BYTE' else 'BYTE'
+
+    preamble, volts = osc.read_waveform(chan=1, chunk_size=100)
+    assert len(volts) == preamble.points == 1000
+    expected = np.sin(2 * np.pi * 1e6 * np.arange(1000) * 1e-9)
+    np.testing.assert_allclose(volts, expected, atol=0.02)
+
+
+def test_read_waveform_checks_capacity_before_the_transfer():
+    mock = RecordingMock()
+    osc = scope(mock)
+    with pytest.raises(ValueError, match='does not fit'):
+        osc.read_waveform(chan=1, out=np.empty(10, dtype=np.float32))
+    assert not any(command.endswith(':DATA?') for command in mock.commands)
+
+
+def test_read_waveform_is_recorded():
+    from instr import instrumentation
+
+    metrics = instrumentation.CommandMetrics()
+    prev = instrumentation.set_hook(metrics)
+    try:
+        mock = OscilloscopeMock()
+        mock.write(':WAVeform:FORMat WORD')
+        scope(mock).read_waveform(chan=1, chunk_size=100)
+    finally:
+        instrumentation.set_hook(prev)
+
+    stats = metrics.stats('MSO7104B mock')[('MSO7104B mock', ':WAVeform:DATA?')]
+    assert stats.count == 1
+    assert stats.bytes_out == len(':WAVeform:DATA?')
+    # '#42000' header, 1000 two byte codes and the terminator
+    assert stats.bytes_in == 6 + 2000 + 1
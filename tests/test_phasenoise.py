@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from instr.phasenoise import find_spurs, integrated_noise, jitter_table, rms_jitter, rms_phase, spot_noise
+
+offsets = np.logspace(3, 6, 31)
+
+
+def slope(level, db_per_decade):
+    """
+    Trace falling by db_per_decade from level at 1 kHz.
+    """
+    return level + db_per_decade * np.log10(offsets / 1e3)
+
+
+@pytest.mark.parametrize('db_per_decade, expected', [
+    (0, 1e-10 * (1e6 - 1e3)),
+    (-10, 1e-10 * 1e3 * np.log(1e3)),
+    (-20, 1e-10 * 1e3 ** 2 * (1 / 1e3 - 1 / 1e6)),
+    (-30, 1e-10 * 1e3 ** 3 / 2 * (1 / 1e3 ** 2 - 1 / 1e6 ** 2)),
+])
+def test_integrated_noise_power_laws(db_per_decade, expected):
+    noise = slope(-100, db_per_decade)
+    assert integrated_noise(offsets, noise) == pytest.approx(10 * np.log10(expected), abs=1e-9)
+
+
+def test_integrated_noise_range():
+    noise = slope(-100, 0)
+    assert integrated_noise(offsets, noise, 1e4, 1e5) == pytest.approx(10 * np.log10(1e-10 * 9e4))
+    # range ends between points are interpolated, beyond the trace clipped
+    assert integrated_noise(offsets, noise, 1234, 1e7) == pytest.approx(10 * np.log10(1e-10 * (1e6 - 1234)))
+    with pytest.raises(ValueError, match='outside of the trace'):
+        integrated_noise(offsets, noise, 2e6, 3e6)
+
+
+def test_rms_phase_and_jitter():
+    noise = slope(-100, 0)
+    integrated = 1e-10 * (1e6 - 1e3)
+    assert rms_phase(offsets, noise) == pytest.approx(np.sqrt(2 * integrated))
+    assert rms_jitter(offsets, noise, 1e9) == pytest.approx(np.sqrt(2 * integrated) / (2 * np.pi * 1e9))
+
+
+def test_jitter_table():
+    noise = slope(-90, -10)
+    ranges = [(1e3, 1e6), (1e4, 1e5)]
+    table = jitter_table(offsets, noise, 100e6, ranges)
+
+    assert table.dtype.names == ('start', 'stop', 'noise', 'phase', 'phase_deg', 'jitter')
+    for row, (start, stop) in zip(table, ranges):
+        assert (row['start'], row['stop']) == (start, stop)
+        assert row['noise'] == pytest.approx(integrated_noise(offsets, noise, start, stop))
+        assert row['phase'] == pytest.approx(rms_phase(offsets, noise, start, stop))
+        assert row['phase_deg'] == pytest.approx(np.degrees(row['phase']))
+        assert row['jitter'] == pytest.approx(rms_jitter(offsets, noise, 100e6, start, stop))
+
+
+def test_spot_noise_decades():
+    spots, levels = spot_noise(offsets, slope(-90, -20))
+    np.testing.assert_allclose(spots, [1e3, 1e4, 1e5, 1e6])
+    np.testing.assert_allclose(levels, [-90, -110, -130, -150])
+
+
+def test_spot_noise_given_offsets():
+    spots, levels = spot_noise(offsets, slope(-90, -20), spots=[10, 3e3, 2e6])
+    np.testing.assert_allclose(spots, [3e3])
+    np.testing.assert_allclose(levels, [-90 - 20 * np.log10(3)])
+
+
+def test_find_spurs():
+    noise = np.full(201, -120.0)
+    freqs = np.linspace(1e3, 1e5, 201)
+    noise[50] = -90
+    # two adjacent points are one spur, at the higher one
+    noise[120:122] = [-100, -95]
+    noise[150] = -115
+
+    spurs = find_spurs(freqs, noise, threshold=10)
+    np.testing.assert_allclose(spurs['offset'], freqs[[50, 121]])
+    np.testing.assert_allclose(spurs['level'], [-90, -95])
+    np.testing.assert_allclose(spurs['excess'], [30, 25])
+
+
+def test_find_spurs_on_clean_trace():
+    assert len(find_spurs(offsets, slope(-90, -20))) == 0
@@ -0,0 +1,38 @@
+import threading
+
+import numpy as np
+import pytest
+
+from instr.ringbuffer import SweepRingBuffer
+
+
+def test_overwrites_oldest():
+    buffer = SweepRingBuffer(capacity=2, points=3)
+    for n in range(3):
+        buffer.put(np.full(3, n), float(n))
+    buffer.close()
+    assert [seq for seq, _, _ in buffer] == [1, 2]
+    assert buffer.dropped == 1
+
+
+def test_producer_error_reaches_consumer():
+    buffer = SweepRingBuffer(capacity=4, points=2)
+
+    def produce():
+        buffer.put(np.ones(2), 0.0)
+        buffer.close(TimeoutError('VISA timeout'))
+
+    threading.Thread(target=produce).start()
+    frames = list()
+    with pytest.raises(TimeoutError):
+        for frame in buffer:
+            frames.append(frame)
+    assert len(frames) == 1
+    assert isinstance(buffer.error, TimeoutError)
+
+
+def test_first_error_is_kept():
+    buffer = SweepRingBuffer(capacity=1, points=1)
+    buffer.close(ValueError('parse'))
+    buffer.close()
+    assert isinstance(buffer.error, ValueError)
@@ -0,0 +1,25 @@
+import numpy as np
+
+from instr.phasenoise import find_spurs
+from instr.runningmedian import running_median
+from instr.spectrum import find_peaks
+
+
+def test_running_median():
+    values = np.array([1.0, 5.0, 2.0, 8.0, 3.0, 3.0, 100.0, 4.0])
+    np.testing.assert_array_equal(running_median(values, 3), [1, 2, 5, 3, 3, 3, 4, 4])
+    # even window narrowed to 3, window longer than the data cut to it
+    np.testing.assert_array_equal(running_median(values, 4), running_median(values, 3))
+    assert len(running_median(values[:2], 51)) == 2
+
+
+def test_peaks_and_spurs_share_the_floor():
+    rng = np.random.default_rng(0)
+    levels = -90 + rng.normal(0, 0.5, 1001)
+    levels[[200, 600]] = [-40, -60]
+    freqs = np.linspace(1e6, 1e9, 1001)
+
+    peaks = find_peaks(freqs, levels, excursion=10, window=31)
+    spurs = find_spurs(freqs, levels, threshold=10, window=31)
+    np.testing.assert_array_equal(peaks['index'], [200, 600])
+    np.testing.assert_allclose(peaks['excess'], spurs['excess'])
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from instr.semiconductoranalyzer import KIND_CURRENT, KIND_TIME, KIND_VOLTAGE, SemiconductorAnalyzer, decode_fmt3
+from instr.semiconductoranalyzermock import SemiconductorAnalyzerMock, fmt3_word
+
+# FMT 3 words packed by hand: source | range code << 26 | (count & 0x1ffff) << 9 | status << 6 | chan << 3 | kind
+WORDS = [
+    # measured current, 1 nA range (RI 11), count 25000, channel 1
+    (0x2CC35009, (False, 1, KIND_CURRENT, 0, 0.5e-9)),
+    # source output voltage, 2 V range, count -37500, channel 2
+    (0x86DB0810, (True, 2, KIND_VOLTAGE, 0, -1.5)),
+    # measured current in compliance (status 4), 1 A range (RI 20), count 50000, channel 3
+    (0x5186A119, (False, 3, KIND_CURRENT, 4, 1.0)),
+    # time stamp, 100 ms range, count 25000, channel 1; the last byte is a '\n'
+    (0x08C3500A, (False, 1, KIND_TIME, 0, 0.05)),
+]
+
+
+def test_decode_fmt3_known_words():
+    data = b''.join(word.to_bytes(4, 'big') for word, _ in WORDS)
+    items = decode_fmt3(data + b'\n')
+    assert len(items) == len(WORDS)
+    for item, (_, (source, chan, kind, status, value)) in zip(items, WORDS):
+        assert item['source'] == source
+        assert item['chan'] == chan
+        assert item['kind'] == kind
+        assert item['status'] == status
+        assert item['value'] == pytest.approx(value)
+
+
+def test_mock_encoder_known_words():
+    # every value above takes the smallest range that holds it
+    for word, (source, chan, kind, status, value) in WORDS:
+        assert fmt3_word(value, kind, chan, status, source) == word
+
+
+class TerminatedSession:
+    """
+    Answers XE with the given words, read_raw() stops at the first '\n' as a session with a termination
+    character does.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.unread = b''
+
+    def write(self, command):
+        if command == 'XE':
+            self.unread = self.data + b'\n'
+
+    def read_raw(self):
+        end = self.unread.index(b'\n') + 1
+        answer, self.unread = self.unread[:end], self.unread[end:]
+        return answer
+
+    def read_bytes(self, count, **kwargs):
+        answer, self.unread = self.unread[:count], self.unread[count:]
+        return answer
+
+
+def test_measure_staircase_reads_the_whole_answer():
+    # two steps of time and current of channel 1, then the sweep output of channel 1
+    words = [0x08C3500A, 0x2CC35009, fmt3_word(0.1, KIND_VOLTAGE, 1, source=True),
+             0x08C3500A, 0x2CC35009, fmt3_word(0.2, KIND_VOLTAGE, 1, source=True)]
+    session = TerminatedSession(b''.join(word.to_bytes(4, 'big') for word in words))
+    sa = SemiconductorAnalyzer('GPIB0::17::INSTR', '1,B1500A,1', session)
+    sa.configure_staircase(1, 0.1, 0.2, 2, 0.01)
+
+    result = sa.measure_staircase()[1]
+    assert session.unread == b''
+    np.testing.assert_allclose(result['voltage'], [0.1, 0.2])
+    np.testing.assert_allclose(result['current'], [0.5e-9, 0.5e-9])
+    np.testing.assert_allclose(result['time'], [0.05, 0.05])
+
+
+@pytest.mark.parametrize('timestamp', [0, 1])
+def test_mock_diode_sweep(timestamp):
+    sa = SemiconductorAnalyzer('GPIB0::17::INSTR', '1,B1500A mock,1', SemiconductorAnalyzerMock(noise=0, seed=1))
+    sa.configure_staircase(1, 0.0, 0.8, 41, 0.1)
+    sa.set_timestamp(timestamp)
+    result = sa.measure_staircase()[1]
+    assert len(result) == 41
+    np.testing.assert_allclose(result['voltage'], np.linspace(0, 0.8, 41), atol=1e-4)
+    assert np.all(np.diff(result['current'][10:]) > 0)
+    assert np.all(np.isnan(result['time'])) != bool(timestamp)
@@ -0,0 +1,89 @@
+import pytest
+
+from instr import sessionpool
+
+
+class Session:
+    def __init__(self, address, **kwargs):
+        self.address = address
+        self.kwargs = kwargs
+        self.timeout = 2000
+        self.queries = 0
+        self.closed = False
+
+    def query(self, question):
+        self.queries += 1
+        return f'Agilent Technologies,N5183A,{self.address},A.01'
+
+    def close(self):
+        self.closed = True
+
+
+class ResourceManager:
+    def __init__(self):
+        self.opened = list()
+        self.closed = False
+
+    def open_resource(self, address, **kwargs):
+        session = Session(address, **kwargs)
+        self.opened.append(session)
+        return session
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def rm(monkeypatch):
+    rm = ResourceManager()
+    monkeypatch.setattr(sessionpool, '_rm', rm)
+    monkeypatch.setattr(sessionpool, '_sessions', dict())
+    monkeypatch.setattr(sessionpool, '_idns', dict())
+    return rm
+
+
+def test_sessions_are_reused_by_address(rm):
+    first = sessionpool.open_resource('GPIB0::19::INSTR')
+    assert sessionpool.open_resource('GPIB0::19::INSTR') is first
+    assert sessionpool.open_resource('GPIB0::20::INSTR') is not first
+    assert len(rm.opened) == 2
+    assert sessionpool.is_pooled('GPIB0::19::INSTR', first)
+    assert not sessionpool.is_pooled('GPIB0::19::INSTR', Session('GPIB0::19::INSTR'))
+
+
+def test_socket_sessions_are_newline_terminated(rm):
+    inst = sessionpool.open_resource('TCPIP::127.0.0.1::5025::SOCKET')
+    assert inst.kwargs == {'read_termination': '\n', 'write_termination': '\n'}
+    assert sessionpool.open_resource('GPIB0::19::INSTR').kwargs == {}
+
+
+def test_identify_asks_once_per_session(rm):
+    inst, idn = sessionpool.identify('GPIB0::19::INSTR')
+    assert sessionpool.identify('GPIB0::19::INSTR') == (inst, idn)
+    assert inst.queries == 1
+
+    sessionpool.release('GPIB0::19::INSTR')
+    assert inst.closed
+    fresh, _ = sessionpool.identify('GPIB0::19::INSTR')
+    assert fresh is not inst
+    assert fresh.queries == 1
+
+
+def test_close_releases_pooled_and_closes_other_sessions(rm):
+    pooled = sessionpool.open_resource('GPIB0::19::INSTR')
+    sessionpool.close(pooled)
+    assert pooled.closed
+    assert not sessionpool.is_pooled('GPIB0::19::INSTR')
+
+    mock = Session('mock')
+    sessionpool.close(mock)
+    assert mock.closed
+
+
+def test_close_all(rm):
+    sessions = [sessionpool.open_resource(f'GPIB0::{address}::INSTR') for address in (5, 18, 19)]
+    sessionpool.close_all()
+    assert all(session.closed for session in sessions)
+    assert rm.closed
+    assert sessionpool._rm is None
+    assert not sessionpool.is_pooled('GPIB0::5::INSTR')
@@ -0,0 +1,72 @@
+import pytest
+
+from instr.shadowcache import ShadowCache, header_key, header_nodes
+
+
+def test_header_nodes():
+    assert header_nodes(':SYSTem:PRESet:USER') == ('SYST', 'PRES', 'USER')
+    assert header_nodes('syst:fpreset') == ('SYST', 'FPR')
+    assert header_nodes('CALC1:PAR:SEL "x"') == ('CALC', 'PAR', 'SEL')
+    assert header_nodes('*RST') == ('*RST',)
+
+
+@pytest.mark.parametrize('command', ['*RST', ':SYST:PRES', 'SYSTem:PRESet:USER', 'SYSTEM:FPRESET',
+                                     'MMEM:LOAD:STATe "a.sta"', 'MMEMory:LOAD:CSARchive "b"',
+                                     'FREQ 1GHz;:SYST:LOC'])
+def test_observe_invalidates(command):
+    shadow = ShadowCache()
+    sent = list()
+    shadow.send(sent.append, 'FREQ 1GHz')
+    assert shadow.observe(command)
+    shadow.send(sent.append, 'FREQ 1GHz')
+    assert sent == ['FREQ 1GHz', 'FREQ 1GHz']
+
+
+def test_driver_invalidating_headers():
+    assert not ShadowCache().observe(':CONF:LIST')
+    shadow = ShadowCache(invalidating=('CONFigure',))
+    shadow.send(lambda command: None, ':POW:ATT 10')
+    assert shadow.observe(':CONF:LIST')
+    assert ':POW:ATT' not in shadow
+
+
+def test_settings_are_not_invalidating():
+    shadow = ShadowCache()
+    assert not shadow.observe(':SYSTem:ERRor?')
+    assert not shadow.observe('MMEM:STOR:SNP "a.s2p"')
+    shadow.send(lambda command: None, 'POW -10')
+    assert shadow.send(lambda command: 'sent', 'POW -10') is None
+    assert shadow.stats == {'written': 1, 'saved': 1, 'invalidated': 0}
+
+
+def test_header_key():
+    assert header_key('SOURce:FREQuency') == header_key(':SOUR:FREQ') == header_key('sour1:freq')
+    assert header_key('POW') == header_key(':POW')
+    assert header_key('CALC2:MARK') != header_key('CALC1:MARK')
+    assert header_key('*RST') == ('*RST',)
+
+
+def test_spellings_share_one_entry():
+    shadow = ShadowCache()
+    sent = list()
+    shadow.send(sent.append, 'SOUR:FREQ 1GHz')
+    shadow.send(sent.append, ':SOURce:FREQuency 1GHz')
+    shadow.send(sent.append, ':SOUR:FREQ 2GHz')
+    shadow.send(sent.append, 'SOUR:FREQ 1GHz')
+    assert sent == ['SOUR:FREQ 1GHz', ':SOUR:FREQ 2GHz', 'SOUR:FREQ 1GHz']
+    assert ':SOURce1:FREQuency' in shadow
+    assert shadow.get('SOUR:FREQ') == '1GHz'
+    shadow.invalidate('SOURce:FREQuency')
+    assert 'SOUR:FREQ' not in shadow
+
+
+def test_n9030a_markers_go_through_the_shadow():
+    from instr.agilentn9030a import AgilentN9030A
+    from instr.agilentn9030amock import AgilentN9030AMock
+
+    sa = AgilentN9030A('GPIB0::18::INSTR', '1,N9030A mock,1', AgilentN9030AMock())
+    sa.set_marker_mode(1, 'POS')
+    assert sa.set_marker_mode(1, 'POS') is None
+    sa.remove_marker(1)
+    assert sa.set_marker_mode(1, 'POS') is not None
+    assert sa.shadow.stats['saved'] == 1
@@ -0,0 +1,88 @@
+import socket
+
+import numpy as np
+import pytest
+
+from instr.agilent34410a import Agilent34410A
+from instr.agilentn1914a import AgilentN1914A
+from instr.agilentn9030a import AgilentN9030A
+from instr.simulator import Simulator
+
+
+class SocketSession:
+    """
+    Raw socket session with '\n' read termination, read_raw() stops at the first '\n' as pyvisa's does.
+    """
+    def __init__(self, port):
+        self._socket = socket.create_connection(('localhost', port), timeout=5)
+        self._buffer = b''
+
+    def _fill(self):
+        data = self._socket.recv(65536)
+        if not data:
+            raise ConnectionError('closed')
+        self._buffer += data
+
+    def write(self, command):
+        self._socket.sendall(command.encode() + b'\n')
+
+    def read_raw(self):
+        while b'\n' not in self._buffer:
+            self._fill()
+        end = self._buffer.index(b'\n') + 1
+        data, self._buffer = self._buffer[:end], self._buffer[end:]
+        return data
+
+    def read(self):
+        return self.read_raw().decode().rstrip('\n')
+
+    def read_bytes(self, count, **kwargs):
+        while len(self._buffer) < count:
+            self._fill()
+        data, self._buffer = self._buffer[:count], self._buffer[count:]
+        return data
+
+    def query(self, question):
+        self.write(question)
+        return self.read()
+
+    def close(self):
+        self._socket.close()
+
+
+@pytest.fixture
+def simulator():
+    with Simulator({'N9030A': 0, '34410A': 0, 'N1914A': 0}) as sim:
+        yield sim
+
+
+def session(sim, model):
+    return SocketSession(int(sim.address(model).split('::')[2]))
+
+
+@pytest.mark.parametrize('fmt', ['REAL,32', 'REAL,64'])
+def test_n9030a_binary_trace(simulator, fmt):
+    sa = AgilentN9030A(simulator.address('N9030A'), '1,N9030A,1', session(simulator, 'N9030A'))
+    sa.trace_format(fmt, 'NORMal')
+    for _ in range(5):
+        freqs, levels = sa.fetch_trace()
+        assert len(freqs) == len(levels) == 1001
+        assert freqs[0] == 10e6 and freqs[-1] == 3.6e9
+        assert np.all((levels > -120) & (levels < 0))
+    assert sa.query('*IDN?').startswith('Agilent Technologies,N9030A')
+
+
+def test_34410a_binary_readings(simulator):
+    dmm = Agilent34410A(simulator.address('34410A'), '1,34410A,1', session(simulator, '34410A'))
+    dmm.configure_stream(3000, aperture=1e-4)
+    readings, stats = dmm.stream(3000, max_chunk=1000, poll=0.01)
+    assert len(readings) == stats.count == 3000
+    assert abs(stats.mean - 1.0) < 1e-3
+
+
+def test_n1914a_binary_acquire(simulator):
+    meter = AgilentN1914A(simulator.address('N1914A'), '1,N1914A,1', session(simulator, 'N1914A'))
+    meter.configure_buffered(500, chans=(1, 2))
+    timestamps, readings = meter.acquire(chans=(1, 2))
+    assert readings.shape == (2, 500)
+    assert len(timestamps) == 500
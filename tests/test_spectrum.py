@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from instr.agilentn9030a import AgilentN9030A
+from instr.agilentn9030amock import AgilentN9030AMock
+from instr.spectrum import channel_power, harmonics, largest_peaks, occupied_bandwidth, spurs
+
+freqs = np.linspace(0, 1e9, 1001)
+
+
+def trace(signals, floor=-100.0):
+    """
+    Signals one bin wide over a flat floor, (frequency, Hz; level, dBm) pairs.
+    """
+    levels = np.full(len(freqs), floor)
+    for freq, level in signals:
+        levels[np.argmin(np.abs(freqs - freq))] = level
+    return levels
+
+
+def test_harmonics():
+    levels = trace([(100e6, -10), (200e6, -40), (300e6, -50), (400e6, -60)])
+    table = harmonics(freqs, levels, count=4)
+    np.testing.assert_array_equal(table['order'], [1, 2, 3, 4])
+    np.testing.assert_allclose(table['freq'], [100e6, 200e6, 300e6, 400e6])
+    np.testing.assert_allclose(table['level'], [-10, -40, -50, -60])
+    np.testing.assert_allclose(table['dbc'], [0, -30, -40, -50])
+
+
+def test_harmonics_beyond_the_trace():
+    levels = trace([(400e6, -10)])
+    table = harmonics(freqs, levels, count=3)
+    np.testing.assert_allclose(table['level'][:2], [-10, -100])
+    assert np.isnan(table['level'][2]) and np.isnan(table['dbc'][2])
+
+
+def test_harmonics_given_fundamental_and_tolerance():
+    # the harmonic is 3 bins off, found only with a wider search range
+    levels = trace([(100e6, -10), (203e6, -40)])
+    assert harmonics(freqs, levels, fundamental=100e6, count=2)['level'][1] == -100
+    assert harmonics(freqs, levels, fundamental=100e6, count=2, tolerance=4e6)['level'][1] == -40
+
+
+def test_spurs_skip_carrier_and_harmonics():
+    levels = trace([(100e6, -10), (200e6, -40), (150e6, -70), (730e6, -60), (500e6, -95)])
+    table = spurs(freqs, levels)
+    np.testing.assert_allclose(table['freq'], [730e6, 150e6])
+    np.testing.assert_allclose(table['level'], [-60, -70])
+    np.testing.assert_allclose(table['dbc'], [-50, -60])
+    assert len(spurs(freqs, levels, count=1)) == 1
+
+
+def test_largest_peaks():
+    levels = trace([(100e6, -10), (200e6, -40), (150e6, -70)])
+    np.testing.assert_allclose(largest_peaks(freqs, levels, count=2)['freq'], [100e6, 200e6])
+
+
+def test_channel_power():
+    # flat -100 dBm in 1 MHz bins of 1 MHz RBW: 10 bins hold 10 dB more
+    levels = np.full(len(freqs), -100.0)
+    assert channel_power(freqs, levels, 500.5e6, 10e6, rbw=1e6, nbw=1.0) == pytest.approx(-90)
+    # noise bandwidth of the RBW filter wider than the bin lowers the sum
+    assert channel_power(freqs, levels, 500.5e6, 10e6, rbw=1e6) == pytest.approx(-90 - 10 * np.log10(1.056))
+    with pytest.raises(ValueError, match='outside of the trace'):
+        channel_power(freqs, levels, 2e9, 1e6, rbw=1e6)
+
+
+def test_channel_power_of_a_tone():
+    levels = trace([(500e6, -20)], floor=-200)
+    assert channel_power(freqs, levels, 500e6, 10e6, rbw=1e6, nbw=1.0) == pytest.approx(-20)
+
+
+def test_occupied_bandwidth():
+    # flat power over the band, 99 % of it between 0.5 % and 99.5 %
+    levels = trace([], floor=-200)
+    band = (freqs >= 400e6) & (freqs <= 600e6)
+    levels[band] = -50
+    bandwidth, low, high = occupied_bandwidth(freqs, levels)
+    assert low == pytest.approx(400e6, abs=2e6)
+    assert high == pytest.approx(600e6, abs=2e6)
+    assert bandwidth == pytest.approx(198e6, rel=0.02)
+
+    bandwidth, _, _ = occupied_bandwidth(freqs, levels, percent=50)
+    assert bandwidth == pytest.approx(100e6, rel=0.02)
+
+
+def test_occupied_bandwidth_of_a_window():
+    levels = trace([], floor=-200)
+    levels[(freqs >= 100e6) & (freqs <= 200e6)] = -50
+    levels[(freqs >= 700e6) & (freqs <= 800e6)] = -50
+    _, low, high = occupied_bandwidth(freqs, levels, center=750e6, span=200e6)
+    assert 695e6 < low < 710e6 and 790e6 < high < 805e6
+
+
+class ExtraField(AgilentN9030AMock):
+    """
+    Answers the trace query with a trailing empty field.
+    """
+    def read(self):
+        return super().read() + ';'
+
+
+@pytest.mark.parametrize('session', [AgilentN9030AMock(seed=1), ExtraField(seed=1)])
+def test_fetch_trace_ascii(session):
+    sa = AgilentN9030A('GPIB0::18::INSTR', '1,N9030A mock,1', session)
+    trace_freqs, levels = sa.fetch_trace()
+    assert len(trace_freqs) == len(levels) == 1001
+    assert (trace_freqs[0], trace_freqs[-1]) == (10e6, 3.6e9)
+    assert harmonics(trace_freqs, levels, count=3)['dbc'][1] == pytest.approx(-32, abs=3)
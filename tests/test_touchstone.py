@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from instr.touchstone import write_touchstone, read_touchstone
+
+
+def network(nports, points=11, seed=0):
+    rng = np.random.default_rng(seed)
+    freqs = np.linspace(1e6, 3e9, points)
+    sparams = rng.uniform(0.01, 1, (points, nports, nports)) * np.exp(1j * rng.uniform(-3, 3, (points, nports, nports)))
+    return freqs, sparams
+
+
+@pytest.mark.parametrize('nports', [1, 2, 3, 5])
+@pytest.mark.parametrize('fmt', ['DB', 'MA', 'RI'])
+def test_round_trip(tmp_path, nports, fmt):
+    freqs, sparams = network(nports)
+    path = tmp_path / f'dut.s{nports}p'
+    write_touchstone(path, freqs, sparams, fmt=fmt, z0=75, comments=['mock'])
+
+    read_freqs, read_sparams, z0 = read_touchstone(path)
+    np.testing.assert_allclose(read_freqs, freqs)
+    np.testing.assert_allclose(read_sparams, sparams, rtol=1e-7)
+    assert z0 == 75
+
+
+@pytest.mark.parametrize('freq_unit', ['HZ', 'KHZ', 'MHZ', 'GHZ'])
+def test_frequency_unit(tmp_path, freq_unit):
+    freqs, sparams = network(2)
+    freqs += 1
+    path = tmp_path / 'dut.s2p'
+    write_touchstone(path, freqs, sparams, freq_unit=freq_unit)
+    assert f'# {freq_unit} S DB R 50' in path.read_text()
+    np.testing.assert_allclose(read_touchstone(path)[0], freqs, rtol=1e-12)
+
+
+def test_two_port_order(tmp_path):
+    # 2-port files keep the N11 N21 N12 N22 order
+    freqs = [1e9]
+    sparams = np.array([[[1, 3], [2, 4]]], dtype=complex)
+    path = tmp_path / 'dut.s2p'
+    write_touchstone(path, freqs, sparams, fmt='RI')
+    values = path.read_text().splitlines()[-1].split()
+    assert [float(v) for v in values[1::2]] == [1, 2, 3, 4]
+
+
+def test_large_networks_split_rows(tmp_path):
+    freqs, sparams = network(5, points=2)
+    path = tmp_path / 'dut.s5p'
+    write_touchstone(path, freqs, sparams)
+    lines = path.read_text().splitlines()[1:]
+    # every port row takes two lines of at most four pairs, the frequency leads the first
+    assert len(lines) == 2 * 5 * 2
+    assert all(len(line.split()) <= 9 for line in lines)
+
+
+def test_one_port_vector(tmp_path):
+    freqs, sparams = network(1)
+    path = tmp_path / 'dut.s1p'
+    write_touchstone(path, freqs, sparams[:, 0, 0])
+    np.testing.assert_allclose(read_touchstone(path)[1], sparams, rtol=1e-7)
+
+
+def test_write_errors(tmp_path):
+    freqs, sparams = network(2)
+    with pytest.raises(ValueError, match='Got 10 frequencies for 11 points'):
+        write_touchstone(tmp_path / 'dut.s2p', freqs[:-1], sparams)
+
+
+def test_read_errors(tmp_path):
+    path = tmp_path / 'dut.txt'
+    path.write_text('# HZ S RI R 50\n1 0 0\n')
+    with pytest.raises(ValueError, match='Can not tell port count'):
+        read_touchstone(path)
+
+    path = tmp_path / 'dut.s2p'
+    path.write_text('# HZ S RI R 50\n1 0 0 0 0\n')
+    with pytest.raises(ValueError, match='do not make whole 2-port points'):
+        read_touchstone(path)
+
+
+def test_read_defaults(tmp_path):
+    # without an option line Touchstone means GHz, magnitude-angle, 50 Ohm
+    path = tmp_path / 'dut.s1p'
+    path.write_text('! comment\n1.5 0.5 90 ! trailing\n')
+    freqs, sparams, z0 = read_touchstone(path)
+    np.testing.assert_allclose(freqs, [1.5e9])
+    np.testing.assert_allclose(sparams[:, 0, 0], [0.5j], atol=1e-12)
+    assert z0 == 50
@@ -0,0 +1,127 @@
+import io
+import os
+import re
+
+import numpy as np
+
+FREQ_UNITS = {'HZ': 1.0, 'KHZ': 1e3, 'MHZ': 1e6, 'GHZ': 1e9}
+
+
+def _port_order(nports):
+    """
+    Index pairs in file order: N11 N21 N12 N22 for 2-port files, row by row otherwise.
+    """
+    if nports == 2:
+        return [(0, 0), (1, 0), (0, 1), (1, 1)]
+    return [(i, j) for i in range(nports) for j in range(nports)]
+
+
+def _to_pairs(values, fmt):
+    if fmt == 'RI':
+        return values.real, values.imag
+    magnitude = np.abs(values)
+    if fmt == 'DB':
+        with np.errstate(divide='ignore'):
+            magnitude = 20 * np.log10(magnitude)
+    return magnitude, np.degrees(np.angle(values))
+
+
+def _from_pairs(a, b, fmt):
+    if fmt == 'RI':
+        return a + 1j * b
+    if fmt == 'DB':
+        a = 10 ** (a / 20)
+    return a * np.exp(1j * np.radians(b))
+
+
+def write_touchstone(path, freqs, sparams, fmt='DB', freq_unit='HZ', z0=50.0, comments=()):
+    """
+    Write network data as Touchstone 1.x file, the whole table is formatted at once.
+
+    :param path: file name, .s<n>p extension is expected
+    :param freqs: frequencies, Hz
+    :param sparams: complex array (points, ports, ports), or (points,) for a 1-port
+    :param fmt: 'DB' (dB-angle), 'MA' (magnitude-angle) or 'RI' (real-imaginary)
+    :param freq_unit: unit of the frequency column
+    """
+    fmt = fmt.upper()
+    freq_unit = freq_unit.upper()
+    freqs = np.asarray(freqs, dtype=float)
+    sparams = np.asarray(sparams, dtype=complex)
+    if sparams.ndim == 1:
+        sparams = sparams.reshape(-1, 1, 1)
+    points, nports, _ = sparams.shape
+    if points != len(freqs):
+        raise ValueError(f'Got {len(freqs)} frequencies for {points} points')
+
+    columns = list()
+    for i, j in _port_order(nports):
+        columns.extend(_to_pairs(sparams[:, i, j], fmt))
+
+    # 1- and 2-port data is one line per point, larger ones are split to rows of at most 4 pairs
+    if nports <= 2:
+        lines = [[freqs / FREQ_UNITS[freq_unit]] + columns]
+    else:
+        lines = list()
+        for row in range(nports):
+            row_columns = columns[row * 2 * nports:(row + 1) * 2 * nports]
+            for chunk in range(0, 2 * nports, 8):
+                first = [freqs / FREQ_UNITS[freq_unit]] if row == 0 and chunk == 0 else []
+                lines.append(first + row_columns[chunk:chunk + 8])
+
+    blocks = list()
+    for n, line in enumerate(lines):
+        buf = io.StringIO()
+        # frequency column gets more digits to keep Hz resolution in GHz units
+        fmt_list = ['%.12g'] + ['%.9g'] * (len(line) - 1) if n == 0 else '%.9g'
+        np.savetxt(buf, np.column_stack(line), fmt=fmt_list, delimiter=' ')
+        blocks.append(buf.getvalue().splitlines())
+
+    with open(path, mode='wt', encoding='ascii') as f:
+        for comment in comments:
+            f.write(f'! {comment}\n')
+        f.write(f'# {freq_unit} S {fmt} R {z0:g}\n')
+        if len(blocks) == 1:
+            f.write('\n'.join(blocks[0]))
+        else:
+            f.write('\n'.join('\n'.join(point_lines) for point_lines in zip(*blocks)))
+        f.write('\n')
+
+
+def read_touchstone(path):
+    """
+    Read a Touchstone 1.x file straight into NumPy, noise parameters are not supported.
+    :return: (frequencies in Hz, complex array (points, ports, ports), reference impedance)
+    """
+    match = re.search(r'\.s(\d+)p$', os.fspath(path), re.IGNORECASE)
+    if not match:
+        raise ValueError(f'Can not tell port count from file name: {path}')
+    nports = int(match.group(1))
+
+    with open(path, mode='rt', encoding='ascii', errors='replace') as f:
+        text = f.read()
+
+    text = re.sub(r'!.*', '', text)
+    freq_unit, fmt, z0 = 'GHZ', 'MA', 50.0
+    option_line = re.search(r'^\s*#(.*)$', text, re.MULTILINE)
+    if option_line:
+        options = option_line.group(1).upper().split()
+        for i, option in enumerate(options):
+            if option in FREQ_UNITS:
+                freq_unit = option
+            elif option in ('DB', 'MA', 'RI'):
+                fmt = option
+            elif option == 'R':
+                z0 = float(options[i + 1])
+        text = text[:option_line.start()] + text[option_line.end():]
+
+    values = np.array(text.split(), dtype=float)
+    width = 1 + 2 * nports * nports
+    if values.size % width:
+        raise ValueError(f'{path}: {values.size} values do not make whole {nports}-port points')
+    table = values.reshape(-1, width)
+
+    sparams = np.empty((len(table), nports, nports), dtype=complex)
+    for k, (i, j) in enumerate(_port_order(nports)):
+        sparams[:, i, j] = _from_pairs(table[:, 1 + 2 * k], table[:, 2 + 2 * k], fmt)
+    return table[:, 0] * FREQ_UNITS[freq_unit], sparams, z0